@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def _read_umask():
+    # The umask can only be read by setting it, so do it once, before any writer threads start
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+@contextmanager
+def atomic_open(path, mode='wb'):
+    """Open a temporary file that replaces path once the with block completes
+
+    The file is written next to path, synced to disk and then renamed over
+    path, so readers, and whatever is left after a crash, see either the old
+    file or the new one. If the block raises, path is left untouched.
+
+    Args:
+        path (str): File to replace
+        mode (str): 'wb' or 'w'
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+        # mkstemp creates the file private: keep the permissions of the file being
+        # replaced, or give a new one the mode open() would have
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(temp_path, mode)
+
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    _fsync_directory(directory)
+
+
+def atomic_write(path, data):
+    """Replace the file at path with data so a crash never leaves it half written
+
+    Args:
+        path (str): File to replace
+        data (bytes): New contents
+    """
+    with atomic_open(path) as f:
+        f.write(data)
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """atomic_write for a JSON document; dump_kwargs go to json.dumps"""
+    atomic_write(path, json.dumps(data, **dump_kwargs).encode('utf-8'))
+
+
+def _fsync_directory(directory):
+    # Makes the rename itself durable; directories can't be opened for this on Windows
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -47,6 +47,20 @@ def clean_build_directories():
             print(f"Removing {dir_name} directory...")
             shutil.rmtree(dir_name)
 
+def compile_resources():
+    # Pack fonts and icons into resources_rc.py, which the app imports at startup,
+    # so the executable doesn't need a resources folder next to it
+    cmd = [sys.executable, '-m', 'PyQt5.pyrcc_main', 'resources.qrc', '-o', 'resources_rc.py']
+    print("Compiling Qt resources...")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        print("Resource compilation failed:")
+        print(result.stderr)
+        return False
+    
+    return True
+
 def run_pyinstaller():
     cmd = ['pyinstaller', 'timer_app.spec']
     print("Running PyInstaller...")
@@ -76,12 +90,16 @@ def main():
     # Clean build directories
     clean_build_directories()
     
+    # Compile fonts and icons into a resource module
+    resources_compiled = compile_resources()
+    
     # Run PyInstaller
     success = run_pyinstaller()
     
     if success:
-        # Copy resources if needed
-        copy_resources_if_needed()
+        # Without compiled resources the app reads them from disk
+        if not resources_compiled:
+            copy_resources_if_needed()
         print("\nBuild completed successfully!")
         print("Executable can be found in: dist/Mind_Before_Machine/MBM Clock.exe")
     else:
@@ -0,0 +1,191 @@
+import errno
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Give up on a lock held this long by another process
+LOCK_TIMEOUT_SECONDS = 10.0
+# Waits longer than this are reported as they happen
+SLOW_WAIT_SECONDS = 0.5
+
+_POLL_INTERVAL_SECONDS = 0.005
+_MAX_POLL_INTERVAL_SECONDS = 0.1
+
+# One FileLock per lock file in this process; see get_file_lock()
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def get_file_lock(path, timeout=LOCK_TIMEOUT_SECONDS):
+    """Return the process-wide FileLock for path, creating it on first use
+
+    flock() locks belong to the open file, so two FileLocks on the same
+    path in one process would block each other like separate processes,
+    and a thread holding one could deadlock on the other. Managers share
+    the lock through here instead of constructing their own.
+
+    Args:
+        path (str): Lock file path; relative paths are made absolute
+        timeout (float): Used only when the lock is first created
+
+    Returns:
+        FileLock: The same object for every call with the same path
+    """
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = FileLock(key, timeout)
+        return lock
+
+
+class FileLock:
+    """Advisory lock shared by every process that opens the same lock file
+
+    Used as a context manager around writes that other MBM Clock instances
+    (or scripts) may make at the same time. Uses fcntl.flock on POSIX and
+    msvcrt.locking on Windows; where neither exists it only locks between
+    threads. The lock is reentrant within a thread.
+
+    Get instances with get_file_lock(), which shares one per path: two
+    instances on the same file in one process exclude each other even
+    within a thread.
+
+    Time spent waiting for another process is recorded; see stats().
+
+    In a directory this process can't write to, an existing lock file is
+    opened read-only, which still locks. If there is none, the lock only
+    works between threads: nothing that could write there has created it,
+    and readers shouldn't fail for the lack of it.
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT_SECONDS):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+        self._acquisitions = 0
+        self._contended = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth > 0:
+            self._depth += 1
+            return
+
+        try:
+            self._fd = self._open()
+            start = time.perf_counter()
+            waited = self._lock_file(start)
+        except BaseException:
+            self._close()
+            self._thread_lock.release()
+            raise
+
+        self._depth = 1
+        self._acquisitions += 1
+        if waited > 0:
+            self._contended += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            if waited > SLOW_WAIT_SECONDS:
+                print(f"Waited {waited * 1000:.0f} ms for {self.path}")
+
+    def release(self):
+        if self._depth == 0:
+            raise RuntimeError(f"Releasing {self.path}, which is not locked")
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+            self._close()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def stats(self):
+        """Contention recorded so far
+
+        Returns:
+            dict: 'acquisitions', 'contended' (acquisitions that had to wait),
+                'total_wait_ms' and 'max_wait_ms'
+        """
+        return {
+            'acquisitions': self._acquisitions,
+            'contended': self._contended,
+            'total_wait_ms': self._total_wait * 1000,
+            'max_wait_ms': self._max_wait * 1000
+        }
+
+    def _open(self):
+        try:
+            return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            if e.errno not in (errno.EACCES, errno.EPERM, errno.EROFS):
+                raise
+        try:
+            return os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+
+    def _lock_file(self, start):
+        # Poll with a non-blocking lock so a stuck holder can't hang us forever
+        interval = _POLL_INTERVAL_SECONDS
+        while not self._try_lock():
+            waited = time.perf_counter() - start
+            if waited > self.timeout:
+                raise TimeoutError(f"Timed out after {waited:.1f} s waiting for {self.path}")
+            time.sleep(interval)
+            interval = min(interval * 2, _MAX_POLL_INTERVAL_SECONDS)
+
+        if interval == _POLL_INTERVAL_SECONDS:
+            return 0.0
+        return time.perf_counter() - start
+
+    def _try_lock(self):
+        if self._fd is None:
+            return True
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock_file(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        except OSError as e:
+            print(f"Error unlocking {self.path}: {e}")
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
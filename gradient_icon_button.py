@@ -1,14 +1,44 @@
+from collections import OrderedDict
+
 from PyQt5.QtWidgets import QPushButton
 from PyQt5.QtGui import QIcon, QPainter, QPixmap, QLinearGradient, QColor
 from PyQt5.QtCore import QSize, Qt
 
+# Rendered gradient icons shared by all buttons, keyed by
+# (icon path, start color, end color, icon size, device pixel ratio)
+_gradient_icon_cache = OrderedDict()
+GRADIENT_ICON_CACHE_SIZE = 64
+
+# Smooth-scaled copies of the full-size source icons, keyed by
+# (icon path, icon size, device pixel ratio), so a new color never rescales
+_scaled_source_cache = OrderedDict()
+SCALED_SOURCE_CACHE_SIZE = 32
+
+
+def _cache_get(cache, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache, key, value, max_size):
+    cache[key] = value
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+
 class GradientIconButton(QPushButton):
-    def __init__(self, icon_path, parent=None):
+    def __init__(self, icon_path, parent=None, pixmap=None):
         super().__init__(parent)
-        self.original_pixmap = QPixmap(icon_path)
+        self.icon_path = icon_path
+        # An already loaded pixmap (e.g. from the theme cache) saves reading the file again
+        self.original_pixmap = pixmap if pixmap is not None else QPixmap(icon_path)
         self.start_color = QColor(255, 0, 255)    # Default magenta
         self.end_color = QColor(0, 255, 255)      # Default cyan
         
+        # Cache key of the icon currently set, to skip redundant setIcon calls
+        self._rendered_key = None
+        
         # Set button properties
         self.setFlat(True)
         self.setStyleSheet("""
@@ -29,16 +59,55 @@ class GradientIconButton(QPushButton):
     def update_gradient_icon(self):
         if self.original_pixmap.isNull():
             return  # Guard against invalid pixmap
-            
-        # Create a copy of the original pixmap to apply the gradient
-        pixmap = self.original_pixmap.copy()
+        
+        icon_size = self.iconSize()
+        device_pixel_ratio = self.devicePixelRatioF()
+        
+        # preserves the intended rectangular area
+        self.setFixedSize(icon_size.width() + 10, icon_size.height() + 10)  # Add padding
+
+        key = (self.icon_path, self.start_color.rgba(), self.end_color.rgba(),
+               icon_size.width(), icon_size.height(), device_pixel_ratio)
+        
+        if key == self._rendered_key:
+            return  # Already showing this exact rendering
+        
+        # Blinking alternates between a few color pairs, so after the first cycle this is a lookup
+        icon = _cache_get(_gradient_icon_cache, key)
+        if icon is None:
+            icon = self.render_gradient_icon(icon_size, device_pixel_ratio)
+            _cache_put(_gradient_icon_cache, key, icon, GRADIENT_ICON_CACHE_SIZE)
+        
+        # Set the gradient-applied icon
+        self.setIcon(icon)
+        self._rendered_key = key
+    
+    def scaled_source(self, icon_size, device_pixel_ratio):
+        """The source icon smooth-scaled to icon_size on a device_pixel_ratio screen"""
+        key = (self.icon_path, icon_size.width(), icon_size.height(), device_pixel_ratio)
+        pixmap = _cache_get(_scaled_source_cache, key)
+        if pixmap is None:
+            pixmap = self.original_pixmap.scaled(
+                max(1, round(icon_size.width() * device_pixel_ratio)),
+                max(1, round(icon_size.height() * device_pixel_ratio)),
+                Qt.KeepAspectRatio,
+                Qt.SmoothTransformation
+            )
+            pixmap.setDevicePixelRatio(device_pixel_ratio)
+            _cache_put(_scaled_source_cache, key, pixmap, SCALED_SOURCE_CACHE_SIZE)
+        return pixmap
+    
+    def render_gradient_icon(self, icon_size, device_pixel_ratio):
+        # Render at the size the icon is shown at so painting never resamples the 300px source.
+        # Painting detaches the copy, so the cached scaled source stays untouched.
+        pixmap = QPixmap(self.scaled_source(icon_size, device_pixel_ratio))
         
         # Create a painter for the pixmap
         painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.Antialiasing)
         
-        # Create gradient
-        gradient = QLinearGradient(0, 0, 0, pixmap.height())
+        # Create gradient (painter coordinates are logical pixels)
+        gradient = QLinearGradient(0, 0, 0, pixmap.height() / device_pixel_ratio)
         gradient.setColorAt(0.0, self.start_color)
         gradient.setColorAt(1.0, self.end_color)
         
@@ -47,15 +116,19 @@ class GradientIconButton(QPushButton):
         painter.fillRect(pixmap.rect(), gradient)
         painter.end()
         
-        # Set the gradient-applied icon
-        self.setIcon(QIcon(pixmap))
-        
-        # preserves the intended rectangular area
-        if not self.original_pixmap.isNull():
-            iconSize = self.iconSize()
-            self.setFixedSize(iconSize.width() + 10, iconSize.height() + 10)  # Add padding
+        return QIcon(pixmap)
+    
+    def setIconPixmap(self, icon_path, pixmap):
+        if icon_path == self.icon_path:
+            return  # Same source icon
+        self.icon_path = icon_path
+        self.original_pixmap = pixmap
+        self._rendered_key = None
+        self.update_gradient_icon()
     
     def setGradientColors(self, start_color, end_color):
+        if start_color == self.start_color and end_color == self.end_color:
+            return  # Nothing to redraw
         self.start_color = start_color
         self.end_color = end_color
         self.update_gradient_icon()
@@ -65,5 +138,5 @@ class GradientIconButton(QPushButton):
             new_width = int(self.original_pixmap.width() * scale_factor)
             new_height = int(self.original_pixmap.height() * scale_factor)
             self.setIconSize(QSize(new_width, new_height))
-            # Update the button size to match icon size plus padding
-            self.setFixedSize(new_width + 10, new_height + 10)
\ No newline at end of file
+            # Re-render for the new size; this also resizes the button to fit
+            self.update_gradient_icon()
\ No newline at end of file
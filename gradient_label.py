@@ -1,6 +1,13 @@
+from collections import OrderedDict
+
 from PyQt5.QtWidgets import QLabel
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QLinearGradient, QPainter, QColor, QPen, QBrush
+from PyQt5.QtCore import Qt, QRect, QSize
+from PyQt5.QtGui import QLinearGradient, QPainter, QColor, QPen, QBrush, QPixmap
+
+# Characters pre-rendered into the glyph atlas; anything else is drawn directly
+ATLAS_CHARACTERS = "0123456789:"
+# Atlases kept per label: blinking alternates between two color schemes
+ATLAS_CACHE_SIZE = 4
 
 
 class GradientLabel(QLabel):
@@ -9,28 +16,108 @@ class GradientLabel(QLabel):
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.start_color = QColor(0, 255, 255)  # Cyan
         self.end_color = QColor(255, 0, 255)    # Magenta
-    
+
+        # Text is kept here rather than in QLabel so changing it never relayouts the window
+        self._text = text
+        self._atlases = OrderedDict()
+
+    def text(self):
+        return self._text
+
+    def setText(self, text):
+        if text == self._text:
+            return  # Nothing changes on screen
+
+        # Only the layout shape (length and ':' positions) affects the size hint
+        shape_changed = self._layout_shape(text) != self._layout_shape(self._text)
+        self._text = text
+        if shape_changed:
+            self.updateGeometry()
+        self.update()
+
+    def sizeHint(self):
+        # Size for the widest digits so counting down never changes the width
+        metrics = self.fontMetrics()
+        widest_digit = max(metrics.horizontalAdvance(digit) for digit in "0123456789")
+        width = sum(
+            widest_digit if char.isdigit() else metrics.horizontalAdvance(char)
+            for char in self._text
+        )
+        return QSize(width, metrics.height())
+
+    def minimumSizeHint(self):
+        return self.sizeHint()
+
     def paintEvent(self, event):
         painter = QPainter(self)
+
+        atlas = self._glyph_atlas() if all(char in ATLAS_CHARACTERS for char in self._text) else None
+        if atlas is None:
+            self._draw_text(painter, self.rect(), self._text)
+            return
+
+        # Center the string and blit the pre-rendered glyphs side by side
+        total_width = sum(atlas[char][1] for char in self._text)
+        x = (self.width() - total_width) // 2
+        for char in self._text:
+            pixmap, advance = atlas[char]
+            painter.drawPixmap(x, 0, pixmap)
+            x += advance
+
+    def _draw_text(self, painter, rect, text):
         painter.setRenderHint(QPainter.Antialiasing)
         painter.setRenderHint(QPainter.TextAntialiasing)
-        
+
         gradient = QLinearGradient(0, 0, 0, self.height())
         gradient.setColorAt(0.0, self.start_color)
         gradient.setColorAt(1.0, self.end_color)
-        
+
         painter.setFont(self.font())
         pen = QPen(QBrush(gradient), 1)
         painter.setPen(pen)
-        
-        text_rect = painter.fontMetrics().boundingRect(self.text())
-        
-        # Center text in widget
-        text_rect.moveCenter(self.rect().center())
-        
-        painter.drawText(text_rect, Qt.AlignCenter, self.text())
-    
+
+        painter.drawText(rect, Qt.AlignCenter, text)
+
+    def _glyph_atlas(self):
+        """Gradient-filled pixmaps of ATLAS_CHARACTERS for the current look
+
+        Returns:
+            dict: Character -> (pixmap, horizontal advance in logical pixels)
+        """
+        device_pixel_ratio = self.devicePixelRatioF()
+        key = (self.font().key(), self.height(), self.start_color.rgba(),
+               self.end_color.rgba(), device_pixel_ratio)
+        atlas = self._atlases.get(key)
+        if atlas is not None:
+            self._atlases.move_to_end(key)
+            return atlas
+
+        metrics = self.fontMetrics()
+        atlas = {}
+        for char in ATLAS_CHARACTERS:
+            advance = metrics.horizontalAdvance(char)
+            pixmap = QPixmap(max(1, round(advance * device_pixel_ratio)),
+                             max(1, round(self.height() * device_pixel_ratio)))
+            pixmap.setDevicePixelRatio(device_pixel_ratio)
+            pixmap.fill(Qt.transparent)
+
+            painter = QPainter(pixmap)
+            self._draw_text(painter, QRect(0, 0, advance, self.height()), char)
+            painter.end()
+
+            atlas[char] = (pixmap, advance)
+
+        self._atlases[key] = atlas
+        while len(self._atlases) > ATLAS_CACHE_SIZE:
+            self._atlases.popitem(last=False)
+        return atlas
+
+    def _layout_shape(self, text):
+        return ''.join('0' if char.isdigit() else char for char in text)
+
     def setGradientColors(self, start_color, end_color):
+        if start_color == self.start_color and end_color == self.end_color:
+            return  # Nothing to redraw
         self.start_color = start_color
         self.end_color = end_color
-        self.update()  # Trigger repaint
\ No newline at end of file
+        self.update()  # Trigger repaint
@@ -0,0 +1,84 @@
+from itertools import islice
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor
+
+# Entries pulled from the source each time the view asks for more rows
+FETCH_BATCH_SIZE = 100
+
+STATUS_COLORS = {
+    'Completed Clean': QColor(100, 255, 100),        # Green
+    'Completed with Cheating': QColor(255, 165, 0)   # Orange
+}
+
+
+class HistoryListModel(QAbstractListModel):
+    """List model over history entries, fetched incrementally
+
+    The model is given an iterable of history entry dicts and only pulls
+    FETCH_BATCH_SIZE entries at a time, when the view scrolls close to the
+    end of what has been fetched so far. Rows show the task name, time and
+    status; Qt.UserRole returns the entry itself.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries = []
+        self._source = iter(())
+        self._exhausted = True
+
+    def set_source(self, entries):
+        """Replace the rows with those of a new iterable of history entries"""
+        self.beginResetModel()
+        self._entries = []
+        self._source = iter(entries)
+        self._exhausted = False
+        self.endResetModel()
+
+    def entry(self, row):
+        if 0 <= row < len(self._entries):
+            return self._entries[row]
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self.entry(index.row())
+        if task is None:
+            return None
+
+        if role == Qt.DisplayRole:
+            timestamp = task.get('timestamp', 'Unknown time')
+            status = task.get('status', 'Completed')
+            task_name = task.get('task_name', f"Task {index.row() + 1}")
+            return f"{task_name} - {timestamp} - {status}"
+        if role == Qt.ForegroundRole:
+            return STATUS_COLORS.get(task.get('status'))
+        if role == Qt.UserRole:
+            return task
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+
+        batch = list(islice(self._source, FETCH_BATCH_SIZE))
+        if len(batch) < FETCH_BATCH_SIZE:
+            self._exhausted = True
+        if not batch:
+            return
+
+        first = len(self._entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self._entries.extend(batch)
+        self.endInsertRows()
@@ -1,85 +1,215 @@
+import io
 import json
 import os
 import datetime
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import islice
 from pathlib import Path
 
+from atomic_write import atomic_write_json
+from file_lock import get_file_lock
+from history_repair import (DamagedHistoryError, OK_STATUS, QUARANTINE_DIR, check_history_file,
+                            iter_history_entries, iter_history_files, repair_history_file)
+
+HISTORY_PREFIX = 'history_'
+# Legacy day files hold one JSON array that was rewritten on every save
+LEGACY_SUFFIX = '.json'
+# Journal day files hold one JSON entry per line and are only ever appended to
+JOURNAL_SUFFIX = '.jsonl'
+
+# Per-day entry counts, so listing dates never scans the directory
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Locked by every process writing to the history directory
+LOCK_NAME = '.history.lock'
+
+CLEAN_STATUS = 'Completed Clean'
+CHEATED_STATUS = 'Completed with Cheating'
+
+# Number of parsed days kept in memory
+HISTORY_CACHE_SIZE = 16
+# Larger days are streamed from their files on every read instead of being cached
+CACHED_DAY_MAX_ENTRIES = 5000
+# How long a cached day is trusted before its files are checked for outside changes
+CACHE_REVALIDATE_SECONDS = 1.0
+
+def create_history_manager(backend='json', history_dir='history', read_only=False):
+    """Create the history manager for the configured storage backend
+    
+    Args:
+        backend (str): 'json' for per-day files or 'sqlite' for a single database
+        history_dir (str): Directory holding the history data
+        read_only (bool): Never repair, quarantine or rewrite anything in history_dir
+        
+    Returns:
+        HistoryManager: A manager exposing the common history API
+    """
+    if backend == 'sqlite':
+        from sqlite_history_manager import SQLiteHistoryManager
+        return SQLiteHistoryManager(history_dir, read_only)
+    return HistoryManager(history_dir, read_only)
+
 class HistoryManager:
     
-    def __init__(self, history_dir='history'):
+    def __init__(self, history_dir='history', read_only=False):
         # Get the directory where the script is located
         script_dir = os.path.dirname(os.path.abspath(__file__))
         
         # Create history directory if it doesn't exist
         self.history_dir = os.path.join(script_dir, history_dir)
-        os.makedirs(self.history_dir, exist_ok=True)
+        if not read_only:
+            os.makedirs(self.history_dir, exist_ok=True)
+        
+        # Print each saved entry (scripts and simulations turn this off)
+        self.verbose = True
+        # For readers such as the mbm stats command: damaged files are only reported,
+        # and the manifest is kept in memory instead of being written back
+        self.read_only = read_only
+        
+        # Parsed days, least recently used first
+        self._cache = OrderedDict()
+        # Date -> {'count', 'clean', 'cheated'}, loaded from the manifest on first use
+        self._manifest = None
+        self._sorted_dates = None
+        # Date -> stats added to, or recounted in, _manifest since it was last written
+        self._manifest_delta = {}
+        self._manifest_overrides = {}
+        # (mtime, size) of the manifest file as last read or written
+        self._manifest_signature = None
+        self._manifest_checked_at = 0.0
+        # Saves may run on a background thread while the GUI thread reads
+        self._lock = threading.RLock()
+        # Other instances and scripts may write to the same directory; take after _lock
+        self._file_lock = get_file_lock(os.path.join(self.history_dir, LOCK_NAME))
+        
+        # Batch saves into one durable write per flush() instead of syncing every entry
+        self.group_commit = False
+        # (date, entry, journal line) of entries saved but not yet written; readers see them from here
+        self._pending = []
+        # The batch a flush is writing, still read from here until it is durable
+        self._writing = []
+        # Serializes flushes, which hold only the file lock while they write
+        self._flush_lock = threading.Lock()
+        self._manifest_dirty = False
+        # Bumped by rebuild_manifest(), so a failed flush doesn't restore changes it recounted
+        self._manifest_generation = 0
+        # Day files found damaged while reading, repaired by repair_damaged_files()
+        self._damaged_files = set()
     
-    def save_daily_history(self, task_data):
+    def save_daily_history(self, task_data, when=None):
         """Save task history for the current date
         
+        With group_commit off the entry is on disk when this returns. With it
+        on, the entry is visible to readers right away but only written by
+        the next flush().
+        
         Args:
             task_data (dict): Dictionary containing the task data to save
+            when (datetime.datetime, optional): Time to record the entry at. Defaults to now.
         """
         try:
-            # Get today's date in YYYY-MM-DD format
-            today = datetime.date.today().strftime('%Y-%m-%d')
-            
-            # Create filename based on date
-            history_file = os.path.join(self.history_dir, f"history_{today}.json")
-            
-            # Make sure task_data has a task_name
-            if 'task_name' not in task_data or not task_data['task_name']:
-                task_data['task_name'] = "Unnamed Task"
-                
-            # Convert phase objects to dictionaries if needed
-            if 'phases' in task_data and task_data['phases']:
-                serializable_phases = []
-                for phase in task_data['phases']:
-                    if isinstance(phase, dict):
-                        serializable_phases.append(phase)
-                    else:
-                        # For any non-dict objects
-                        serializable_phases.append({
-                            'name': getattr(phase, 'name', 'Unknown'),
-                            'status': getattr(phase, 'status', 'Unknown'),
-                            'cheated': getattr(phase, 'cheated', False)
-                        })
-                task_data['phases'] = serializable_phases
-            
-            # Check if file exists and load existing data
-            existing_data = []
-            if os.path.exists(history_file):
-                with open(history_file, 'r') as f:
-                    try:
-                        existing_data = json.load(f)
-                    except json.JSONDecodeError:
-                        # If file is corrupted, start with empty list
-                        existing_data = []
-            
-            # Add timestamp to this history entry
-            now = datetime.datetime.now().strftime('%H:%M:%S')
-            history_entry = {
-                'timestamp': now,
-                'phases': task_data.get('phases', []),
-                'status': task_data.get('status', 'Completed'),
-                'task_name': task_data.get('task_name', 'Unnamed Task')  # Ensure task_name is included
-            }
+            today, history_entry = self._build_entry(task_data, when)
             
-            # Append new entry to existing data
-            existing_data.append(history_entry)
-            
-            # Save updated history to file
-            with open(history_file, 'w') as f:
-                json.dump(existing_data, f, indent=4)
+            # Each entry is one journal line so a save never rereads the day
+            line = (json.dumps(history_entry) + '\n').encode('utf-8')
+            with self._lock:
+                # Load (or rebuild) the manifest before the new entry is on disk, so it's counted once
+                self._load_manifest()
+                self._pending.append((today, history_entry, line))
+                self._cache_append(today, history_entry)
+                self._manifest_add(today, history_entry)
             
             # Print debug info
-            print(f"History saved to {history_file}")
-            print(f"Entry: {history_entry}")
+            if self.verbose:
+                print(f"History saved to {self._journal_path(today)}")
+                print(f"Entry: {history_entry}")
             
+            if not self.group_commit:
+                return self.flush()
             return True
         except Exception as e:
             print(f"Error saving history: {e}")
             return False
     
+    def flush(self):
+        """Durably write entries saved since the last flush
+        
+        All pending entries of a day go out in one write and one fsync, and
+        the manifest is replaced atomically once for the whole batch. The
+        manager lock is only taken to hand the batch over and to settle up
+        afterwards, so readers (often on the GUI thread) never wait for the
+        disk; they keep reading the batch from memory until it is durable.
+        
+        Must not be called with the manager lock held.
+        
+        Returns:
+            bool: True if everything pending reached the disk
+        """
+        with self._flush_lock:
+            with self._lock:
+                # Read-only managers keep manifest corrections in memory
+                if not self._pending and (not self._manifest_dirty or self.read_only):
+                    return True
+                batch, self._pending = self._pending, []
+                self._writing = batch
+                manifest_changes = self._take_manifest_changes()
+            
+            written = {}
+            failed = batch
+            manifest_saved = False
+            try:
+                # Only the file lock is held from here on; taking the manager lock under it
+                # would invert the lock order
+                with self._file_lock:
+                    written, failed = self._write_batch(batch)
+                    if manifest_changes is not None:
+                        manifest_saved = self._write_manifest(manifest_changes)
+            except TimeoutError as e:
+                # Another process holds the directory; everything stays pending for the next flush
+                print(f"Error saving history: {e}")
+            
+            with self._lock:
+                self._writing = []
+                # Ahead of anything saved meanwhile, for the next flush
+                self._pending[:0] = failed
+                for date, (before, after) in written.items():
+                    self._cache_appended(date, before, after)
+                if manifest_saved:
+                    self._merge_manifest_file()
+                elif manifest_changes is not None:
+                    self._restore_manifest_changes(manifest_changes)
+            return not failed
+    
+    def _write_batch(self, batch):
+        """Append a batch of pending items to their days' journals
+        
+        Called with only the file lock held.
+        
+        Returns:
+            tuple: {date: (signature before, signature after)} of the days written,
+                and the items that could not be written
+        """
+        items_by_date = OrderedDict()
+        for item in batch:
+            items_by_date.setdefault(item[0], []).append(item)
+        
+        written = {}
+        failed = []
+        for date, items in items_by_date.items():
+            try:
+                before = self._file_signature(date)
+                self._write_lines(date, [line for _, _, line in items])
+                written[date] = (before, self._file_signature(date))
+            except Exception as e:
+                print(f"Error saving history: {e}")
+                # Kept for the next flush rather than dropped
+                failed.extend(items)
+        return written, failed
+    
     def load_daily_history(self, date=None):
         """Load history for a specific date
         
@@ -94,27 +224,35 @@ class HistoryManager:
             if date is None:
                 date = datetime.date.today().strftime('%Y-%m-%d')
             
-            # Create filename based on date
-            history_file = os.path.join(self.history_dir, f"history_{date}.json")
-            
-            # Check if file exists
-            if not os.path.exists(history_file):
-                return []
-            
-            # Load history from file
-            with open(history_file, 'r') as f:
-                history_data = json.load(f)
-                
-            # Ensure all entries have task_name (for legacy data)
-            for i, entry in enumerate(history_data):
-                if 'task_name' not in entry or not entry['task_name']:
-                    entry['task_name'] = f"Task {i+1}"
-            
-            return history_data
+            with self._lock:
+                return list(self._day_entries(date, repair=not self.read_only))
         except Exception as e:
             print(f"Error loading history: {e}")
             return []
     
+    def iter_history(self, start_date=None, end_date=None, status=None, name_prefix=None,
+                     offset=0, limit=None):
+        """Stream history entries across days, oldest day first
+        
+        Days are read one at a time, and only once the caller gets to them;
+        each is kept in the day cache, so browsing back and forth stays off the
+        disk. Each entry is a copy with its day added under 'date'.
+        
+        Args:
+            start_date (str, optional): First date to include, 'YYYY-MM-DD'
+            end_date (str, optional): Last date to include, 'YYYY-MM-DD'
+            status (str, optional): Only yield entries with this status
+            name_prefix (str, optional): Only yield entries whose task name starts with this
+            offset (int, optional): Number of matching entries to skip
+            limit (int, optional): Maximum number of entries to yield
+            
+        Yields:
+            dict: Matching history entries in the order they were saved
+        """
+        matching = self._iter_matching(start_date, end_date, status, name_prefix)
+        stop = None if limit is None else offset + limit
+        yield from islice(matching, offset, stop)
+    
     def get_available_dates(self):
         """Get list of dates that have history records
         
@@ -122,16 +260,770 @@ class HistoryManager:
             list: List of dates in 'YYYY-MM-DD' format
         """
         try:
-            dates = []
-            for filename in os.listdir(self.history_dir):
-                if filename.startswith('history_') and filename.endswith('.json'):
-                    # Extract date from filename (format: history_YYYY-MM-DD.json)
-                    date = filename[8:-5]  # Remove 'history_' prefix and '.json' suffix
-                    dates.append(date)
+            with self._lock:
+                if self._sorted_dates is None:
+                    # Sort dates newest first
+                    self._sorted_dates = sorted(self._load_manifest(), reverse=True)
+                return list(self._sorted_dates)
+        except Exception as e:
+            print(f"Error getting available dates: {e}")
+            return []
+    
+    def get_day_summaries(self):
+        """Get the number of entries recorded on each date
+        
+        Returns:
+            dict: Date in 'YYYY-MM-DD' format -> {'count', 'clean', 'cheated'}
+        """
+        try:
+            with self._lock:
+                return {date: dict(stats) for date, stats in self._load_manifest().items()}
+        except Exception as e:
+            print(f"Error getting day summaries: {e}")
+            return {}
+    
+    def rebuild_manifest(self):
+        """Recount every day file, e.g. after files were copied into the history directory
+        
+        Returns:
+            int: Number of dates found
+        """
+        # Locked throughout so no other writer adds entries between the count and the save
+        with self._lock, self._file_lock:
+            days = {}
+            # Entries not written yet are counted too; they are already in the deltas
+            unwritten = self._writing + self._pending
+            for date in self._scan_dates() | {item[0] for item in unwritten}:
+                entries = []
+                seen_ids = set()
+                for history_file in (self._legacy_path(date), self._journal_path(date)):
+                    if os.path.exists(history_file):
+                        try:
+                            for entry in self._iter_history_file(history_file):
+                                if not self._is_duplicate(entry, seen_ids):
+                                    entries.append(entry)
+                        except Exception as e:
+                            print(f"Error reading history file {history_file}: {e}")
+                for pending_date, entry, _ in unwritten:
+                    if pending_date == date and not self._is_duplicate(entry, seen_ids):
+                        entries.append(entry)
+                if entries:
+                    days[date] = self._day_stats(entries)
+            if not self.read_only:
+                self.repair_damaged_files()
+            
+            self._manifest = days
+            self._manifest_delta = {}
+            self._manifest_overrides = {}
+            self._manifest_generation += 1
+            self._sorted_dates = None
+            self._save_manifest(merge=False)
+        return len(days)
+    
+    def merge_history_file(self, path, date):
+        """Merge the entries of another copy of a day file into that day
+        
+        For example a copy from another machine, or the conflicting copy a
+        sync tool left behind. Entries already present, by id (or by content
+        for entries saved before ids were added), are skipped.
+        
+        Args:
+            path (str): Day file to merge from, in either format
+            date (str): Day to merge into, 'YYYY-MM-DD'
             
-            # Sort dates newest first
-            dates.sort(reverse=True)
+        Returns:
+            int: Number of entries added
+        """
+        try:
+            with self._lock, self._file_lock:
+                existing = set()
+                for entry in self._iter_day(date):
+                    existing.add(self._entry_key(entry))
+                
+                lines = []
+                for entry in self._iter_history_file(path):
+                    key = self._entry_key(entry)
+                    if key in existing:
+                        continue
+                    existing.add(key)
+                    lines.append((json.dumps(entry) + '\n').encode('utf-8'))
+                    self._manifest_add(date, entry)
+                # The source isn't ours to repair
+                self._damaged_files.discard(path)
+                
+                if lines:
+                    self._append_lines(date, lines)
+                    self._cache.pop(date, None)
+                    self._save_manifest()
+                return len(lines)
+        except Exception as e:
+            print(f"Error merging history file {path}: {e}")
+            return 0
+    
+    def lock_stats(self):
+        """Time spent waiting for other processes' writes to the history directory
+        
+        Returns:
+            dict: See FileLock.stats()
+        """
+        return self._file_lock.stats()
+    
+    def close(self):
+        """Write anything still pending; call when done with the manager"""
+        self.flush()
+    
+    def repair_damaged_files(self):
+        """Repair the day files found damaged while reading
+        
+        Each file is rewritten with the entries that could be recovered and
+        the damaged original is kept in history/quarantine.
+        
+        Returns:
+            list: repair_history_file results of the files repaired
+        """
+        results = []
+        # Under the file lock a line another process is still appending can't look torn
+        with self._lock, self._file_lock:
+            while self._damaged_files:
+                path = self._damaged_files.pop()
+                result = repair_history_file(path, self._quarantine_dir())
+                if result.get('quarantined'):
+                    print(f"Repaired {path} ({result['entries']} entries kept), "
+                          f"original saved as {result['quarantined']}")
+                results.append(result)
+        return results
+    
+    def scan_integrity(self, repair=False):
+        """Check every day file in the history directory, one file at a time
+        
+        Args:
+            repair (bool): Rewrite damaged files with what can be recovered
+            
+        Returns:
+            list: Per-file dicts with 'file', 'status', 'entries' and 'error'
+        """
+        self.flush()
+        results = []
+        quarantine_dir = self._quarantine_dir()
+        for path in iter_history_files(self.history_dir):
+            # Lock per file so an append in progress never looks like a torn line
+            with self._lock, self._file_lock:
+                if repair:
+                    result = repair_history_file(path, quarantine_dir)
+                else:
+                    result = check_history_file(path)
+            if result['status'] != OK_STATUS:
+                print(f"History file {path}: {result['status']} {result['error'] or ''}")
+            results.append(result)
+        
+        if any(result.get('quarantined') for result in results):
+            # Repaired days may hold fewer entries than counted
+            self.rebuild_manifest()
+        return results
+    
+    def _build_entry(self, task_data, when=None):
+        """Normalize task data into a history entry stamped with the current time
+        
+        Args:
+            task_data (dict): Dictionary containing the task data to save
+            when (datetime.datetime, optional): Time to stamp the entry with. Defaults to now.
+            
+        Returns:
+            tuple: The entry date in 'YYYY-MM-DD' format and the entry dict
+        """
+        # Make sure task_data has a task_name
+        if 'task_name' not in task_data or not task_data['task_name']:
+            task_data['task_name'] = "Unnamed Task"
+            
+        # Convert phase objects to dictionaries if needed
+        if 'phases' in task_data and task_data['phases']:
+            serializable_phases = []
+            for phase in task_data['phases']:
+                if isinstance(phase, dict):
+                    serializable_phases.append(phase)
+                else:
+                    # For any non-dict objects
+                    serializable_phases.append({
+                        'name': getattr(phase, 'name', 'Unknown'),
+                        'status': getattr(phase, 'status', 'Unknown'),
+                        'cheated': getattr(phase, 'cheated', False)
+                    })
+            task_data['phases'] = serializable_phases
+        
+        # Take date and timestamp from the same instant so they agree at midnight
+        now = when or datetime.datetime.now()
+        history_entry = {
+            'timestamp': now.strftime('%H:%M:%S'),
+            'phases': task_data.get('phases', []),
+            'status': task_data.get('status', 'Completed'),
+            'task_name': task_data.get('task_name', 'Unnamed Task'),  # Ensure task_name is included
+            # Identifies the entry when copies of a day are merged
+            'id': task_data.get('id') or uuid.uuid4().hex
+        }
+        return now.strftime('%Y-%m-%d'), history_entry
+    
+    def _iter_matching(self, start_date, end_date, status, name_prefix):
+        dates = sorted(
+            date for date in self.get_available_dates()
+            if (start_date is None or date >= start_date) and (end_date is None or date <= end_date)
+        )
+        for date in dates:
+            for entry in self._iter_day(date):
+                if status is not None and entry.get('status') != status:
+                    continue
+                if name_prefix is not None and not entry.get('task_name', '').startswith(name_prefix):
+                    continue
+                entry['date'] = date
+                yield entry
+    
+    def _iter_day(self, date):
+        """Yield copies of one day's entries, oldest first
+        
+        A cached day comes from memory. Otherwise the day's files are
+        streamed, so taking the first rows of a large day never parses the
+        rest of it. A day read to the end is cached if it is small enough.
+        """
+        try:
+            with self._lock:
+                cached = self._cache_lookup(date)
+                if cached is not None:
+                    entries = list(cached)
+                else:
+                    day = self._open_day(date)
+        except Exception as e:
+            # May be consumed by a Qt model, where an exception has nowhere to go
+            print(f"Error reading history for {date}: {e}")
+            return
+        
+        if cached is not None:
+            for entry in entries:
+                yield dict(entry)
+            return
+        
+        # Kept for the cache until the day turns out to be too large for it
+        history_data = []
+        stats = {'count': 0, 'clean': 0, 'cheated': 0}
+        reader = self._read_day(day)
+        try:
+            for entry in reader:
+                if history_data is not None:
+                    history_data.append(entry)
+                    if len(history_data) > CACHED_DAY_MAX_ENTRIES:
+                        history_data = None
+                self._count_entry(stats, entry)
+                yield dict(entry)
+        except Exception as e:
+            print(f"Error reading history for {date}: {e}")
+            return
+        finally:
+            # Closes the files when the caller stops early
+            reader.close()
+        
+        # Only a day read to the end gets here
+        with self._lock:
+            if history_data is not None:
+                self._cache_day(day, history_data)
+            # Correct the manifest if the day was changed or added outside this manager
+            self._manifest_reconcile(date, stats if stats['count'] else None)
+    
+    def _day_entries(self, date, repair=False):
+        """The entries of one day, from the cache or read from its files into the cache
+        
+        Called with the lock held. The returned list may belong to the cache.
+        
+        Args:
+            date (str): Date in 'YYYY-MM-DD' format
+            repair (bool): Repair the day's files right away if they are damaged,
+                instead of leaving them to the integrity scan
+        """
+        cached = self._cache_lookup(date)
+        if cached is not None:
+            return cached
+        
+        day = self._open_day(date)
+        history_data = list(self._read_day(day))
+        
+        if repair and self._damaged_files:
+            self.repair_damaged_files()
+            # The repair may have taken in lines appended after the day was opened
+            day['signature'] = None
+        
+        self._cache_day(day, history_data)
+        # Correct the manifest if the day was changed or added outside this manager
+        self._manifest_reconcile(date, self._day_stats(history_data) if history_data else None)
+        return history_data
+    
+    def _open_day(self, date):
+        """Open a day's files for _read_day()
+        
+        Called with the lock held. The file lock isn't taken, so a reader never
+        waits for a flush's fsync: a journal is read up to its last complete
+        line, which leaves out an append still being written, and legacy
+        files are only ever replaced whole.
+        
+        Returns:
+            dict: 'date', 'signature', the open 'files' and the 'pending' entries
+        """
+        # Taken before reading so a concurrent change forces a reload later
+        signature = self._file_signature(date)
+        files = []
+        try:
+            # Legacy entries come first, followed by anything journaled since
+            for path in (self._legacy_path(date), self._journal_path(date)):
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    continue
+                size = os.fstat(f.fileno()).st_size
+                if path.endswith(JOURNAL_SUFFIX):
+                    size = _complete_lines_size(f, size)
+                # Bytes appended after this point are left for the next read
+                bounded = _BoundedReader(f, size)
+                files.append((path, io.TextIOWrapper(io.BufferedReader(bounded),
+                                                     encoding='utf-8', errors='replace')))
+        except BaseException:
+            for _, f in files:
+                f.close()
+            raise
+        
+        # Entries saved but not flushed yet come from memory; flushing here would
+        # put the write and its fsync on the reader's (often the GUI) thread
+        return {'date': date, 'signature': signature, 'files': files,
+                'pending': self._pending_entries(date)}
+    
+    def _read_day(self, day):
+        """Yield the entries of a day opened by _open_day(), closing its files when done"""
+        seen_ids = set()
+        count = 0
+        try:
+            entries = [self._iter_history_file(path, f) for path, f in day['files']]
+            entries.append(iter(day['pending']))
+            for source in entries:
+                for entry in source:
+                    if self._is_duplicate(entry, seen_ids):
+                        continue
+                    # Legacy entries without a name are numbered by their place in the day
+                    if not entry.get('task_name'):
+                        entry['task_name'] = f"Task {count + 1}"
+                    count += 1
+                    yield entry
+        finally:
+            for _, f in day['files']:
+                f.close()
+    
+    def _cache_day(self, day, history_data):
+        # Called with the lock held, once the whole day has been read
+        date = day['date']
+        if day['signature'] is None or len(history_data) > CACHED_DAY_MAX_ENTRIES:
+            return
+        # A save or a flush since the day was opened would be missing from the entries read
+        if (self._file_signature(date) != day['signature']
+                or [id(entry) for entry in self._pending_entries(date)] != [id(entry) for entry in day['pending']]):
+            return
+        self._cache_store(date, day['signature'], history_data)
+    
+    def _pending_entries(self, date):
+        # Called with the lock held. The batch being flushed is older than what is still pending
+        return [entry for pending_date, entry, _ in self._writing + self._pending if pending_date == date]
+    
+    def _scan_dates(self):
+        # Dates of all day files in the directory (history_YYYY-MM-DD.json or .jsonl)
+        dates = set()
+        try:
+            filenames = os.listdir(self.history_dir)
+        except FileNotFoundError:
+            # Only read-only managers don't create the directory
             return dates
+        for filename in filenames:
+            if not filename.startswith(HISTORY_PREFIX):
+                continue
+            for suffix in (JOURNAL_SUFFIX, LEGACY_SUFFIX):
+                if filename.endswith(suffix):
+                    dates.add(filename[len(HISTORY_PREFIX):-len(suffix)])
+                    break
+        return dates
+    
+    def _quarantine_dir(self):
+        return os.path.join(self.history_dir, QUARANTINE_DIR)
+    
+    def _manifest_path(self):
+        return os.path.join(self.history_dir, MANIFEST_NAME)
+    
+    def _manifest_file_signature(self):
+        try:
+            stat = os.stat(self._manifest_path())
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+    
+    def _read_manifest_file(self):
+        # The days of the manifest on disk, or None if it is missing or unusable
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION and isinstance(manifest.get('days'), dict):
+                return manifest['days']
+            print("History manifest has an unknown format, rebuilding it")
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            print(f"Error getting available dates: {e}")
-            return []
\ No newline at end of file
+            print(f"History manifest is unreadable, rebuilding it: {e}")
+        return None
+    
+    def _load_manifest(self):
+        # Called with the lock held
+        now = time.monotonic()
+        if self._manifest is not None:
+            if now - self._manifest_checked_at > CACHE_REVALIDATE_SECONDS:
+                # Pick up days another process has saved since
+                self._manifest_checked_at = now
+                if self._manifest_file_signature() != self._manifest_signature:
+                    self._merge_manifest_file()
+            return self._manifest
+        
+        signature = self._manifest_file_signature()
+        days = self._read_manifest_file()
+        if days is not None:
+            self._manifest = days
+            self._manifest_signature = signature
+            self._manifest_checked_at = now
+            return self._manifest
+        
+        self.rebuild_manifest()
+        return self._manifest
+    
+    def _merge_manifest_file(self):
+        # Called with the lock held. Replays our unsaved changes onto the manifest on disk
+        signature = self._manifest_file_signature()
+        days = self._read_manifest_file()
+        if days is None:
+            return
+        self._apply_manifest_changes(days, self._manifest_overrides, self._manifest_delta)
+        self._manifest = days
+        self._manifest_signature = signature
+        self._sorted_dates = None
+    
+    def _apply_manifest_changes(self, days, overrides, delta):
+        # Recounted days replace what is there; entries added since are counted on top
+        for date, stats in overrides.items():
+            if stats is None:
+                days.pop(date, None)
+            else:
+                days[date] = dict(stats)
+        for date, added in delta.items():
+            stats = days.setdefault(date, {'count': 0, 'clean': 0, 'cheated': 0})
+            for key, value in added.items():
+                stats[key] = stats.get(key, 0) + value
+    
+    def _take_manifest_changes(self):
+        # Called with the lock held. Hands the unsaved manifest changes over to a flush
+        if not self._manifest_dirty or self.read_only:
+            return None
+        changes = {
+            'days': {date: dict(stats) for date, stats in self._manifest.items()},
+            'signature': self._manifest_signature,
+            'overrides': self._manifest_overrides,
+            'delta': self._manifest_delta,
+            'generation': self._manifest_generation
+        }
+        self._manifest_overrides = {}
+        self._manifest_delta = {}
+        self._manifest_dirty = False
+        return changes
+    
+    def _write_manifest(self, changes):
+        """Write manifest changes taken by _take_manifest_changes()
+        
+        Called with only the file lock held, so it works on the copy in
+        changes rather than on the manager's state.
+        
+        Returns:
+            bool: True if the manifest was written
+        """
+        days = changes['days']
+        if self._manifest_file_signature() != changes['signature']:
+            # Another process wrote it since we read it: apply our changes to its days instead
+            disk_days = self._read_manifest_file()
+            if disk_days is not None:
+                self._apply_manifest_changes(disk_days, changes['overrides'], changes['delta'])
+                days = disk_days
+        try:
+            atomic_write_json(self._manifest_path(), {'version': MANIFEST_VERSION, 'days': days}, sort_keys=True)
+            return True
+        except Exception as e:
+            print(f"Error saving history manifest: {e}")
+            return False
+    
+    def _restore_manifest_changes(self, changes):
+        # Called with the lock held, after a flush couldn't write the changes it took
+        if changes['generation'] != self._manifest_generation:
+            # rebuild_manifest() has recounted everything since
+            return
+        for date, stats in changes['overrides'].items():
+            # A recount made since supersedes this one
+            self._manifest_overrides.setdefault(date, stats)
+        for date, added in changes['delta'].items():
+            if date in self._manifest_overrides and date not in changes['overrides']:
+                continue
+            delta = self._manifest_delta.setdefault(date, {'count': 0, 'clean': 0, 'cheated': 0})
+            for key, value in added.items():
+                delta[key] = delta.get(key, 0) + value
+        self._manifest_dirty = True
+    
+    def _save_manifest(self, merge=True):
+        # Called with the lock held
+        if self.read_only:
+            return
+        try:
+            with self._file_lock:
+                # Another process wrote it since we read it: merge instead of overwriting its days
+                if merge and self._manifest_file_signature() != self._manifest_signature:
+                    self._merge_manifest_file()
+                atomic_write_json(self._manifest_path(),
+                                  {'version': MANIFEST_VERSION, 'days': self._manifest}, sort_keys=True)
+                self._manifest_signature = self._manifest_file_signature()
+            self._manifest_delta = {}
+            self._manifest_overrides = {}
+            self._manifest_dirty = False
+        except Exception as e:
+            print(f"Error saving history manifest: {e}")
+    
+    def _day_stats(self, entries):
+        stats = {'count': 0, 'clean': 0, 'cheated': 0}
+        for entry in entries:
+            self._count_entry(stats, entry)
+        return stats
+    
+    def _count_entry(self, stats, entry):
+        stats['count'] += 1
+        if entry.get('status') == CLEAN_STATUS:
+            stats['clean'] += 1
+        elif entry.get('status') == CHEATED_STATUS:
+            stats['cheated'] += 1
+    
+    def _manifest_add(self, date, entry):
+        # Called with the lock held
+        days = self._load_manifest()
+        if date not in days:
+            days[date] = {'count': 0, 'clean': 0, 'cheated': 0}
+            self._sorted_dates = None
+        delta = self._manifest_delta.setdefault(date, {'count': 0, 'clean': 0, 'cheated': 0})
+        for stats in (days[date], delta):
+            stats['count'] += 1
+            if entry.get('status') == CLEAN_STATUS:
+                stats['clean'] += 1
+            elif entry.get('status') == CHEATED_STATUS:
+                stats['cheated'] += 1
+        # Written with the entry by the next flush
+        self._manifest_dirty = True
+    
+    def _manifest_reconcile(self, date, stats):
+        # Called with the lock held; stats is None for a day without entries
+        days = self._load_manifest()
+        if days.get(date) == stats:
+            return
+        if stats is None:
+            del days[date]
+        else:
+            days[date] = stats
+        # Counted from the files, so it replaces whatever was added before
+        self._manifest_overrides[date] = stats
+        self._manifest_delta.pop(date, None)
+        self._sorted_dates = None
+        # Written by the next flush; saving here would put an fsync on the reader's thread
+        self._manifest_dirty = True
+    
+    def _entry_key(self, entry):
+        # Entries saved before ids were added are compared by content
+        return entry.get('id') or json.dumps(entry, sort_keys=True)
+    
+    def _is_duplicate(self, entry, seen_ids):
+        # A second copy of an entry, e.g. rewritten by a retried flush
+        entry_id = entry.get('id')
+        if entry_id is None:
+            return False
+        if entry_id in seen_ids:
+            return True
+        seen_ids.add(entry_id)
+        return False
+    
+    def _ensure_task_names(self, history_data):
+        # Ensure all entries have task_name (for legacy data)
+        for i, entry in enumerate(history_data):
+            if 'task_name' not in entry or not entry['task_name']:
+                entry['task_name'] = f"Task {i+1}"
+        return history_data
+    
+    def _file_signature(self, date):
+        # Modification time and size of both day files; any change invalidates the cache
+        signature = []
+        for path in (self._legacy_path(date), self._journal_path(date)):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def _cache_lookup(self, date):
+        cached = self._cache.get(date)
+        if cached is None:
+            return None
+        
+        now = time.monotonic()
+        if now - cached['checked_at'] > CACHE_REVALIDATE_SECONDS:
+            if self._file_signature(date) != cached['signature']:
+                # Changed outside this manager, parse it again
+                del self._cache[date]
+                return None
+            cached['checked_at'] = now
+        
+        self._cache.move_to_end(date)
+        return cached['entries']
+    
+    def _cache_store(self, date, signature, entries):
+        self._cache[date] = {
+            'signature': signature,
+            'checked_at': time.monotonic(),
+            'entries': entries
+        }
+        self._cache.move_to_end(date)
+        while len(self._cache) > HISTORY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    def _cache_append(self, date, entry):
+        # Keep a cached day current after our own save instead of dropping it
+        cached = self._cache.get(date)
+        if cached is not None:
+            cached['entries'].append(entry)
+    
+    def _append_lines(self, date, lines):
+        # Called with the lock and the file lock held
+        before = self._file_signature(date)
+        self._write_lines(date, lines)
+        self._cache_appended(date, before, self._file_signature(date))
+    
+    def _cache_appended(self, date, before, after):
+        # Called with the lock held. The cached day already holds the appended entries
+        cached = self._cache.get(date)
+        if cached is None or cached['signature'] == after:
+            return
+        if cached['signature'] != before:
+            # Another process wrote to the day too; reread it next time
+            del self._cache[date]
+            return
+        # It matches the files again
+        cached['signature'] = after
+        cached['checked_at'] = time.monotonic()
+    
+    def _write_lines(self, date, lines):
+        # Called with the file lock held
+        data = b''.join(lines)
+        with open(self._journal_path(date), 'a+b') as f:
+            # Start on a fresh line if a previous append was interrupted
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    data = b'\n' + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _legacy_path(self, date):
+        return os.path.join(self.history_dir, f"{HISTORY_PREFIX}{date}{LEGACY_SUFFIX}")
+    
+    def _journal_path(self, date):
+        return os.path.join(self.history_dir, f"{HISTORY_PREFIX}{date}{JOURNAL_SUFFIX}")
+    
+    def _iter_history_file(self, path, f=None):
+        """Yield the entries stored in a day file
+        
+        Handles both the legacy JSON array format and the line-delimited
+        journal format, streaming either. If the file is damaged, every entry
+        that can be recovered is still yielded and the file is queued for
+        repair_damaged_files().
+        
+        Args:
+            path (str): Path to a history file
+            f (optional): The file already opened in text mode; it is not closed here
+        """
+        if f is None:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                yield from self._iter_history_file(path, f)
+            return
+        try:
+            yield from iter_history_entries(f)
+        except DamagedHistoryError as e:
+            print(f"History file {path} is damaged: {e}")
+            self._damaged_files.add(path)
+
+
+class _BoundedReader(io.RawIOBase):
+    """Binary file reader that ends at a fixed size
+    
+    Lets a day file be streamed without holding the file lock: the size is
+    taken under the lock, and whatever another process appends afterwards
+    is not read.
+    """
+    
+    def __init__(self, f, size):
+        super().__init__()
+        self._f = f
+        self._size = size
+        self._pos = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def readinto(self, buffer):
+        count = min(len(buffer), self._size - self._pos)
+        if count <= 0:
+            return 0
+        data = self._f.read(count)
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, min(offset, self._size))
+        self._f.seek(self._pos)
+        return self._pos
+    
+    def tell(self):
+        return self._pos
+    
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+
+def _complete_lines_size(f, size, chunk_size=4096):
+    """Size of a journal up to the end of its last complete line
+    
+    Leaves out a line another process is still appending. A final line
+    that never got its newline, e.g. after a crash, is left out too until
+    the next append starts a fresh line after it; the integrity scan still
+    reports it.
+    """
+    end = size
+    while end > 0:
+        start = max(0, end - chunk_size)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b'\n')
+        if newline >= 0:
+            size = start + newline + 1
+            break
+        end = start
+    else:
+        size = 0
+    f.seek(0)
+    return size
@@ -0,0 +1,320 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+
+from atomic_write import atomic_open
+
+# Characters read from a day file at a time
+CHUNK_SIZE = 64 * 1024
+# A single entry larger than this is taken as damage rather than read to the end of the file
+MAX_ENTRY_SIZE = 1024 * 1024
+
+QUARANTINE_DIR = 'quarantine'
+
+HISTORY_PREFIX = 'history_'
+HISTORY_SUFFIXES = ('.jsonl', '.json')
+
+OK_STATUS = 'ok'
+DAMAGED_STATUS = 'damaged'
+REPAIRED_STATUS = 'repaired'
+UNREADABLE_STATUS = 'unreadable'
+
+
+class DamagedHistoryError(ValueError):
+    """Raised by the readers once every entry before the damage has been yielded
+
+    Attributes:
+        position (int): Character offset (legacy arrays) or line number (journals) of the damage
+        recovered (int): Number of entries yielded before the error
+    """
+
+    def __init__(self, message, position, recovered):
+        super().__init__(f"{message} at {position} ({recovered} entries recovered)")
+        self.position = position
+        self.recovered = recovered
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """Yield the objects of a JSON array, reading the file a chunk at a time
+
+    Only the entry being decoded is held in memory, so a day file of any
+    size is streamed. Reading stops at the first thing that isn't a
+    complete object; everything before it has been yielded by then.
+
+    Args:
+        f: Text file positioned at the start of the array
+        chunk_size (int): Characters to read at a time
+
+    Yields:
+        dict: Each entry of the array in order
+
+    Raises:
+        DamagedHistoryError: If the array is truncated or malformed
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    # Characters of the file dropped from the front of buffer
+    offset = 0
+    eof = False
+    count = 0
+    expect = '['
+
+    while True:
+        # Skip whitespace, reading on when the buffer runs out
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            offset += len(buffer)
+            buffer = f.read(chunk_size)
+            pos = 0
+            eof = not buffer
+
+        if pos >= len(buffer):
+            if expect == 'end':
+                return
+            raise DamagedHistoryError("Unexpected end of file", offset + pos, count)
+
+        char = buffer[pos]
+        if expect == '[':
+            if char != '[':
+                raise DamagedHistoryError("Expected '['", offset + pos, count)
+            pos += 1
+            expect = 'first'
+        elif expect == 'first' and char == ']':
+            pos += 1
+            expect = 'end'
+        elif expect in ('first', 'entry'):
+            # Decode one entry, reading more while it runs past the end of the buffer
+            while True:
+                try:
+                    entry, end = decoder.raw_decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    if eof or len(buffer) - pos > MAX_ENTRY_SIZE:
+                        raise DamagedHistoryError("Unreadable entry", offset + pos, count)
+                    chunk = f.read(chunk_size)
+                    eof = not chunk
+                    offset += pos
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+
+            if not isinstance(entry, dict):
+                raise DamagedHistoryError("Entry is not an object", offset + pos, count)
+
+            yield entry
+            count += 1
+            pos = end
+            expect = 'separator'
+
+            # Drop what has been decoded so the buffer stays about a chunk long
+            if pos >= chunk_size:
+                offset += pos
+                buffer = buffer[pos:]
+                pos = 0
+        elif expect == 'separator':
+            if char == ',':
+                expect = 'entry'
+            elif char == ']':
+                expect = 'end'
+            else:
+                raise DamagedHistoryError("Expected ',' or ']'", offset + pos, count)
+            pos += 1
+        else:
+            raise DamagedHistoryError("Data after the end of the array", offset + pos, count)
+
+
+def iter_journal(f):
+    """Yield the entries of a line-delimited journal
+
+    Unreadable lines are skipped so the entries after them are still
+    recovered; the error is raised once the whole file has been read.
+
+    Args:
+        f: Text file of one JSON object per line
+
+    Yields:
+        dict: Each readable entry in order
+
+    Raises:
+        DamagedHistoryError: If any line could not be read, giving the first one
+    """
+    count = 0
+    first_bad_line = None
+    bad_lines = 0
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            entry = None
+        if not isinstance(entry, dict):
+            if first_bad_line is None:
+                first_bad_line = line_number
+            bad_lines += 1
+            continue
+        yield entry
+        count += 1
+
+    if bad_lines:
+        raise DamagedHistoryError(f"{bad_lines} unreadable line(s), first", first_bad_line, count)
+
+
+def iter_history_entries(f):
+    """Yield the entries of a day file in either format
+
+    A file whose first non-blank character is '[' is a legacy JSON array,
+    anything else a journal.
+
+    Args:
+        f: Text file opened at its start
+
+    Raises:
+        DamagedHistoryError: If the file is damaged, after every recoverable entry
+    """
+    first_char = f.read(1)
+    while first_char and first_char.isspace():
+        first_char = f.read(1)
+    f.seek(0)
+
+    if first_char == '[':
+        yield from iter_json_array(f)
+    else:
+        yield from iter_journal(f)
+
+
+def check_history_file(path):
+    """Stream a day file and report whether it reads cleanly
+
+    Args:
+        path (str): Path to a history file
+
+    Returns:
+        dict: 'file', 'status' (ok, damaged or unreadable), 'entries' read and 'error'
+    """
+    result = {'file': path, 'status': OK_STATUS, 'entries': 0, 'error': None}
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for _ in iter_history_entries(f):
+                result['entries'] += 1
+    except DamagedHistoryError as e:
+        result['status'] = DAMAGED_STATUS
+        result['error'] = str(e)
+    except OSError as e:
+        result['status'] = UNREADABLE_STATUS
+        result['error'] = str(e)
+    return result
+
+
+def repair_history_file(path, quarantine_dir=None):
+    """Rewrite a damaged day file with every entry that can be recovered
+
+    The damaged original is copied into quarantine_dir (history/quarantine
+    by default) under a timestamped name before the repaired copy, in the
+    same format, atomically takes its place. Entries are streamed from one
+    file to the other, never all held in memory.
+
+    Args:
+        path (str): Path to a history file
+        quarantine_dir (str, optional): Where to keep the damaged original
+
+    Returns:
+        dict: As check_history_file, with status 'repaired' and 'quarantined'
+            (the path of the kept original) when the file was rewritten
+    """
+    result = check_history_file(path)
+    if result['status'] != DAMAGED_STATUS:
+        return result
+
+    if quarantine_dir is None:
+        quarantine_dir = os.path.join(os.path.dirname(path), QUARANTINE_DIR)
+
+    try:
+        os.makedirs(quarantine_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        quarantined = os.path.join(quarantine_dir, f"{os.path.basename(path)}.{stamp}")
+        # Copy rather than move, so a crash before the replace leaves the original in place
+        shutil.copy2(path, quarantined)
+
+        recovered = 0
+        legacy = path.endswith('.json')
+        with open(path, 'r', encoding='utf-8', errors='replace') as source, atomic_open(path, 'w') as target:
+            if legacy:
+                target.write('[')
+            try:
+                for entry in iter_history_entries(source):
+                    if legacy:
+                        target.write(',\n' if recovered else '\n')
+                        target.write(json.dumps(entry, indent=4))
+                    else:
+                        target.write(json.dumps(entry) + '\n')
+                    recovered += 1
+            except DamagedHistoryError:
+                pass
+            if legacy:
+                target.write('\n]' if recovered else ']')
+
+        result['status'] = REPAIRED_STATUS
+        result['entries'] = recovered
+        result['quarantined'] = quarantined
+    except Exception as e:
+        print(f"Error repairing history file {path}: {e}")
+    return result
+
+
+def iter_history_files(history_dir):
+    """Yield the paths of the day files in history_dir, oldest date first"""
+    try:
+        filenames = sorted(os.listdir(history_dir))
+    except OSError as e:
+        print(f"Error listing history directory {history_dir}: {e}")
+        return
+    for filename in filenames:
+        if filename.startswith(HISTORY_PREFIX) and filename.endswith(HISTORY_SUFFIXES):
+            yield os.path.join(history_dir, filename)
+
+
+def scan_history_dir(history_dir, repair=False):
+    """Check every day file in history_dir, one file at a time
+
+    Args:
+        history_dir (str): Directory holding the history_*.json(l) files
+        repair (bool): Repair damaged files as they are found
+
+    Yields:
+        dict: The check_history_file (or repair_history_file) result of each file
+    """
+    quarantine_dir = os.path.join(history_dir, QUARANTINE_DIR)
+    for path in iter_history_files(history_dir):
+        if repair:
+            yield repair_history_file(path, quarantine_dir)
+        else:
+            yield check_history_file(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check MBM-Clock history files for damage")
+    parser.add_argument('history_dir', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history'))
+    parser.add_argument('--repair', action='store_true',
+                        help="rewrite damaged files with what can be recovered")
+    args = parser.parse_args()
+
+    problems = 0
+    for result in scan_history_dir(args.history_dir, repair=args.repair):
+        line = f"{result['status']:<10} {result['entries']:>6} entries  {os.path.basename(result['file'])}"
+        if result['error']:
+            line += f"  {result['error']}"
+            problems += 1
+        print(line)
+    return 1 if problems and not args.repair else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
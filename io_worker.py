@@ -0,0 +1,118 @@
+import queue
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class IOWorker(QThread):
+    """Background thread that performs history and settings writes in order
+
+    Writes are queued from the GUI thread and executed one at a time, in the
+    order they were submitted. Results are reported back through signals,
+    which Qt delivers on the GUI thread.
+
+    History managers used with group commit are flushed whenever the queue
+    drains, so a burst of saves costs a single durable write. historySaved
+    is emitted after that flush, so whatever reacts to it finds nothing
+    left to write.
+    """
+
+    historySaved = pyqtSignal(bool)
+    settingsSaved = pyqtSignal(bool)
+    historyScanned = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._queue = queue.Queue()
+        self._stopped = False
+        # History managers with saves not yet flushed, and the results of those saves;
+        # only touched by the writing thread
+        self._unflushed = set()
+        self._unreported = []
+
+    def save_history(self, history_manager, task_data):
+        self.submit(self._save_history, history_manager, task_data)
+
+    def save_settings(self, settings_manager, settings_data):
+        self.submit(settings_manager.save_settings, settings_data, signal=self.settingsSaved)
+
+    def scan_history(self, history_manager, repair=False):
+        """Check (and optionally repair) every history file, reporting through historyScanned"""
+        self.submit(self._scan_history, history_manager, repair)
+
+    def submit(self, func, *args, signal=None):
+        """Queue a write to run on the worker thread
+
+        Args:
+            func (callable): Function performing the write
+            *args: Arguments passed to func
+            signal (pyqtSignal, optional): Signal emitted with func's result
+        """
+        if self._stopped or not self.isRunning():
+            # Nothing will drain the queue, so write right away rather than lose it
+            self._execute(func, args, signal)
+            self._flush_history()
+            return
+        self._queue.put((func, args, signal))
+
+    def flush(self):
+        """Block until every queued write has been performed"""
+        if self.isRunning():
+            self._queue.join()
+
+    def stop(self):
+        """Flush pending writes and stop the thread; safe to call more than once"""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self.isRunning():
+            self._queue.put(None)
+            self._queue.join()
+            self.wait()
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    self._flush_history()
+                    return
+                func, args, signal = item
+                self._execute(func, args, signal)
+                if self._queue.empty():
+                    # Nothing else is waiting: make the batch durable now
+                    self._flush_history()
+            finally:
+                self._queue.task_done()
+
+    def _save_history(self, history_manager, task_data):
+        saved = history_manager.save_daily_history(task_data)
+        self._unflushed.add(history_manager)
+        # Reported by _flush_history once the entry is on disk
+        self._unreported.append(saved)
+        return saved
+
+    def _scan_history(self, history_manager, repair):
+        self.historyScanned.emit(history_manager.scan_integrity(repair))
+
+    def _flush_history(self):
+        flushed = True
+        for history_manager in self._unflushed:
+            try:
+                flushed = history_manager.flush() and flushed
+            except Exception as e:
+                print(f"Error flushing history: {e}")
+                flushed = False
+        self._unflushed.clear()
+
+        unreported, self._unreported = self._unreported, []
+        for saved in unreported:
+            self.historySaved.emit(saved and flushed)
+
+    def _execute(self, func, args, signal):
+        try:
+            result = func(*args)
+        except Exception as e:
+            print(f"Error in background write: {e}")
+            result = False
+        if signal is not None:
+            signal.emit(bool(result))
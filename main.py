@@ -1,9 +1,12 @@
+import startup_trace
 import sys
 import os
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
 from timer_window import TimerWindow
+from single_instance import InstanceServer, send_command
 from platform_handler import PlatformHandler, IS_WINDOWS, IS_MACOS, IS_LINUX
+startup_trace.mark('imports')
 
 if __name__ == "__main__":
     # Enable high DPI scaling
@@ -15,6 +18,19 @@ if __name__ == "__main__":
         QApplication.setAttribute(Qt.AA_DisableWindowContextHelpButton)
 
     app = QApplication(sys.argv)
+    startup_trace.mark('QApplication')
+    
+    # Only one clock at a time: hand over to the running one if there is one
+    if send_command('show') is not None:
+        print("MBM Clock is already running")
+        sys.exit(0)
+    instance_server = InstanceServer()
+    if not instance_server.listen() and instance_server.other_instance:
+        # Lost a race with another launch, or the running clock was busy: let it show itself
+        send_command('show')
+        print("MBM Clock is already running")
+        sys.exit(0)
+    startup_trace.mark('instance check')
     
     # Platform-specific initialization
     if IS_WINDOWS:
@@ -28,6 +44,9 @@ if __name__ == "__main__":
     
     # Create and show the main timer window
     timer_window = TimerWindow()
+    startup_trace.mark('window')
+    # Scripts and editor plugins drive the clock through the instance server
+    instance_server.handler = timer_window.handle_remote_command
     timer_window.show()
     
     # Start the application event loop
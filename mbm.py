@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+"""
+Command-line interface to MBM Clock, without the GUI.
+
+    python -m mbm stats [--days N]
+    python -m mbm history [--from DATE] [--to DATE] [--status clean|cheated] [--name PREFIX]
+    python -m mbm export [--format jsonl|json|csv] [--output FILE]
+    python -m mbm run [--task NAME] [--no-wait]
+
+Reads and writes the same settings and history as the clock, through
+SettingsManager, HistoryManager and TimerEngine only, so Qt is never
+imported and commands start fast enough to be called from scripts.
+Only run writes: stats, history and export open the history read-only,
+so damaged files are reported but never repaired or quarantined.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+from history_manager import create_history_manager, CLEAN_STATUS, CHEATED_STATUS
+from settings_manager import SettingsManager
+from timer_engine import TimerEngine, phases_from_settings
+
+STATUS_CHOICES = {'clean': CLEAN_STATUS, 'cheated': CHEATED_STATUS}
+EXPORT_FIELDS = ['date', 'timestamp', 'task_name', 'status', 'phases', 'id']
+
+
+def open_history(args, settings):
+    # The manager resolves relative paths against its own directory; --history-dir
+    # is relative to where mbm is run
+    history_dir = os.path.abspath(args.history_dir) if args.history_dir else 'history'
+    history_manager = create_history_manager(settings.get('history_backend', 'json'), history_dir,
+                                             read_only=args.read_only)
+    history_manager.verbose = False
+    return history_manager
+
+
+def date_range(args):
+    # --days counts back from today and overrides --from
+    start_date, end_date = args.start_date, args.end_date
+    if getattr(args, 'days', None):
+        start = datetime.date.today() - datetime.timedelta(days=args.days - 1)
+        start_date = start.strftime('%Y-%m-%d')
+    return start_date, end_date
+
+
+def command_stats(args, settings, history_manager):
+    start_date, end_date = date_range(args)
+    days = {
+        date: stats for date, stats in history_manager.get_day_summaries().items()
+        if (start_date is None or date >= start_date) and (end_date is None or date <= end_date)
+    }
+
+    tasks = sum(stats['count'] for stats in days.values())
+    clean = sum(stats['clean'] for stats in days.values())
+    cheated = sum(stats['cheated'] for stats in days.values())
+    summary = {
+        'days': len(days),
+        'tasks': tasks,
+        'clean': clean,
+        'cheated': cheated,
+        'clean_rate': round(clean / tasks, 3) if tasks else None,
+        'streak': current_streak(history_manager.get_day_summaries()),
+        'by_day': {date: days[date] for date in sorted(days)}
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f"Days with tasks: {summary['days']}")
+    print(f"Tasks: {tasks}  clean: {clean}  with cheating: {cheated}")
+    if tasks:
+        print(f"Clean rate: {clean / tasks:.0%}")
+    print(f"Current streak: {summary['streak']} day(s)")
+    recent = sorted(days)[-args.show_days:]
+    if recent:
+        print()
+        print(f"{'Date':<12}{'Tasks':>6}{'Clean':>7}{'Cheated':>9}")
+        for date in recent:
+            stats = days[date]
+            print(f"{date:<12}{stats['count']:>6}{stats['clean']:>7}{stats['cheated']:>9}")
+    return 0
+
+
+def current_streak(summaries):
+    """Number of consecutive days with tasks, ending today (or yesterday if today has none yet)"""
+    day = datetime.date.today()
+    if day.strftime('%Y-%m-%d') not in summaries:
+        day -= datetime.timedelta(days=1)
+    streak = 0
+    while day.strftime('%Y-%m-%d') in summaries:
+        streak += 1
+        day -= datetime.timedelta(days=1)
+    return streak
+
+
+def iter_selected(args, history_manager):
+    start_date, end_date = date_range(args)
+    return history_manager.iter_history(
+        start_date=start_date,
+        end_date=end_date,
+        status=STATUS_CHOICES.get(args.status),
+        name_prefix=args.name,
+        offset=args.offset,
+        limit=args.limit
+    )
+
+
+def command_history(args, settings, history_manager):
+    for entry in iter_selected(args, history_manager):
+        if args.json:
+            print(json.dumps(entry))
+        else:
+            print(f"{entry['date']} {entry.get('timestamp', '--:--:--')}  "
+                  f"{entry.get('status', 'Completed'):<24} {entry.get('task_name', '')}")
+    return 0
+
+
+def command_export(args, settings, history_manager):
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    exported = 0
+    try:
+        entries = iter_selected(args, history_manager)
+        if args.format == 'csv':
+            import csv
+            writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for entry in entries:
+                row = dict(entry, phases=json.dumps(entry.get('phases', [])))
+                writer.writerow(row)
+                exported += 1
+        elif args.format == 'json':
+            # Streamed, so exports of any size never build the whole list
+            output.write('[')
+            for entry in entries:
+                output.write(',\n' if exported else '\n')
+                output.write(json.dumps(entry))
+                exported += 1
+            output.write('\n]\n' if exported else ']\n')
+        else:
+            for entry in entries:
+                output.write(json.dumps(entry) + '\n')
+                exported += 1
+    finally:
+        if args.output:
+            output.close()
+
+    if args.output:
+        print(f"Exported {exported} entries to {args.output}")
+    return 0
+
+
+def command_run(args, settings, history_manager):
+    phases = phases_from_settings(settings)
+    engine = TimerEngine(phases)
+
+    def show_time():
+        if not engine.task_active:
+            return
+        phase = engine.current_phase()
+        minutes, seconds = divmod(engine.seconds, 60)
+        sys.stdout.write(f"\r{phase.name if phase else ''}  {minutes:02d}:{seconds:02d} ")
+        sys.stdout.flush()
+
+    engine.add_listener('time_changed', show_time)
+
+    print(f"Task: {args.task} ({len(phases)} phase(s), Ctrl+C to stop without saving)")
+    try:
+        engine.start_task(args.task)
+        while True:
+            remaining = engine.tick()
+            if remaining is not None and remaining > 0:
+                # Wake up as the display changes to the next second
+                time.sleep(remaining - int(remaining) or 1.0)
+                continue
+
+            # Phase finished: record it the way opening the notes window does
+            engine.open_notes()
+            print("\a")
+            if engine.is_last_phase():
+                break
+            if not args.no_wait:
+                try:
+                    input(f"Press Enter to start {phases[engine.current_phase_index + 1].name}...")
+                except EOFError:
+                    pass
+            engine.next_phase()
+    except KeyboardInterrupt:
+        print("\nStopped; the task was not saved")
+        return 130
+
+    task_entry = engine.complete_task()
+    if not history_manager.save_daily_history(task_entry):
+        return 1
+    print(f"Task '{args.task}' completed: {task_entry['status']}")
+    return 0
+
+
+def add_selection_arguments(parser):
+    parser.add_argument('--from', dest='start_date', help="First date to include (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end_date', help="Last date to include (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, help="Only the last N days, including today")
+    parser.add_argument('--status', choices=sorted(STATUS_CHOICES), help="Only clean or cheated tasks")
+    parser.add_argument('--name', help="Only tasks whose name starts with this")
+    parser.add_argument('--offset', type=int, default=0, help="Skip this many matching entries")
+    parser.add_argument('--limit', type=int, help="Stop after this many entries")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='mbm', description="MBM Clock history and timer from the terminal")
+    parser.add_argument('--history-dir',
+                        help="History directory (default: the clock's own)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stats_parser = subparsers.add_parser('stats', help="Task counts and clean rate")
+    stats_parser.add_argument('--from', dest='start_date', help="First date to include (YYYY-MM-DD)")
+    stats_parser.add_argument('--to', dest='end_date', help="Last date to include (YYYY-MM-DD)")
+    stats_parser.add_argument('--days', type=int, help="Only the last N days, including today")
+    stats_parser.add_argument('--show-days', type=int, default=7, help="Days listed in the table")
+    stats_parser.add_argument('--json', action='store_true', help="Print the statistics as JSON")
+    stats_parser.set_defaults(func=command_stats, read_only=True)
+
+    history_parser = subparsers.add_parser('history', help="List completed tasks")
+    add_selection_arguments(history_parser)
+    history_parser.add_argument('--json', action='store_true', help="One JSON entry per line")
+    history_parser.set_defaults(func=command_history, read_only=True)
+
+    export_parser = subparsers.add_parser('export', help="Export completed tasks")
+    add_selection_arguments(export_parser)
+    export_parser.add_argument('--format', choices=['jsonl', 'json', 'csv'], default='jsonl')
+    export_parser.add_argument('--output', help="File to write (default: standard output)")
+    export_parser.set_defaults(func=command_export, read_only=True)
+
+    run_parser = subparsers.add_parser('run', help="Run the configured phases in the terminal")
+    run_parser.add_argument('--task', default="Terminal task", help="Name of the task")
+    run_parser.add_argument('--no-wait', action='store_true',
+                            help="Start each phase right after the previous one instead of waiting for Enter")
+    run_parser.set_defaults(func=command_run, read_only=False)
+
+    args = parser.parse_args(argv)
+    settings = SettingsManager().load_settings()
+    history_manager = open_history(args, settings)
+    try:
+        return args.func(args, settings, history_manager)
+    except BrokenPipeError:
+        # Output piped into head and the like
+        return 0
+    finally:
+        history_manager.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
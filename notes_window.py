@@ -1,10 +1,13 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                           QPushButton, QFrame, QListWidget, QListWidgetItem,
+                           QPushButton, QFrame, QListWidget, QListWidgetItem, QListView,
                            QApplication, QDateEdit, QWidget, QGraphicsDropShadowEffect)
-from PyQt5.QtCore import Qt, pyqtSignal, QDate, QTimer
-from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtCore import Qt, pyqtSignal, QDate
+from PyQt5.QtGui import QFont, QColor, QTextCharFormat
 import datetime
 
+from wakeup_scheduler import WakeupScheduler
+from history_list_model import HistoryListModel
+
 class NotesWindow(QDialog):
     # Signal to emit when the user wants to proceed to the next phase
     nextPhaseRequested = pyqtSignal()
@@ -14,7 +17,8 @@ class NotesWindow(QDialog):
     newTaskRequested = pyqtSignal()
     
     def __init__(self, parent=None, current_phase=0, is_last_phase=False, timer_completed=False, 
-         history_manager=None, task_active=False, current_task_name="", is_blinking=False, initial_state=False):
+         history_manager=None, task_active=False, current_task_name="", is_blinking=False, initial_state=False,
+         scheduler=None):
         super().__init__(parent)
         # Remove default window frame and set always on top
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Dialog)
@@ -25,6 +29,8 @@ class NotesWindow(QDialog):
         self.is_last_phase = is_last_phase
         self.timer_completed = timer_completed
         self.history_manager = history_manager
+        # Share the timer window's scheduler so blinking lines up with its wakeups
+        self.scheduler = scheduler if scheduler is not None else WakeupScheduler(self)
         self.task_active = task_active
         self.current_task_name = current_task_name
         
@@ -36,8 +42,8 @@ class NotesWindow(QDialog):
         # Initialize dragPos for mouse events
         self.dragPos = None
         
-        # Apply dark theme stylesheet
-        self.apply_dark_stylesheet()
+        # Styled by the app-level theme stylesheet
+        self.setObjectName("notesWindow")
         
         # Set up the UI
         self.setup_ui()
@@ -47,9 +53,73 @@ class NotesWindow(QDialog):
         screen_rect = desktop.availableGeometry(self)
         self.move(screen_rect.center() - self.rect().center())
         
-        # Trigger blinking - do this in a QTimer.singleShot to ensure UI is fully setup
-        if self.is_blinking:
-            QTimer.singleShot(100, self.start_button_blinking)
+        # Fill in the state-dependent parts
+        self.refresh_state(current_phase, is_last_phase, timer_completed, task_active,
+                           current_task_name, is_blinking, initial_state)
+
+    def refresh_state(self, current_phase=0, is_last_phase=False, timer_completed=False,
+                      task_active=False, current_task_name="", is_blinking=False, initial_state=False):
+        """Update the already built dialog for a new opening"""
+        self.current_phase = current_phase
+        self.is_last_phase = is_last_phase
+        self.timer_completed = timer_completed
+        self.task_active = task_active
+        self.current_task_name = current_task_name
+        self.is_blinking = is_blinking
+        self.initial_state = initial_state
+        
+        # Current phase/task info
+        if self.task_active:
+            self.task_label.setText(f"Current Task: {self.current_task_name}")
+            self.current_phase_label.setText(f"Phase: {self.current_phase + 1}")
+            if self.timer_completed:
+                self.status_label.setText("Status: Phase Complete")
+                self.status_label.setStyleSheet("color: #64FF64;")
+            else:
+                self.status_label.setText("Status: Phase Running")
+                self.status_label.setStyleSheet("")
+        else:
+            self.task_label.setText("No Active Task")
+        self.current_phase_label.setVisible(self.task_active)
+        self.status_label.setVisible(self.task_active)
+        
+        # The action button starts a task or completes the active one
+        if not self.task_active:
+            self.action_button.setText("New Task")
+            self.action_button.setObjectName("newTaskButton")
+        else:
+            self.action_button.setText("Complete Task")
+            self.action_button.setObjectName("completeTaskButton")
+        
+        # Next Phase button
+        if not self.task_active or (self.is_last_phase and self.timer_completed):
+            self.next_phase_button.setEnabled(False)
+            if not self.task_active:
+                self.next_phase_button.setToolTip("Start a task first")
+            else:
+                self.next_phase_button.setToolTip("You're on the last phase. Complete the task instead.")
+        else:
+            self.next_phase_button.setEnabled(True)
+            self.next_phase_button.setToolTip("")
+        
+        # Drop the colors of a previous blink and restyle for the new object names
+        self.blink_state = False
+        for button in (self.action_button, self.next_phase_button):
+            button.setStyleSheet("")
+            button.style().unpolish(button)
+            button.style().polish(button)
+        
+        # Show today's tasks
+        today = datetime.date.today()
+        self.date_selector.blockSignals(True)
+        self.date_selector.setDate(QDate(today.year, today.month, today.day))
+        self.date_selector.blockSignals(False)
+        self.load_current_date_history()
+        
+        # Setup button blinking if needed
+        self.scheduler.cancel('notes_blink')
+        if not self.task_active or self.timer_completed:
+            self.start_button_blinking()
 
     def setup_ui(self):
         self.setup_fonts()
@@ -65,37 +135,21 @@ class NotesWindow(QDialog):
         container_layout = QVBoxLayout(container)
         container_layout.setSpacing(20)
         
-        # Current phase/task info
+        # Current phase/task info, filled in by refresh_state
         phase_info_layout = QHBoxLayout()
         
-        # Create different UI based on whether a task is active
-        if self.task_active:
-            # Show current task name and phase
-            task_label = QLabel(f"Current Task: {self.current_task_name}")
-            task_label.setFont(self.bold_font)
-            phase_info_layout.addWidget(task_label)
-            
-            # Current phase label
-            current_phase_label = QLabel(f"Phase: {self.current_phase + 1}")
-            current_phase_label.setFont(self.regular_font)
-            phase_info_layout.addWidget(current_phase_label)
-            
-            # Status label
-            status_label = QLabel()
-            if self.timer_completed:
-                status_label.setText("Status: Phase Complete")
-                status_label.setStyleSheet("color: #64FF64;")
-            else:
-                status_label.setText("Status: Phase Running")
-            status_label.setFont(self.regular_font)
-            
-            phase_info_layout.addStretch()
-            phase_info_layout.addWidget(status_label)
-        else:
-            # No active task
-            task_label = QLabel("No Active Task")
-            task_label.setFont(self.bold_font)
-            phase_info_layout.addWidget(task_label)
+        self.task_label = QLabel()
+        self.task_label.setFont(self.bold_font)
+        phase_info_layout.addWidget(self.task_label)
+        
+        self.current_phase_label = QLabel()
+        self.current_phase_label.setFont(self.regular_font)
+        phase_info_layout.addWidget(self.current_phase_label)
+        
+        self.status_label = QLabel()
+        self.status_label.setFont(self.regular_font)
+        phase_info_layout.addStretch()
+        phase_info_layout.addWidget(self.status_label)
         
         container_layout.addLayout(phase_info_layout)
         
@@ -116,6 +170,9 @@ class NotesWindow(QDialog):
         self.date_selector.setDate(QDate(today.year, today.month, today.day))
         self.date_selector.setCalendarPopup(True)
         self.date_selector.dateChanged.connect(self.date_changed)
+        # Days with history are marked on the calendar page being shown
+        self.day_summaries = {}
+        self.date_selector.calendarWidget().currentPageChanged.connect(self.mark_history_dates)
         
         date_layout.addWidget(date_label)
         date_layout.addWidget(self.date_selector)
@@ -128,7 +185,12 @@ class NotesWindow(QDialog):
         tasks_label.setFont(self.regular_font)
         container_layout.addWidget(tasks_label)
         
-        self.tasks_list = QListWidget()
+        # Model/view list: rows are fetched in pages and all have the same height
+        self.history_model = HistoryListModel(self)
+        self.tasks_list = QListView()
+        self.tasks_list.setObjectName("tasksList")
+        self.tasks_list.setUniformItemSizes(True)
+        self.tasks_list.setModel(self.history_model)
         container_layout.addWidget(self.tasks_list)
         
         # Task details list
@@ -140,40 +202,20 @@ class NotesWindow(QDialog):
         container_layout.addWidget(self.task_details_list)
         
         # Connect task selection
-        self.tasks_list.currentRowChanged.connect(self.task_selected)
-        
-        # Load today's task history
-        self.load_current_date_history()
+        self.tasks_list.selectionModel().currentChanged.connect(self.task_selected)
         
         # Buttons layout
         buttons_layout = QHBoxLayout()
         
-        # Create the appropriate action button based on state
-        if not self.task_active:
-            # New Task button (when no task is active)
-            self.action_button = QPushButton("New Task")
-            self.action_button.setObjectName("newTaskButton")
-            self.action_button.clicked.connect(self.request_new_task)
-        else:
-            # Complete Task button (when a task is active)
-            self.action_button = QPushButton("Complete Task")
-            self.action_button.setObjectName("completeTaskButton")
-            self.action_button.clicked.connect(self.request_task_completion)
-        
-         # Set font for action button
+        # New Task / Complete Task, depending on the state
+        self.action_button = QPushButton()
         self.action_button.setFont(self.bold_font)
+        self.action_button.clicked.connect(self.request_action)
         
         # Next Phase button
         self.next_phase_button = QPushButton("Next Phase")
         self.next_phase_button.setObjectName("nextPhaseButton")
         self.next_phase_button.setFont(self.bold_font)
-            
-        if not self.task_active or (self.is_last_phase and self.timer_completed):
-            self.next_phase_button.setEnabled(False)
-            if not self.task_active:
-                self.next_phase_button.setToolTip("Start a task first")
-            else:
-                self.next_phase_button.setToolTip("You're on the last phase. Complete the task instead.")
         
         # Close button
         self.close_button = QPushButton("Close")
@@ -189,25 +231,13 @@ class NotesWindow(QDialog):
         
         self.next_phase_button.clicked.connect(self.request_next_phase)
         self.close_button.clicked.connect(self.reject)
-
-        # Setup button blinking if needed
-        if not self.task_active or self.timer_completed:
-            # Create a button blinking timer
-            self.blink_timer = QTimer(self)
-            self.blink_timer.timeout.connect(self.toggle_button_blink)
-            self.blink_timer.start(750)
-            
-            # Force an initial blink to see immediate effect
-            self.toggle_button_blink()
         
         # Set size for dialog
         self.setMinimumSize(500, 600)
 
     # Clean version of start_button_blinking without debug output
     def start_button_blinking(self):
-        self.blink_timer = QTimer(self)
-        self.blink_timer.timeout.connect(self.toggle_button_blink)
-        self.blink_timer.start(750)  # Same timing as main timer window
+        self.scheduler.add_periodic('notes_blink', 750, self.toggle_button_blink)  # Same timing as main timer window
         
         # Force an initial toggle to show blinking immediately
         self.toggle_button_blink()
@@ -231,10 +261,14 @@ class NotesWindow(QDialog):
 
 
     def closeEvent(self, event):
-        if hasattr(self, 'blink_timer') and self.blink_timer.isActive():
-            self.blink_timer.stop()
+        self.scheduler.cancel('notes_blink')
         event.accept()
     
+    def hideEvent(self, event):
+        # accept()/reject() hide the dialog without a close event
+        self.scheduler.cancel('notes_blink')
+        super().hideEvent(event)
+    
     def setup_fonts(self):
         # Try to use Calibri if available, otherwise fall back to system sans-serif
         self.regular_font = QFont("Calibri", 11)
@@ -250,133 +284,54 @@ class NotesWindow(QDialog):
         shadow.setOffset(0, 0)
         return shadow
     
-    def apply_dark_stylesheet(self):
-        self.setStyleSheet("""
-            QDialog {
-                background-color: transparent;
-            }
-            QFrame#notesContainer {
-                background-color: rgb(40, 40, 40);
-                border-radius: 15px;
-                border: none;
-            }
-            QLabel {
-                color: rgb(240, 240, 240);
-                background-color: transparent;
-                border: none;
-            }
-            QListWidget {
-                background-color: rgb(50, 50, 50);
-                border-radius: 8px;
-                color: white;
-                padding: 8px;
-                border: none;
-                selection-background-color: rgb(60, 60, 60);
-            }
-            QListWidget::item {
-                padding: 4px;
-                border-bottom: 1px solid rgb(70, 70, 70);
-            }
-            QListWidget::item:selected {
-                background-color: rgb(60, 60, 60);
-            }
-            QPushButton {
-                background-color: rgb(55, 55, 55);
-                color: white;
-                border-radius: 8px;
-                padding: 6px 12px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: rgb(65, 65, 65);
-            }
-            QPushButton:pressed {
-                background-color: rgb(50, 50, 50);
-            }
-            QPushButton:disabled {
-                background-color: rgb(45, 45, 45);
-                color: rgb(130, 130, 130);
-            }
-            QPushButton#nextPhaseButton {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
-                                        stop:0 rgb(0, 150, 200), 
-                                        stop:1 rgb(120, 0, 170));
-                color: white;
-            }
-            QPushButton#nextPhaseButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
-                                        stop:0 rgb(0, 170, 220), 
-                                        stop:1 rgb(140, 0, 190));
-            }
-            QPushButton#completeTaskButton {
-                background-color: rgb(40, 120, 40);
-                color: white;
-            }
-            QPushButton#completeTaskButton:hover {
-                background-color: rgb(45, 135, 45);
-            }
-            QPushButton#newTaskButton {
-                background-color: rgb(60, 105, 160);
-                color: white;
-            }
-            QPushButton#newTaskButton:hover {
-                background-color: rgb(65, 115, 175);
-            }
-            QDateEdit {
-                background-color: rgb(55, 55, 55);
-                color: white;
-                border-radius: 8px;
-                padding: 6px;
-                border: none;
-            }
-        """)
-    
     def load_current_date_history(self):
         if not self.history_manager:
             return
-             
-        self.tasks_list.clear()
+        
         self.task_details_list.clear()
         
         qdate = self.date_selector.date()
         date_str = f"{qdate.year()}-{qdate.month():02d}-{qdate.day():02d}"
         
-        history = self.history_manager.load_daily_history(date_str)
+        # The model pulls rows from a lazy history stream as the list scrolls
+        self.history_model.set_source(self.history_manager.iter_history(date_str, date_str))
         
-        # Add tasks to the list
-        for i, task in enumerate(history):
-            timestamp = task.get('timestamp', 'Unknown time')
-            phases = task.get('phases', [])
-            status = task.get('status', 'Completed')
-            task_name = task.get('task_name', f"Task {i+1}")
-            
-            # Create item with task name and status
-            item = QListWidgetItem(f"{task_name} - {timestamp} - {status}")
-            
-            # Color based on status
-            if status == 'Completed Clean':
-                item.setForeground(QColor(100, 255, 100))  # Green
-            elif status == 'Completed with Cheating':
-                item.setForeground(QColor(255, 165, 0))    # Orange
-            
-            self.tasks_list.addItem(item)
+        # Per-day totals come from the history manifest, so this stays cheap
+        self.day_summaries = self.history_manager.get_day_summaries()
+        calendar = self.date_selector.calendarWidget()
+        self.mark_history_dates(calendar.yearShown(), calendar.monthShown())
+    
+    def mark_history_dates(self, year, month):
+        calendar = self.date_selector.calendarWidget()
+        calendar.setDateTextFormat(QDate(), QTextCharFormat())  # Clear previous marks
+        
+        # A calendar page also shows a few days of the neighbouring months
+        shown = QDate(year, month, 1)
+        months = {f"{d.year()}-{d.month():02d}" for d in (shown.addMonths(-1), shown, shown.addMonths(1))}
+        for date_str, stats in self.day_summaries.items():
+            if date_str[:7] not in months:
+                continue
+            year, month, day = (int(part) for part in date_str.split('-'))
+            text_format = QTextCharFormat()
+            text_format.setFontWeight(QFont.Bold)
+            if stats['cheated']:
+                text_format.setForeground(QColor(255, 165, 0))    # Orange
+            else:
+                text_format.setForeground(QColor(100, 255, 100))  # Green
+            calendar.setDateTextFormat(QDate(year, month, day), text_format)
     
     def date_changed(self, qdate):
         self.load_current_date_history()
     
-    def task_selected(self, row):
-        if row < 0 or not self.history_manager:
+    def task_selected(self, current, previous=None):
+        row = current.row()
+        if row < 0:
             return
             
         self.task_details_list.clear()
         
-        qdate = self.date_selector.date()
-        date_str = f"{qdate.year()}-{qdate.month():02d}-{qdate.day():02d}"
-        
-        history = self.history_manager.load_daily_history(date_str)
-        
-        if 0 <= row < len(history):
-            task = history[row]
+        task = self.history_model.entry(row)
+        if task is not None:
             phases = task.get('phases', [])
             task_status = task.get('status', 'Completed')
             task_name = task.get('task_name', f"Task {row+1}")
@@ -419,6 +374,12 @@ class NotesWindow(QDialog):
         self.nextPhaseRequested.emit()
         self.accept()
     
+    def request_action(self):
+        if self.task_active:
+            self.request_task_completion()
+        else:
+            self.request_new_task()
+    
     def request_task_completion(self):
         self.taskCompletedRequested.emit()
         self.accept()
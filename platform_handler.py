@@ -1,3 +1,4 @@
+import os
 import platform
 import sys
 
@@ -18,8 +19,25 @@ if IS_WINDOWS:
 else:
     WINDOWS_MODULES_AVAILABLE = False
 
+# Fonts and icons compiled into one Qt resource module (see resources.qrc and build_app.py).
+# Importing it registers the assets under ':/resources/'; without it they are read from disk.
+try:
+    import resources_rc
+    COMPILED_RESOURCES_AVAILABLE = True
+except ImportError:
+    COMPILED_RESOURCES_AVAILABLE = False
+
 class PlatformHandler:
     
+    # Interval of the safety-net topmost check on platforms that need one
+    TOPMOST_FALLBACK_INTERVAL_MS = 10000
+    
+    @staticmethod
+    def needs_topmost_fallback():
+        # Only Windows actively re-asserts topmost; elsewhere the window flag is enough,
+        # so there is nothing to poll for
+        return IS_WINDOWS and WINDOWS_MODULES_AVAILABLE
+    
     @staticmethod
     def ensure_window_topmost(window):
         if IS_WINDOWS and WINDOWS_MODULES_AVAILABLE:
@@ -59,10 +77,21 @@ class PlatformHandler:
             base_dir = sys._MEIPASS
         else:
             # Running in a normal Python environment
-            base_dir = sys.path[0]
+            base_dir = os.path.dirname(os.path.abspath(__file__))
         
         if IS_MACOS and getattr(sys, 'frozen', False):
             return os.path.join(os.path.dirname(base_dir), 'Resources')
         else:
             # Default resources path
-            return os.path.join(base_dir, 'resources')
\ No newline at end of file
+            return os.path.join(base_dir, 'resources')
+    
+    @staticmethod
+    def resource_path(relative_path):
+        """Path of a bundled asset, e.g. 'icons/notes_300.png'
+
+        Uses the compiled resources when available, so no file is opened;
+        otherwise falls back to the resources directory on disk.
+        """
+        if COMPILED_RESOURCES_AVAILABLE:
+            return ':/resources/' + relative_path
+        return os.path.join(PlatformHandler.get_resources_path(), *relative_path.split('/'))
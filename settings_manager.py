@@ -2,6 +2,9 @@ import json
 import os
 from pathlib import Path
 
+from atomic_write import atomic_write_json
+from file_lock import get_file_lock
+
 class SettingsManager: 
     def __init__(self, settings_file='timer_settings.json'):
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -11,15 +14,18 @@ class SettingsManager:
         
         # Set the full path to the settings file
         self.settings_file = os.path.join(self.settings_dir, settings_file)
+        
+        # Serializes saves with other running instances
+        self.file_lock = get_file_lock(os.path.join(self.settings_dir, '.settings.lock'))
     
     def save_settings(self, settings_data):
         try:
             if 'phases' in settings_data and settings_data['phases']:
                 settings_data['phases'] = [self._phase_to_dict(phase) for phase in settings_data['phases']]
             
-            # Save settings to file
-            with open(self.settings_file, 'w') as f:
-                json.dump(settings_data, f, indent=4)
+            # Replace the file atomically so a crash never leaves it truncated
+            with self.file_lock:
+                atomic_write_json(self.settings_file, settings_data, indent=4)
             
             return True
         except Exception as e:
@@ -29,6 +35,8 @@ class SettingsManager:
     def load_settings(self):
         default_settings = {
             'scale': 1.0,
+            'history_backend': 'json',
+            'theme': 'default',
             'phases': [
                 {
                     'name': 'Phase',
@@ -51,6 +59,8 @@ class SettingsManager:
             return default_settings
     
     def _phase_to_dict(self, phase):
+        if isinstance(phase, dict):
+            return dict(phase)
         return {
             'name': phase.name,
             'minutes': phase.minutes,
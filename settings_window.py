@@ -5,36 +5,32 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QIntValidator
 
-class PhaseSettings:
-    def __init__(self, name="Phase", minutes=30, seconds=0):
-        self.name = name
-        self.minutes = minutes
-        self.seconds = seconds
-    
-    def get_total_seconds(self):
-        return self.minutes * 60 + self.seconds
-
+from timer_engine import PhaseSettings
+from theme_manager import ThemeManager, DEFAULT_THEME
 
 class SettingsWindow(QDialog):
-    settingsChanged = pyqtSignal(float, list)  # scale factor, list of phase settings
+    settingsChanged = pyqtSignal(float, list, str)  # scale factor, list of phase settings, theme name
     
-    def __init__(self, parent=None, current_scale=1.0, phases=None):
+    def __init__(self, parent=None, current_scale=1.0, phases=None, theme=DEFAULT_THEME):
         super().__init__(parent)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Dialog)
         self.setAttribute(Qt.WA_TranslucentBackground)
         
         self.current_scale = current_scale
+        self.theme = theme
         
         self.dragPos = None
         
+        # Edited on copies so Cancel leaves the running timer's phases alone
         if phases is None:
             self.phases = [PhaseSettings()]
         else:
-            self.phases = phases
+            self.phases = [phase.copy() for phase in phases]
         
         self.setup_fonts()
         
-        self.apply_modern_stylesheet()
+        # Styled by the app-level theme stylesheet
+        self.setObjectName("settingsWindow")
         
         self.setup_ui()
         
@@ -42,6 +38,23 @@ class SettingsWindow(QDialog):
         screen_rect = desktop.availableGeometry(self)
         self.move(screen_rect.center() - self.rect().center())
     
+    def refresh_state(self, current_scale=1.0, phases=None, theme=DEFAULT_THEME):
+        """Reset the already built dialog to the current settings before showing it again"""
+        self.current_scale = current_scale
+        self.theme = theme
+        self.phases = [phase.copy() for phase in phases] if phases else [PhaseSettings()]
+        
+        self.size_slider.setValue(int(self.current_scale * 100))
+        self.update_size_value()
+        
+        self.theme_combo.setCurrentIndex(max(0, self.theme_combo.findData(self.theme)))
+        
+        self.phases_combo.blockSignals(True)
+        self.phases_combo.setCurrentIndex(len(self.phases) - 1)
+        self.phases_combo.blockSignals(False)
+        
+        self.create_phase_settings()
+    
     def setup_fonts(self):
         self.regular_font = QFont("Calibri", 11)
         self.bold_font = QFont("Calibri", 12)
@@ -56,103 +69,6 @@ class SettingsWindow(QDialog):
         shadow.setOffset(0, 0)
         return shadow
     
-    def apply_modern_stylesheet(self):
-        self.setStyleSheet("""
-            QDialog {
-                background-color: transparent;
-            }
-            QFrame#settingsContainer {
-                background-color: rgb(40, 40, 40);
-                border-radius: 15px;
-                border: none;
-            }
-            QWidget {
-                background-color: transparent;
-            }
-            QLabel {
-                color: rgb(240, 240, 240);
-                background-color: transparent;
-                border: none;
-            }
-            QLineEdit, QComboBox, QSpinBox {
-                background-color: rgb(55, 55, 55);
-                color: white;
-                border-radius: 8px;
-                padding: 6px 10px;
-                border: none;
-                selection-background-color: rgb(70, 130, 180);
-            }
-            QLineEdit:focus, QComboBox:focus, QSpinBox:focus {
-                background-color: rgb(60, 60, 60);
-            }
-            QPushButton {
-                background-color: rgb(55, 55, 55);
-                color: white;
-                border-radius: 8px;
-                padding: 6px 12px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: rgb(65, 65, 65);
-            }
-            QPushButton:pressed {
-                background-color: rgb(50, 50, 50);
-            }
-            QScrollArea {
-                background-color: transparent;
-                border: none;
-            }
-            QScrollBar:vertical {
-                background: rgb(45, 45, 45);
-                width: 10px;
-                margin: 0px;
-            }
-            QScrollBar::handle:vertical {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
-                                           stop:0 rgb(0, 255, 255), 
-                                           stop:1 rgb(255, 0, 255));
-                min-height: 20px;
-                border-radius: 5px;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                height: 0px;
-            }
-            QSlider::groove:horizontal {
-                height: 8px;
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
-                                           stop:0 rgb(0, 255, 255), 
-                                           stop:1 rgb(255, 0, 255));
-                border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: white;
-                border: none;
-                width: 16px;
-                height: 16px;
-                margin: -4px 0;
-                border-radius: 8px;
-            }
-            QComboBox::drop-down {
-                border: none;
-                width: 20px;
-            }
-            QComboBox::down-arrow {
-                width: 12px;
-                height: 12px;
-            }
-            QComboBox QAbstractItemView {
-                background-color: rgb(50, 50, 50);
-                border: none;
-                selection-background-color: rgb(70, 130, 180);
-                color: white;
-            }
-            QFrame#phaseFrame {
-                background-color: rgb(45, 45, 45);
-                border-radius: 10px;
-                border: none;
-            }
-        """)
-    
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(15, 15, 15, 15)
@@ -175,6 +91,7 @@ class SettingsWindow(QDialog):
         scroll_area.setFrameShape(QFrame.NoFrame)
         
         settings_widget = QWidget()
+        settings_widget.setObjectName("settingsContent")
         settings_layout = QVBoxLayout(settings_widget)
         settings_layout.setSpacing(20)
         
@@ -202,6 +119,21 @@ class SettingsWindow(QDialog):
         
         self.size_slider.valueChanged.connect(self.update_size_value)
         
+        theme_layout = QVBoxLayout()
+        
+        theme_label = QLabel("Theme")
+        theme_label.setFont(self.bold_font)
+        theme_layout.addWidget(theme_label)
+        
+        self.theme_combo = QComboBox()
+        for name, label in ThemeManager.available_themes():
+            self.theme_combo.addItem(label, name)
+        self.theme_combo.setCurrentIndex(max(0, self.theme_combo.findData(self.theme)))
+        self.theme_combo.setFont(self.regular_font)
+        
+        theme_layout.addWidget(self.theme_combo)
+        settings_layout.addLayout(theme_layout)
+        
         phases_layout = QVBoxLayout()
 
         phases_label = QLabel("Number of Phases")
@@ -220,6 +152,7 @@ class SettingsWindow(QDialog):
 
         self.phases_container = QVBoxLayout()
         self.phase_widgets = []  # Store references to phase widgets
+        self.phase_editors = []  # (name, minutes, seconds) editors of each phase widget
 
         self.create_phase_settings()
         
@@ -249,6 +182,13 @@ class SettingsWindow(QDialog):
         self.setMaximumSize(550, 800)
     
     def create_phase_settings(self):
+        if len(self.phase_widgets) == len(self.phases):
+            # Same number of phases: just put the values into the existing editors
+            for phase, (name_edit, minutes_spin, seconds_spin) in zip(self.phases, self.phase_editors):
+                name_edit.setText(phase.name)
+                minutes_spin.setValue(phase.minutes)
+                seconds_spin.setValue(phase.seconds)
+            return
 
         for widget in self.phase_widgets:
             self.phases_container.removeWidget(widget)
@@ -256,6 +196,7 @@ class SettingsWindow(QDialog):
             widget.deleteLater()
         
         self.phase_widgets = []
+        self.phase_editors = []
         
         # Add phase settings for each phase
         for i, phase in enumerate(self.phases):
@@ -327,6 +268,7 @@ class SettingsWindow(QDialog):
             # Add the phase frame to the container
             self.phases_container.addWidget(phase_frame)
             self.phase_widgets.append(phase_frame)
+            self.phase_editors.append((name_edit, minutes_spin, seconds_spin))
     
     def update_phase_count(self, index):
         num_phases = index + 1  # Index 0 = 1 phase, etc.
@@ -356,7 +298,8 @@ class SettingsWindow(QDialog):
     
     def apply_settings(self):
         new_scale = self.size_slider.value() / 100.0
-        self.settingsChanged.emit(new_scale, self.phases)
+        theme = self.theme_combo.currentData()
+        self.settingsChanged.emit(new_scale, [phase.copy() for phase in self.phases], theme)
         self.accept()
     
     def mousePressEvent(self, event):
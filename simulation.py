@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+Time-accelerated simulation of the timer logic.
+
+Drives TimerEngine from a virtual clock and replays scripted user actions
+(start a task, wait, open notes, next phase, complete) as fast as possible.
+Completed tasks are written through HistoryManager into a scratch directory,
+so phase configurations and cheat accounting can be checked over weeks of
+simulated use in a few seconds.
+"""
+import argparse
+import datetime
+import json
+import random
+import sys
+import tempfile
+import time
+
+from history_manager import create_history_manager
+from settings_manager import SettingsManager
+from timer_engine import TimerEngine, phases_from_settings
+
+
+class VirtualClock:
+    """Monotonic clock that only moves when told to"""
+
+    def __init__(self, start=None):
+        self.start = start or datetime.datetime.combine(datetime.date.today(), datetime.time(9, 0))
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def datetime(self):
+        # Wall-clock time corresponding to the current virtual time
+        return self.start + datetime.timedelta(seconds=self.now)
+
+
+class Simulation:
+    """Replays user actions against a TimerEngine running on a VirtualClock
+
+    Actions are tuples:
+        ('start', task_name)   start a new task
+        ('wait', seconds)      let virtual time pass
+        ('notes',)             open the notes window
+        ('next',)              go to the next phase
+        ('complete',)          complete the task
+        ('sleep_until', hour)  skip ahead to the given hour of the next day
+    """
+
+    def __init__(self, phases, history_manager, start=None):
+        self.clock = VirtualClock(start)
+        self.engine = TimerEngine(phases, clock=self.clock)
+        self.history_manager = history_manager
+
+        self.transitions = 0
+        self.saved_entries = 0
+        self.statuses = {}
+
+        self.engine.add_listener('task_completed', self.on_task_completed)
+
+        # The app starts blinking green, waiting for a task
+        self.engine.start_blinking(initial=True)
+
+    def on_task_completed(self, task_entry):
+        if self.history_manager.save_daily_history(task_entry, when=self.clock.datetime()):
+            self.saved_entries += 1
+        status = task_entry['status']
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def run(self, actions):
+        for action in actions:
+            self.perform(*action)
+
+    def perform(self, name, *args):
+        engine = self.engine
+        if name == 'start':
+            engine.start_task(args[0])
+        elif name == 'wait':
+            self.clock.advance(args[0])
+            engine.tick()
+        elif name == 'notes':
+            engine.open_notes()
+        elif name == 'next':
+            engine.next_phase()
+        elif name == 'complete':
+            engine.complete_task()
+        elif name == 'sleep_until':
+            current = self.clock.datetime()
+            next_day = datetime.datetime.combine(current.date() + datetime.timedelta(days=1),
+                                                 datetime.time(args[0], 0))
+            self.clock.advance((next_day - current).total_seconds())
+            engine.tick()
+        else:
+            raise ValueError(f"Unknown action: {name}")
+        self.transitions += 1
+
+    def final_state(self):
+        engine = self.engine
+        return {
+            'virtual_time': self.clock.datetime().isoformat(timespec='seconds'),
+            'task_active': engine.task_active,
+            'current_task_name': engine.current_task_name,
+            'current_phase_index': engine.current_phase_index,
+            'is_blinking': engine.is_blinking,
+            'seconds': engine.seconds
+        }
+
+
+def generate_actions(phases, days, tasks_per_day, cheat_rate, seed=None):
+    """Script a typical usage pattern: tasks worked through every phase
+
+    Each phase is either waited out and finished from the notes window, or,
+    with probability cheat_rate, cut short by opening the notes early.
+    """
+    rng = random.Random(seed)
+    actions = []
+    for day in range(days):
+        for task in range(tasks_per_day):
+            actions.append(('notes',))
+            actions.append(('start', f"Day {day + 1} task {task + 1}"))
+            for index, phase in enumerate(phases):
+                total = phase.get_total_seconds()
+                if rng.random() < cheat_rate:
+                    actions.append(('wait', rng.uniform(0, total)))
+                else:
+                    actions.append(('wait', total))
+                actions.append(('notes',))
+                if index < len(phases) - 1:
+                    actions.append(('next',))
+            actions.append(('complete',))
+            # A short break between tasks
+            actions.append(('wait', rng.uniform(60, 600)))
+        actions.append(('sleep_until', 9))
+    return actions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate MBM Clock usage on a virtual clock")
+    parser.add_argument('--days', type=int, default=7, help="Number of simulated days")
+    parser.add_argument('--tasks-per-day', type=int, default=8, help="Tasks completed each day")
+    parser.add_argument('--cheat-rate', type=float, default=0.2,
+                        help="Probability of leaving a phase early")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible runs")
+    parser.add_argument('--script', help="JSON file with a list of actions to replay instead")
+    parser.add_argument('--history-dir', help="Where to write history (default: a new temp directory)")
+    parser.add_argument('--backend', default='json', choices=['json', 'sqlite'],
+                        help="History storage backend")
+    args = parser.parse_args()
+
+    phases = phases_from_settings(SettingsManager().load_settings())
+    history_dir = args.history_dir or tempfile.mkdtemp(prefix='mbm_simulation_')
+    history_manager = create_history_manager(args.backend, history_dir)
+    history_manager.verbose = False
+    # Write the simulated history in one batch at the end instead of syncing every entry
+    history_manager.group_commit = True
+
+    if args.script:
+        with open(args.script, 'r') as f:
+            actions = [tuple(action) for action in json.load(f)]
+    else:
+        actions = generate_actions(phases, args.days, args.tasks_per_day, args.cheat_rate, args.seed)
+
+    simulation = Simulation(phases, history_manager)
+
+    started = time.perf_counter()
+    simulation.run(actions)
+    history_manager.close()
+    elapsed = time.perf_counter() - started
+
+    print()
+    print(f"History written to: {history_manager.history_dir}")
+    print(f"Phases: {', '.join(phase.name for phase in phases)}")
+    print(f"Transitions: {simulation.transitions} in {elapsed:.3f}s "
+          f"({simulation.transitions / elapsed if elapsed else 0:.0f}/s)")
+    print(f"Simulated time: {datetime.timedelta(seconds=int(simulation.clock.now))}")
+    print(f"History entries saved: {simulation.saved_entries}")
+    for status, count in sorted(simulation.statuses.items()):
+        print(f"  {status}: {count}")
+    print(f"Final state: {simulation.final_state()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import getpass
+import json
+import os
+import sys
+
+from PyQt5.QtCore import QObject, QCoreApplication, QDir, QLockFile
+from PyQt5.QtNetwork import QAbstractSocket, QLocalServer, QLocalSocket
+
+
+def _default_instance_name():
+    # One clock per user; MBM_INSTANCE_NAME allows separate profiles side by side
+    name = os.environ.get('MBM_INSTANCE_NAME')
+    if name:
+        return name
+    try:
+        return f"mbm-clock-{getpass.getuser()}"
+    except Exception:
+        return "mbm-clock"
+
+
+INSTANCE_NAME = _default_instance_name()
+# How long a client waits to connect and for each reply
+COMMAND_TIMEOUT_MS = 1000
+# Longest command line accepted before the connection is dropped
+MAX_COMMAND_LENGTH = 4096
+
+
+def send_command(command, name=INSTANCE_NAME, timeout_ms=COMMAND_TIMEOUT_MS):
+    """Send one command line to the running instance and wait for its reply
+
+    Args:
+        command (str): e.g. "start Write report", "next", "complete", "remaining", "show" or "ping"
+        name (str): Server name of the instance
+        timeout_ms (int): Time allowed for connecting and for the reply
+
+    Returns:
+        dict: The instance's reply, or None if no instance is running or it didn't answer
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout_ms):
+        return None
+
+    try:
+        socket.write((command.strip() + '\n').encode('utf-8'))
+        socket.flush()
+        while not socket.canReadLine():
+            if not socket.waitForReadyRead(timeout_ms):
+                return None
+        return json.loads(bytes(socket.readLine()).decode('utf-8'))
+    except ValueError as e:
+        print(f"Unreadable reply from {name}: {e}")
+        return None
+    finally:
+        socket.disconnectFromServer()
+
+
+class InstanceServer(QObject):
+    """Local socket server that marks this process as the running instance
+
+    A second launch finds the server with send_command() and hands over to
+    it instead of opening another clock. The server also accepts commands
+    from scripts and editor plugins: each connection sends one command per
+    line, "<command> [argument]", and gets one JSON object per line back.
+    Connections stay open, so a client can send any number of commands.
+
+    Commands are executed by handler(command, argument), which returns the
+    reply dict. Exceptions become {"ok": false, "error": ...} replies.
+    """
+
+    def __init__(self, handler=None, name=INSTANCE_NAME, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.name = name
+        # Set when listen() fails because another live instance owns the name
+        self.other_instance = False
+
+        # Held for as long as this process is the instance. Only a lock whose
+        # process has died counts as stale, however long the owner is busy
+        self._lock_path = os.path.join(QDir.tempPath(), f"{name}.lock")
+        self._lock_file = QLockFile(self._lock_path)
+        self._lock_file.setStaleLockTime(0)
+
+        self._server = QLocalServer(self)
+        # Only the same user may connect
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        self._server.newConnection.connect(self._accept_connections)
+
+    def listen(self):
+        """Start accepting commands
+
+        Returns:
+            bool: False if the server couldn't be started
+        """
+        if not self._lock_file.tryLock(0):
+            if self._lock_file.error() == QLockFile.LockFailedError:
+                # A launch racing this one, or a running clock too busy to answer in time
+                self.other_instance = True
+                print(f"Another instance holds {self._lock_path}")
+            else:
+                print(f"Could not create {self._lock_path}")
+            return False
+
+        if self._server.listen(self.name):
+            return True
+
+        if self._server.serverError() == QAbstractSocket.AddressInUseError:
+            # With the lock held, only a crashed instance can have left the socket, but never
+            # remove one that still answers
+            if send_command('ping', self.name) is not None:
+                self.other_instance = True
+                self._lock_file.unlock()
+                print(f"Another instance is answering on {self.name}")
+                return False
+            QLocalServer.removeServer(self.name)
+            if self._server.listen(self.name):
+                return True
+
+        print(f"Could not listen for commands on {self.name}: {self._server.errorString()}")
+        self._lock_file.unlock()
+        return False
+
+    def close(self):
+        self._server.close()
+        self._lock_file.unlock()
+
+    def execute(self, line):
+        """Run one command line and return its reply"""
+        command, _, argument = line.strip().partition(' ')
+        if self.handler is None:
+            return {'ok': False, 'error': "Not ready"}
+        try:
+            return self.handler(command.lower(), argument.strip())
+        except Exception as e:
+            print(f"Error running command '{line}': {e}")
+            return {'ok': False, 'error': str(e)}
+
+    def _accept_connections(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self._read_commands(socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _read_commands(self, socket):
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            reply = self.execute(line)
+            socket.write((json.dumps(reply) + '\n').encode('utf-8'))
+
+        if socket.bytesAvailable() > MAX_COMMAND_LENGTH:
+            print("Dropping a command connection that sent an overlong line")
+            socket.abort()
+            return
+        socket.flush()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python single_instance.py <start NAME|next|complete|remaining|show|ping>")
+        return 2
+
+    app = QCoreApplication(sys.argv[:1])
+    reply = send_command(' '.join(sys.argv[1:]))
+    if reply is None:
+        print("MBM Clock is not running")
+        return 1
+    print(json.dumps(reply))
+    return 0 if reply.get('ok') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,423 @@
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import urllib.parse
+
+from history_manager import HistoryManager, CLEAN_STATUS, CHEATED_STATUS
+from history_repair import OK_STATUS, DAMAGED_STATUS, UNREADABLE_STATUS
+
+DATABASE_NAME = 'history.sqlite3'
+# Rows fetched per query while streaming with iter_history
+ITER_PAGE_SIZE = 500
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        timestamp TEXT,
+        status TEXT,
+        task_name TEXT,
+        phases TEXT,
+        entry_id TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_history_date ON history(date);
+    CREATE INDEX IF NOT EXISTS idx_history_status ON history(status);
+    CREATE INDEX IF NOT EXISTS idx_history_task_name ON history(task_name);
+    CREATE TABLE IF NOT EXISTS imported_files (
+        filename TEXT PRIMARY KEY,
+        size INTEGER,
+        mtime_ns INTEGER
+    );
+"""
+
+class SQLiteHistoryManager(HistoryManager):
+    """History manager storing every entry in a single SQLite database
+
+    Exposes the same API as HistoryManager, plus indexed queries across days.
+    """
+
+    def __init__(self, history_dir='history', read_only=False):
+        super().__init__(history_dir, read_only)
+
+        self.db_path = os.path.join(self.history_dir, DATABASE_NAME)
+        is_new_database = not os.path.exists(self.db_path)
+
+        if read_only:
+            # Without a database yet, the day files are imported into one held in memory
+            if is_new_database:
+                database = ':memory:'
+            elif os.access(self.history_dir, os.W_OK):
+                database = f"file:{urllib.parse.quote(self.db_path)}?mode=ro"
+            else:
+                # Reading a WAL database needs its shared-memory file, which can't be created
+                # here, so the database is read as it stands
+                database = f"file:{urllib.parse.quote(self.db_path)}?immutable=1"
+            self._connection = sqlite3.connect(database, uri=True, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            if is_new_database:
+                with self._lock:
+                    self._connection.executescript(SCHEMA)
+                    self.import_history_dir()
+            return
+
+        # Saves may come from a background thread, so share one connection behind the manager lock
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            self._add_entry_ids()
+            self._add_import_signatures()
+            self._connection.commit()
+
+        # Bring over the day files, and whatever the JSON backend added to them since the last
+        # time; files that haven't changed are skipped without being read
+        self.import_history_dir(quiet=not is_new_database)
+
+    def save_daily_history(self, task_data, when=None):
+        """Save task history for the current date
+
+        Args:
+            task_data (dict): Dictionary containing the task data to save
+            when (datetime.datetime, optional): Time to record the entry at. Defaults to now.
+        """
+        try:
+            today, history_entry = self._build_entry(task_data, when)
+            with self._lock, self._connection:
+                self._insert_entry(today, history_entry)
+
+            if self.verbose:
+                print(f"History saved to {self.db_path}")
+                print(f"Entry: {history_entry}")
+
+            return True
+        except Exception as e:
+            print(f"Error saving history: {e}")
+            return False
+
+    def load_daily_history(self, date=None):
+        """Load history for a specific date
+
+        Args:
+            date (str, optional): Date in 'YYYY-MM-DD' format. Defaults to today.
+
+        Returns:
+            list: List of history entries for the specified date
+        """
+        if date is None:
+            date = self._today()
+        return self._ensure_task_names(self.query_history(start_date=date, end_date=date))
+
+    def get_available_dates(self):
+        """Get list of dates that have history records
+
+        Returns:
+            list: List of dates in 'YYYY-MM-DD' format
+        """
+        try:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT DISTINCT date FROM history ORDER BY date DESC"
+                ).fetchall()
+            return [row['date'] for row in rows]
+        except Exception as e:
+            print(f"Error getting available dates: {e}")
+            return []
+
+    def get_day_summaries(self):
+        """Get the number of entries recorded on each date
+
+        Returns:
+            dict: Date in 'YYYY-MM-DD' format -> {'count', 'clean', 'cheated'}
+        """
+        try:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT date, COUNT(*) AS count, "
+                    "SUM(status = ?) AS clean, SUM(status = ?) AS cheated "
+                    "FROM history GROUP BY date",
+                    (CLEAN_STATUS, CHEATED_STATUS)
+                ).fetchall()
+            return {
+                row['date']: {'count': row['count'], 'clean': row['clean'], 'cheated': row['cheated']}
+                for row in rows
+            }
+        except Exception as e:
+            print(f"Error getting day summaries: {e}")
+            return {}
+
+    def scan_integrity(self, repair=False):
+        """Check the database with SQLite's quick_check
+
+        Args:
+            repair (bool): Ignored; a damaged database has to be restored from a backup
+
+        Returns:
+            list: One dict with 'file', 'status', 'entries' and 'error'
+        """
+        result = {'file': self.db_path, 'status': OK_STATUS, 'entries': 0, 'error': None}
+        try:
+            with self._lock:
+                problems = [row[0] for row in self._connection.execute("PRAGMA quick_check")]
+                result['entries'] = self._connection.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+            if problems != ['ok']:
+                result['status'] = DAMAGED_STATUS
+                result['error'] = '; '.join(problems)
+        except sqlite3.DatabaseError as e:
+            result['status'] = UNREADABLE_STATUS
+            result['error'] = str(e)
+        if result['status'] != OK_STATUS:
+            print(f"History database {self.db_path}: {result['status']} {result['error']}")
+        return [result]
+
+    def query_history(self, start_date=None, end_date=None, status=None, task_name=None):
+        """Query entries across days using the database indexes
+
+        Args:
+            start_date (str, optional): First date to include, 'YYYY-MM-DD'
+            end_date (str, optional): Last date to include, 'YYYY-MM-DD'
+            status (str, optional): Only return entries with this status
+            task_name (str, optional): Only return entries with this task name
+
+        Returns:
+            list: Matching history entries in the order they were saved
+        """
+        conditions, params = self._conditions(start_date, end_date, status)
+        if task_name is not None:
+            conditions.append("task_name = ?")
+            params.append(task_name)
+
+        query = "SELECT date, timestamp, status, task_name, phases, entry_id FROM history"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY date, id"
+
+        try:
+            with self._lock:
+                rows = self._connection.execute(query, params).fetchall()
+            return [self._row_to_entry(row) for row in rows]
+        except Exception as e:
+            print(f"Error querying history: {e}")
+            return []
+
+    def iter_history(self, start_date=None, end_date=None, status=None, name_prefix=None,
+                     offset=0, limit=None):
+        """Stream history entries across days, oldest day first
+
+        Rows are fetched ITER_PAGE_SIZE at a time, each page continuing after
+        the last row of the previous one, so the lock is never held while the
+        caller consumes entries. Each entry has its day under 'date'.
+
+        Args:
+            start_date (str, optional): First date to include, 'YYYY-MM-DD'
+            end_date (str, optional): Last date to include, 'YYYY-MM-DD'
+            status (str, optional): Only yield entries with this status
+            name_prefix (str, optional): Only yield entries whose task name starts with this
+            offset (int, optional): Number of matching entries to skip
+            limit (int, optional): Maximum number of entries to yield
+
+        Yields:
+            dict: Matching history entries in the order they were saved
+        """
+        conditions, params = self._conditions(start_date, end_date, status)
+        if name_prefix:
+            # A range on task_name can use its index; comparisons are case-sensitive, like str.startswith
+            conditions.append("task_name >= ?")
+            params.append(name_prefix)
+            upper = _prefix_upper_bound(name_prefix)
+            if upper is not None:
+                conditions.append("task_name < ?")
+                params.append(upper)
+
+        remaining = limit
+        last_row = None
+        while remaining is None or remaining > 0:
+            page_conditions = list(conditions)
+            page_params = list(params)
+            if last_row is not None:
+                page_conditions.append("(date > ? OR (date = ? AND id > ?))")
+                page_params.extend([last_row['date'], last_row['date'], last_row['id']])
+            page_size = ITER_PAGE_SIZE if remaining is None else min(ITER_PAGE_SIZE, remaining)
+
+            query = "SELECT id, date, timestamp, status, task_name, phases, entry_id FROM history"
+            if page_conditions:
+                query += " WHERE " + " AND ".join(page_conditions)
+            query += " ORDER BY date, id LIMIT ? OFFSET ?"
+            page_params.extend([page_size, offset if last_row is None else 0])
+
+            try:
+                with self._lock:
+                    rows = self._connection.execute(query, page_params).fetchall()
+            except Exception as e:
+                print(f"Error querying history: {e}")
+                return
+
+            for row in rows:
+                entry = self._row_to_entry(row)
+                entry['date'] = row['date']
+                yield entry
+
+            if len(rows) < page_size:
+                return
+            last_row = rows[-1]
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def import_history_dir(self, history_dir=None, quiet=False):
+        """Import the per-day JSON history files into the database
+
+        Files are skipped while their size and modification time are those
+        of their last import. A file that changed since, e.g. a journal the
+        JSON backend appended to, is read again; entries already stored are
+        recognised by their id.
+
+        Args:
+            history_dir (str, optional): Directory to import. Defaults to this manager's directory.
+            quiet (bool): Only report the import if it found new entries
+
+        Returns:
+            int: Number of entries imported
+        """
+        # Read the day files through the plain JSON implementation
+        source = HistoryManager(history_dir) if history_dir else self
+
+        imported = 0
+        try:
+            with self._lock, self._connection:
+                already_imported = {
+                    row['filename']: (row['size'], row['mtime_ns']) for row in
+                    self._connection.execute("SELECT filename, size, mtime_ns FROM imported_files")
+                }
+                for date in sorted(source._scan_dates()):
+                    for path in (source._legacy_path(date), source._journal_path(date)):
+                        filename = os.path.basename(path)
+                        try:
+                            stat = os.stat(path)
+                        except FileNotFoundError:
+                            continue
+                        signature = (stat.st_size, stat.st_mtime_ns)
+                        if already_imported.get(filename) == signature:
+                            continue
+                        for entry in source._iter_history_file(path):
+                            # Entries without an id can't be told apart from their earlier import
+                            if filename in already_imported and not entry.get('id'):
+                                continue
+                            if self._insert_entry(date, entry):
+                                imported += 1
+                        self._connection.execute(
+                            "INSERT OR REPLACE INTO imported_files (filename, size, mtime_ns) VALUES (?, ?, ?)",
+                            (filename, *signature)
+                        )
+            if not self.read_only and (imported or not quiet):
+                print(f"Imported {imported} history entries into {self.db_path}")
+        except Exception as e:
+            print(f"Error importing history: {e}")
+
+        # Damaged files gave up what could be recovered; repair them so they aren't left as they are
+        if source._damaged_files:
+            print(f"{len(source._damaged_files)} imported history file(s) were damaged")
+            if not self.read_only:
+                source.repair_damaged_files()
+        return imported
+
+    def merge_history_file(self, path, date):
+        """Merge the entries of another copy of a day file into the database
+
+        Entries whose id is already stored are skipped.
+
+        Args:
+            path (str): Day file to merge from, in either format
+            date (str): Day to merge into, 'YYYY-MM-DD'
+
+        Returns:
+            int: Number of entries added
+        """
+        merged = 0
+        try:
+            with self._lock, self._connection:
+                for entry in self._iter_history_file(path):
+                    if self._insert_entry(date, entry):
+                        merged += 1
+                self._damaged_files.discard(path)
+        except Exception as e:
+            print(f"Error merging history file {path}: {e}")
+        return merged
+
+    def close(self):
+        super().close()
+        with self._lock:
+            self._connection.close()
+
+    def _conditions(self, start_date=None, end_date=None, status=None):
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        return conditions, params
+
+    def _add_entry_ids(self):
+        # Databases created before entries had ids lack the column
+        columns = {row['name'] for row in self._connection.execute("PRAGMA table_info(history)")}
+        if 'entry_id' not in columns:
+            self._connection.execute("ALTER TABLE history ADD COLUMN entry_id TEXT")
+        # Lets the same entry arrive twice (re-imports, merged copies) without duplicating it
+        self._connection.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_history_entry_id ON history(entry_id)"
+        )
+
+    def _add_import_signatures(self):
+        # Databases from before changed files were re-imported only recorded file names
+        columns = {row['name'] for row in self._connection.execute("PRAGMA table_info(imported_files)")}
+        for column in ('size', 'mtime_ns'):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE imported_files ADD COLUMN {column} INTEGER")
+
+    def _insert_entry(self, date, entry):
+        # Returns whether the entry was new
+        cursor = self._connection.execute(
+            "INSERT OR IGNORE INTO history (date, timestamp, status, task_name, phases, entry_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                date,
+                entry.get('timestamp'),
+                entry.get('status', 'Completed'),
+                entry.get('task_name'),
+                json.dumps(entry.get('phases', [])),
+                entry.get('id')
+            )
+        )
+        return cursor.rowcount == 1
+
+    def _row_to_entry(self, row):
+        entry = {
+            'timestamp': row['timestamp'],
+            'phases': json.loads(row['phases']) if row['phases'] else [],
+            'status': row['status'],
+            'task_name': row['task_name']
+        }
+        if row['entry_id']:
+            entry['id'] = row['entry_id']
+        return entry
+
+    def _today(self):
+        return datetime.date.today().strftime('%Y-%m-%d')
+
+
+def _prefix_upper_bound(prefix):
+    # Smallest string above every string starting with prefix, or None if there is none
+    while prefix:
+        last = ord(prefix[-1])
+        if last < sys.maxunicode:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
@@ -0,0 +1,46 @@
+"""
+Startup trace mode.
+
+Run with MBM_STARTUP_TRACE=1 (or pass --trace-startup) to print how long each
+startup phase took, from the first import of this module to the first paint
+of the timer window. Set MBM_STARTUP_BUDGET_MS to flag startups over budget.
+"""
+import os
+import sys
+import time
+
+ENABLED = bool(os.environ.get('MBM_STARTUP_TRACE')) or '--trace-startup' in sys.argv
+
+_started = time.perf_counter()
+_last = _started
+_phases = []
+_reported = False
+
+
+def mark(phase):
+    """Record the time spent since the previous mark under phase"""
+    global _last
+    if not ENABLED:
+        return
+    now = time.perf_counter()
+    _phases.append((phase, now - _last))
+    _last = now
+
+
+def report():
+    """Print the collected phases once, with the total and the budget check"""
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+
+    total_ms = (_last - _started) * 1000
+    print("Startup trace:")
+    for phase, seconds in _phases:
+        print(f"  {phase:<16} {seconds * 1000:8.1f} ms")
+    print(f"  {'total':<16} {total_ms:8.1f} ms")
+
+    budget = os.environ.get('MBM_STARTUP_BUDGET_MS')
+    if budget:
+        status = "within" if total_ms <= float(budget) else "OVER"
+        print(f"  {status} budget of {float(budget):.0f} ms")
@@ -18,7 +18,8 @@ class TaskNameDialog(QDialog):
 
         self.setup_fonts()
         
-        self.apply_modern_stylesheet()
+        # Styled by the app-level theme stylesheet
+        self.setObjectName("taskNameDialog")
         
         self.setup_ui()
         
@@ -33,57 +34,6 @@ class TaskNameDialog(QDialog):
         self.title_font = QFont("Calibri", 14)
         self.title_font.setBold(True)
         
-    def apply_modern_stylesheet(self):
-        self.setStyleSheet("""
-            QDialog {
-                background-color: transparent;
-            }
-            QFrame#mainContainer {
-                background-color: rgb(32, 32, 32);
-                border-radius: 15px;
-                border: none;
-            }
-            QLabel {
-                color: rgb(240, 240, 240);
-                background-color: transparent;
-                border: none;
-            }
-            QLineEdit {
-                background-color: rgb(45, 45, 45);
-                color: white;
-                border-radius: 8px;
-                padding: 6px 10px;
-                border: none;
-                selection-background-color: rgb(70, 130, 180);
-            }
-            QLineEdit:focus {
-                background-color: rgb(50, 50, 50);
-            }
-            QPushButton {
-                background-color: rgb(45, 45, 45);
-                color: white;
-                border-radius: 8px;
-                padding: 6px 12px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: rgb(55, 55, 55);
-            }
-            QPushButton:pressed {
-                background-color: rgb(40, 40, 40);
-            }
-            QPushButton#startButton {
-                background-color: rgb(40, 120, 40);
-                color: white;
-            }
-            QPushButton#startButton:hover {
-                background-color: rgb(45, 135, 45);
-            }
-            QPushButton#startButton:pressed {
-                background-color: rgb(35, 105, 35);
-            }
-        """)
-    
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(15, 15, 15, 15)
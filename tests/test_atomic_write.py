@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+import atomic_write
+from atomic_write import atomic_open, atomic_write_json
+
+
+def test_replaces_the_file(tmp_path):
+    path = str(tmp_path / 'settings.json')
+    atomic_write_json(path, {'scale': 1.0})
+    atomic_write_json(path, {'scale': 2.0}, indent=4)
+    with open(path) as f:
+        assert json.load(f) == {'scale': 2.0}
+    assert os.listdir(tmp_path) == ['settings.json']
+
+
+def test_failure_leaves_the_original(tmp_path):
+    path = str(tmp_path / 'settings.json')
+    atomic_write_json(path, {'scale': 1.0})
+    with pytest.raises(RuntimeError):
+        with atomic_open(path, 'w') as f:
+            f.write('{"scale": ')
+            raise RuntimeError("interrupted")
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {'scale': object()})
+
+    with open(path) as f:
+        assert json.load(f) == {'scale': 1.0}
+    assert os.listdir(tmp_path) == ['settings.json']
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="POSIX permissions")
+def test_new_files_get_the_umask_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(atomic_write, '_UMASK', 0o027)
+    path = str(tmp_path / 'manifest.json')
+    atomic_write_json(path, {})
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="POSIX permissions")
+def test_replaced_files_keep_their_mode(tmp_path):
+    path = str(tmp_path / 'manifest.json')
+    with open(path, 'w') as f:
+        f.write('{}')
+    os.chmod(path, 0o600)
+    atomic_write_json(path, {'days': {}})
+    assert os.stat(path).st_mode & 0o777 == 0o600
@@ -0,0 +1,137 @@
+import datetime
+import json
+import threading
+
+import pytest
+
+import file_lock
+from file_lock import FileLock, get_file_lock
+from history_manager import CLEAN_STATUS, HistoryManager
+
+
+def test_reentrant_within_a_thread(tmp_path):
+    lock = FileLock(str(tmp_path / '.lock'))
+    with lock:
+        with lock:
+            assert lock._depth == 2
+        assert lock._depth == 1
+    assert lock._depth == 0
+    assert lock._fd is None
+    assert lock.stats()['acquisitions'] == 1
+
+
+def test_release_without_acquire(tmp_path):
+    with pytest.raises(RuntimeError):
+        FileLock(str(tmp_path / '.lock')).release()
+
+
+def test_excludes_other_threads(tmp_path):
+    lock = FileLock(str(tmp_path / '.lock'))
+    acquired = threading.Event()
+
+    def other():
+        with lock:
+            acquired.set()
+
+    with lock:
+        thread = threading.Thread(target=other)
+        thread.start()
+        assert not acquired.wait(0.1)
+    thread.join(5)
+    assert acquired.is_set()
+
+
+@pytest.mark.skipif(file_lock.fcntl is None, reason="needs fcntl.flock")
+def test_times_out_and_records_waits(tmp_path):
+    path = str(tmp_path / '.lock')
+    # A separate FileLock on the same path stands in for another process
+    other_process = FileLock(path)
+    lock = FileLock(path, timeout=0.05)
+
+    with other_process:
+        with pytest.raises(TimeoutError):
+            lock.acquire()
+    assert lock._fd is None
+    assert lock.stats()['acquisitions'] == 0
+
+    held = threading.Event()
+
+    def hold_briefly():
+        with other_process:
+            held.set()
+            threading.Event().wait(0.05)
+
+    thread = threading.Thread(target=hold_briefly)
+    thread.start()
+    held.wait(5)
+    lock.timeout = 5
+    with lock:
+        pass
+    thread.join()
+
+    stats = lock.stats()
+    assert stats['acquisitions'] == 1
+    assert stats['contended'] == 1
+    assert stats['max_wait_ms'] > 0
+    assert stats['total_wait_ms'] == stats['max_wait_ms']
+
+
+def test_get_file_lock_shares_one_lock_per_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lock = get_file_lock(str(tmp_path / '.lock'))
+    assert get_file_lock('.lock') is lock
+    assert get_file_lock(str(tmp_path / 'other.lock')) is not lock
+
+
+def save(history_manager, name):
+    when = datetime.datetime(2024, 3, 1, 9)
+    assert history_manager.save_daily_history({'task_name': name, 'status': CLEAN_STATUS, 'phases': []}, when)
+
+
+def open_manager(history_dir):
+    history_manager = HistoryManager(str(history_dir))
+    history_manager.verbose = False
+    return history_manager
+
+
+def test_two_managers_keep_each_others_entries(tmp_path):
+    history_dir = tmp_path / 'history'
+    managers = [open_manager(history_dir) for _ in range(2)]
+    assert managers[0]._file_lock is managers[1]._file_lock
+
+    def write(history_manager, prefix):
+        for i in range(50):
+            save(history_manager, f"{prefix} {i}")
+        history_manager.flush()
+
+    threads = [threading.Thread(target=write, args=(history_manager, f"Task {n}"))
+               for n, history_manager in enumerate(managers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    entries = open_manager(history_dir).load_daily_history('2024-03-01')
+    assert len(entries) == 100
+    assert len({entry['id'] for entry in entries}) == 100
+
+
+def test_merge_skips_entries_already_present(tmp_path):
+    history_manager = open_manager(tmp_path / 'history')
+    save(history_manager, "Write report")
+    save(history_manager, "Review")
+    history_manager.flush()
+    entries = history_manager.load_daily_history('2024-03-01')
+
+    # A sync tool's conflicting copy: one shared entry, one new one
+    copy = tmp_path / 'history_2024-03-01 (conflicted copy).jsonl'
+    with open(copy, 'w') as f:
+        for entry in [entries[1], {'task_name': "From the laptop", 'status': CLEAN_STATUS, 'id': 'laptop'}]:
+            f.write(json.dumps(entry) + '\n')
+
+    assert history_manager.merge_history_file(str(copy), '2024-03-01') == 1
+    assert history_manager.merge_history_file(str(copy), '2024-03-01') == 0
+    assert [entry['task_name'] for entry in history_manager.load_daily_history('2024-03-01')] == \
+        ["Write report", "Review", "From the laptop"]
+    assert history_manager.get_day_summaries()['2024-03-01']['count'] == 3
+    history_manager.close()
@@ -0,0 +1,125 @@
+import datetime
+import json
+import threading
+import time
+
+import pytest
+
+from file_lock import FileLock
+from history_manager import CLEAN_STATUS, MANIFEST_NAME, HistoryManager
+
+DATE = '2024-03-01'
+
+
+def save(history_manager, name, hour=9):
+    when = datetime.datetime.strptime(DATE, '%Y-%m-%d').replace(hour=hour)
+    assert history_manager.save_daily_history({'task_name': name, 'status': CLEAN_STATUS, 'phases': []}, when)
+
+
+def names(entries):
+    return [entry['task_name'] for entry in entries]
+
+
+def journal_names(history_manager):
+    try:
+        with open(history_manager._journal_path(DATE)) as f:
+            return [json.loads(line)['task_name'] for line in f]
+    except FileNotFoundError:
+        return []
+
+
+@pytest.fixture
+def history(tmp_path):
+    history_manager = HistoryManager(str(tmp_path / 'history'))
+    history_manager.verbose = False
+    history_manager.group_commit = True
+    yield history_manager
+    history_manager.close()
+
+
+def test_saves_wait_for_the_flush(history):
+    save(history, "First")
+    save(history, "Second", hour=10)
+    assert journal_names(history) == []
+    assert names(history.load_daily_history(DATE)) == ["First", "Second"]
+    assert history.get_day_summaries()[DATE]['count'] == 2
+
+    assert history.flush()
+    assert journal_names(history) == ["First", "Second"]
+    with open(history._manifest_path()) as f:
+        assert json.load(f)['days'][DATE]['count'] == 2
+
+
+def test_readers_do_not_wait_for_a_flush(history):
+    save(history, "Already written")
+    history.flush()
+    save(history, "Being written", hour=10)
+
+    # Stands in for a flush stuck in a slow fsync: the file lock is held throughout
+    release = threading.Event()
+    held = threading.Event()
+
+    def hold_file_lock():
+        with history._file_lock:
+            held.set()
+            release.wait(10)
+
+    holder = threading.Thread(target=hold_file_lock)
+    holder.start()
+    held.wait(5)
+    flusher = threading.Thread(target=history.flush)
+    flusher.start()
+    try:
+        start = time.monotonic()
+        assert names(history.load_daily_history(DATE)) == ["Already written", "Being written"]
+        assert names(history.iter_history()) == ["Already written", "Being written"]
+        assert history.get_day_summaries()[DATE]['count'] == 2
+        assert time.monotonic() - start < 1
+    finally:
+        release.set()
+        holder.join()
+        flusher.join()
+    assert journal_names(history) == ["Already written", "Being written"]
+
+
+def test_failed_write_keeps_the_batch(history, monkeypatch):
+    save(history, "Kept")
+
+    def fail(date, lines):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(history, '_write_lines', fail)
+    assert not history.flush()
+    assert names(history.load_daily_history(DATE)) == ["Kept"]
+    save(history, "Saved after", hour=10)
+
+    monkeypatch.undo()
+    assert history.flush()
+    assert journal_names(history) == ["Kept", "Saved after"]
+
+
+def test_flush_times_out_while_another_process_holds_the_directory(history):
+    save(history, "Waiting")
+    history._file_lock.timeout = 0.05
+    # A second FileLock on the same path stands in for another process
+    with FileLock(history._file_lock.path):
+        assert not history.flush()
+    assert names(history.load_daily_history(DATE)) == ["Waiting"]
+
+    assert history.flush()
+    assert journal_names(history) == ["Waiting"]
+    reader = HistoryManager(history.history_dir)
+    assert reader.get_day_summaries() == {DATE: {'count': 1, 'clean': 1, 'cheated': 0}}
+
+
+def test_manifest_failure_is_retried(history, monkeypatch):
+    save(history, "Counted")
+    monkeypatch.setattr(history, '_write_manifest', lambda changes: False)
+    assert history.flush()
+    assert history._manifest_dirty
+    assert history.get_day_summaries()[DATE]['count'] == 1
+
+    monkeypatch.undo()
+    assert history.flush()
+    with open(history._manifest_path()) as f:
+        assert json.load(f)['days'][DATE]['count'] == 1
@@ -0,0 +1,118 @@
+import datetime
+import json
+from itertools import islice
+
+import pytest
+
+import history_manager as history_module
+from history_manager import CHEATED_STATUS, CLEAN_STATUS, HistoryManager
+
+
+def save(history_manager, name, date, status=CLEAN_STATUS, hour=9):
+    when = datetime.datetime.strptime(date, '%Y-%m-%d').replace(hour=hour)
+    assert history_manager.save_daily_history({'task_name': name, 'status': status, 'phases': []}, when)
+
+
+def open_manager(history_dir):
+    history_manager = HistoryManager(str(history_dir))
+    history_manager.verbose = False
+    return history_manager
+
+
+def names(entries):
+    return [entry['task_name'] for entry in entries]
+
+
+@pytest.fixture
+def history_dir(tmp_path):
+    return tmp_path / 'history'
+
+
+@pytest.fixture
+def history(history_dir):
+    history_manager = open_manager(history_dir)
+    save(history_manager, "Write report", '2024-03-01')
+    save(history_manager, "Review", '2024-03-01', CHEATED_STATUS, hour=10)
+    save(history_manager, "Write tests", '2024-03-02', hour=11)
+    save(history_manager, "Read", '2024-03-03', CHEATED_STATUS)
+    save(history_manager, "Write docs", '2024-03-03', hour=12)
+    yield history_manager
+    history_manager.close()
+
+
+def test_iter_history_streams_oldest_day_first(history):
+    entries = list(history.iter_history())
+    assert names(entries) == ["Write report", "Review", "Write tests", "Read", "Write docs"]
+    assert [entry['date'] for entry in entries] == ['2024-03-01'] * 2 + ['2024-03-02'] + ['2024-03-03'] * 2
+
+
+def test_iter_history_filters(history):
+    assert names(history.iter_history(start_date='2024-03-02')) == ["Write tests", "Read", "Write docs"]
+    assert names(history.iter_history(end_date='2024-03-01')) == ["Write report", "Review"]
+    assert names(history.iter_history(status=CHEATED_STATUS)) == ["Review", "Read"]
+    assert names(history.iter_history(name_prefix="Write")) == ["Write report", "Write tests", "Write docs"]
+    assert names(history.iter_history(name_prefix="Write", status=CLEAN_STATUS,
+                                      start_date='2024-03-02')) == ["Write tests", "Write docs"]
+
+
+def test_iter_history_offset_and_limit(history):
+    assert names(history.iter_history(offset=1, limit=2)) == ["Review", "Write tests"]
+    assert names(history.iter_history(name_prefix="Write", offset=2)) == ["Write docs"]
+    assert names(history.iter_history(offset=10)) == []
+    assert names(history.iter_history(limit=0)) == []
+
+
+def test_iter_history_yields_copies(history_dir, history):
+    reader = open_manager(history_dir)
+    for _ in range(2):
+        entry = next(reader.iter_history())
+        entry['task_name'] = "Changed"
+        assert names(reader.iter_history(limit=1)) == ["Write report"]
+    assert 'date' not in reader.load_daily_history('2024-03-01')[0]
+
+
+def test_day_is_streamed_not_read_ahead(history_dir, history):
+    # Anything past the rows taken is never parsed, so damage there goes unnoticed
+    with open(history._journal_path('2024-03-01'), 'a') as f:
+        f.write('{"torn\n')
+
+    reader = open_manager(history_dir)
+    assert names(islice(reader.iter_history(), 2)) == ["Write report", "Review"]
+    assert not reader._damaged_files
+    assert '2024-03-01' not in reader._cache
+
+    assert names(reader.iter_history(end_date='2024-03-01')) == ["Write report", "Review"]
+    assert reader._damaged_files == {history._journal_path('2024-03-01')}
+
+
+def test_day_read_to_the_end_is_cached(history_dir, history):
+    reader = open_manager(history_dir)
+    list(reader.iter_history(start_date='2024-03-03'))
+    assert names(reader._cache['2024-03-03']['entries']) == ["Read", "Write docs"]
+
+
+def test_large_days_are_not_cached(history_dir, history, monkeypatch):
+    monkeypatch.setattr(history_module, 'CACHED_DAY_MAX_ENTRIES', 1)
+    reader = open_manager(history_dir)
+    assert names(reader.iter_history()) == ["Write report", "Review", "Write tests", "Read", "Write docs"]
+    assert list(reader._cache) == ['2024-03-02']
+    assert reader.get_day_summaries()['2024-03-01'] == {'count': 2, 'clean': 1, 'cheated': 1}
+
+
+def test_appends_during_a_stream_are_left_for_the_next_read(history_dir, history):
+    reader = open_manager(history_dir)
+    entries = reader.iter_history(start_date='2024-03-03')
+    assert next(entries)['task_name'] == "Read"
+
+    save(open_manager(history_dir), "Saved meanwhile", '2024-03-03', hour=13)
+    assert names(entries) == ["Write docs"]
+    assert '2024-03-03' not in reader._cache
+    assert names(reader.iter_history(start_date='2024-03-03')) == ["Read", "Write docs", "Saved meanwhile"]
+
+
+def test_legacy_entries_without_a_name_are_numbered(history_dir):
+    history_dir.mkdir()
+    with open(history_dir / 'history_2024-03-01.json', 'w') as f:
+        json.dump([{'status': CLEAN_STATUS}, {'task_name': "Named"}, {'task_name': ""}], f)
+    reader = open_manager(history_dir)
+    assert names(reader.iter_history()) == ["Task 1", "Named", "Task 3"]
@@ -0,0 +1,56 @@
+import datetime
+import json
+
+from history_manager import CLEAN_STATUS, HistoryManager
+
+DATE = '2024-03-01'
+
+
+def save(history_manager, name, hour=9):
+    when = datetime.datetime.strptime(DATE, '%Y-%m-%d').replace(hour=hour)
+    assert history_manager.save_daily_history({'task_name': name, 'status': CLEAN_STATUS, 'phases': []}, when)
+
+
+def open_manager(history_dir):
+    history_manager = HistoryManager(str(history_dir))
+    history_manager.verbose = False
+    return history_manager
+
+
+def test_each_save_appends_one_line(tmp_path):
+    history_manager = open_manager(tmp_path)
+    save(history_manager, "First")
+    save(history_manager, "Second", hour=10)
+
+    with open(tmp_path / f'history_{DATE}.jsonl') as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry['task_name'] for entry in entries] == ["First", "Second"]
+    assert [entry['timestamp'] for entry in entries] == ['09:00:00', '10:00:00']
+    assert all(entry['id'] for entry in entries)
+    assert entries[0]['id'] != entries[1]['id']
+
+
+def test_legacy_entries_come_before_the_journal(tmp_path):
+    with open(tmp_path / f'history_{DATE}.json', 'w') as f:
+        json.dump([{'task_name': "Legacy", 'status': CLEAN_STATUS, 'timestamp': '08:00:00'}], f, indent=4)
+    history_manager = open_manager(tmp_path)
+    save(history_manager, "Journaled")
+
+    # The legacy array is never rewritten again
+    with open(tmp_path / f'history_{DATE}.json') as f:
+        assert [entry['task_name'] for entry in json.load(f)] == ["Legacy"]
+    assert [entry['task_name'] for entry in open_manager(tmp_path).load_daily_history(DATE)] == \
+        ["Legacy", "Journaled"]
+
+
+def test_interrupted_append_starts_a_fresh_line(tmp_path):
+    history_manager = open_manager(tmp_path)
+    save(history_manager, "First")
+    with open(tmp_path / f'history_{DATE}.jsonl', 'a') as f:
+        f.write('{"task_name": "Cut o')
+    save(history_manager, "After the crash", hour=10)
+
+    with open(tmp_path / f'history_{DATE}.jsonl') as f:
+        lines = f.read().splitlines()
+    assert lines[1] == '{"task_name": "Cut o'
+    assert json.loads(lines[2])['task_name'] == "After the crash"
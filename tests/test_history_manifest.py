@@ -0,0 +1,102 @@
+import datetime
+import json
+import os
+
+import pytest
+
+from history_manager import CHEATED_STATUS, CLEAN_STATUS, MANIFEST_NAME, HistoryManager
+
+
+def save(history_manager, name, date, status=CLEAN_STATUS, hour=9):
+    when = datetime.datetime.strptime(date, '%Y-%m-%d').replace(hour=hour)
+    assert history_manager.save_daily_history({'task_name': name, 'status': status, 'phases': []}, when)
+
+
+def open_manager(history_dir):
+    history_manager = HistoryManager(str(history_dir))
+    history_manager.verbose = False
+    return history_manager
+
+
+def manifest_days(history_dir):
+    with open(history_dir / MANIFEST_NAME) as f:
+        return json.load(f)['days']
+
+
+EXPECTED = {
+    '2024-03-01': {'count': 2, 'clean': 1, 'cheated': 1},
+    '2024-03-02': {'count': 1, 'clean': 1, 'cheated': 0}
+}
+
+
+@pytest.fixture
+def history_dir(tmp_path):
+    return tmp_path / 'history'
+
+
+@pytest.fixture
+def history(history_dir):
+    history_manager = open_manager(history_dir)
+    save(history_manager, "Write report", '2024-03-01')
+    save(history_manager, "Review", '2024-03-01', CHEATED_STATUS, hour=10)
+    save(history_manager, "Write tests", '2024-03-02')
+    yield history_manager
+    history_manager.close()
+
+
+def test_manifest_counts_each_day(history, history_dir):
+    assert history.get_day_summaries() == EXPECTED
+    assert history.get_available_dates() == ['2024-03-02', '2024-03-01']
+    assert manifest_days(history_dir) == EXPECTED
+
+
+def test_dates_come_from_the_manifest(history, history_dir):
+    # A day file the manifest doesn't know about isn't listed until the manifest is rebuilt
+    with open(history_dir / 'history_2024-03-05.jsonl', 'w') as f:
+        f.write(json.dumps({'task_name': "Copied in", 'id': 'copied'}) + '\n')
+    reader = open_manager(history_dir)
+    assert reader.get_available_dates() == ['2024-03-02', '2024-03-01']
+
+    assert reader.rebuild_manifest() == 3
+    assert reader.get_available_dates() == ['2024-03-05', '2024-03-02', '2024-03-01']
+
+
+def test_saves_from_two_managers_are_merged(history_dir):
+    first = open_manager(history_dir)
+    second = open_manager(history_dir)
+    assert first.get_day_summaries() == second.get_day_summaries() == {}
+
+    # Each saves without having seen the other's manifest; neither count may be lost
+    save(first, "From first", '2024-03-01')
+    save(second, "From second", '2024-03-01', CHEATED_STATUS, hour=10)
+    save(second, "Also from second", '2024-03-02')
+
+    assert manifest_days(history_dir) == EXPECTED
+    assert open_manager(history_dir).get_day_summaries() == EXPECTED
+
+
+def test_missing_manifest_is_rebuilt(history, history_dir):
+    os.remove(history_dir / MANIFEST_NAME)
+    assert open_manager(history_dir).get_day_summaries() == EXPECTED
+    assert manifest_days(history_dir) == EXPECTED
+
+
+def test_unreadable_manifest_is_rebuilt(history, history_dir):
+    with open(history_dir / MANIFEST_NAME, 'w') as f:
+        f.write('{"version": 1, "da')
+    assert open_manager(history_dir).get_day_summaries() == EXPECTED
+
+
+def test_day_changed_outside_is_recounted(history, history_dir):
+    with open(history._journal_path('2024-03-02'), 'a') as f:
+        f.write(json.dumps({'task_name': "Copied in", 'status': CHEATED_STATUS, 'id': 'copied'}) + '\n')
+
+    reader = open_manager(history_dir)
+    assert len(reader.load_daily_history('2024-03-02')) == 2
+    recounted = {'count': 2, 'clean': 1, 'cheated': 1}
+    assert reader.get_day_summaries()['2024-03-02'] == recounted
+
+    # Written by the next flush rather than by the reader
+    assert manifest_days(history_dir)['2024-03-02'] == EXPECTED['2024-03-02']
+    assert reader.flush()
+    assert manifest_days(history_dir)['2024-03-02'] == recounted
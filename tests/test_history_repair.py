@@ -0,0 +1,193 @@
+import datetime
+import io
+import json
+import os
+
+import pytest
+
+from history_manager import CHEATED_STATUS, CLEAN_STATUS, HistoryManager
+from history_repair import (DAMAGED_STATUS, OK_STATUS, REPAIRED_STATUS, DamagedHistoryError,
+                            check_history_file, iter_history_entries, iter_journal, iter_json_array,
+                            repair_history_file, scan_history_dir)
+
+ENTRIES = [{'task_name': f"Task {i}", 'phases': [{'name': "Phase", 'cheated': i % 2 == 0}]} for i in range(20)]
+
+
+def read_all(reader, text, **kwargs):
+    entries = []
+    try:
+        for entry in reader(io.StringIO(text), **kwargs):
+            entries.append(entry)
+    except DamagedHistoryError as e:
+        return entries, e
+    return entries, None
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64 * 1024])
+def test_json_array_streams_in_chunks(chunk_size):
+    entries, error = read_all(iter_json_array, json.dumps(ENTRIES, indent=4), chunk_size=chunk_size)
+    assert error is None
+    assert entries == ENTRIES
+
+
+@pytest.mark.parametrize('text', ['[]', '  [ ]  ', '[\n]\n'])
+def test_empty_json_array(text):
+    assert read_all(iter_json_array, text) == ([], None)
+
+
+@pytest.mark.parametrize('chunk_size', [3, 64 * 1024])
+def test_truncated_json_array_yields_what_came_before(chunk_size):
+    text = json.dumps(ENTRIES, indent=4)
+    cut = text.index('"Task 5"')
+    entries, error = read_all(iter_json_array, text[:cut], chunk_size=chunk_size)
+    assert entries == ENTRIES[:5]
+    assert error.recovered == 5
+
+
+@pytest.mark.parametrize('text, recovered', [
+    ('', 0),
+    ('{"task_name": "Not an array"}', 0),
+    ('[{"task_name": "A"} {"task_name": "B"}]', 1),
+    ('[{"task_name": "A"}, 42]', 1),
+    ('[{"task_name": "A"}] trailing', 1),
+])
+def test_malformed_json_array(text, recovered):
+    entries, error = read_all(iter_json_array, text)
+    assert error is not None
+    assert len(entries) == error.recovered == recovered
+
+
+def test_journal_skips_bad_lines_and_reports_the_first():
+    lines = [json.dumps(entry) for entry in ENTRIES[:3]]
+    text = '\n'.join([lines[0], '{"torn', '', lines[1], '[1, 2]', lines[2]]) + '\n'
+    entries, error = read_all(iter_journal, text)
+    assert entries == ENTRIES[:3]
+    assert error.position == 2
+    assert error.recovered == 3
+
+
+def test_journal_without_trailing_newline():
+    text = '\n'.join(json.dumps(entry) for entry in ENTRIES[:2])
+    assert read_all(iter_journal, text) == (ENTRIES[:2], None)
+
+
+def test_format_is_detected_from_the_first_character():
+    assert read_all(iter_history_entries, '\n  ' + json.dumps(ENTRIES[:2])) == (ENTRIES[:2], None)
+    assert read_all(iter_history_entries, json.dumps(ENTRIES[0]) + '\n') == (ENTRIES[:1], None)
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_repair_keeps_a_journal_a_journal(tmp_path):
+    path = str(tmp_path / 'history_2024-03-01.jsonl')
+    write(path, json.dumps(ENTRIES[0]) + '\n{"torn\n' + json.dumps(ENTRIES[1]) + '\n')
+    assert check_history_file(path)['status'] == DAMAGED_STATUS
+
+    result = repair_history_file(path)
+    assert result['status'] == REPAIRED_STATUS
+    assert result['entries'] == 2
+    with open(result['quarantined'], encoding='utf-8') as f:
+        assert '{"torn' in f.read()
+    assert os.path.dirname(result['quarantined']) == str(tmp_path / 'quarantine')
+
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == ENTRIES[:2]
+    assert check_history_file(path) == {'file': path, 'status': OK_STATUS, 'entries': 2, 'error': None}
+
+
+def test_repair_keeps_a_legacy_file_an_array(tmp_path):
+    path = str(tmp_path / 'history_2024-03-01.json')
+    text = json.dumps(ENTRIES, indent=4)
+    write(path, text[:text.index('"Task 3"')])
+
+    result = repair_history_file(path)
+    assert result['status'] == REPAIRED_STATUS
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == ENTRIES[:3]
+
+
+def test_repair_leaves_good_files_alone(tmp_path):
+    path = str(tmp_path / 'history_2024-03-01.jsonl')
+    write(path, json.dumps(ENTRIES[0]) + '\n')
+    assert repair_history_file(path)['status'] == OK_STATUS
+    assert not os.path.exists(tmp_path / 'quarantine')
+
+
+def test_scan_history_dir(tmp_path):
+    write(tmp_path / 'history_2024-03-01.jsonl', json.dumps(ENTRIES[0]) + '\n')
+    write(tmp_path / 'history_2024-03-02.json', '[{"task_name": ')
+    write(tmp_path / 'notes.txt', 'not history')
+
+    results = list(scan_history_dir(str(tmp_path)))
+    assert [(os.path.basename(result['file']), result['status']) for result in results] == [
+        ('history_2024-03-01.jsonl', OK_STATUS),
+        ('history_2024-03-02.json', DAMAGED_STATUS)
+    ]
+
+    results = list(scan_history_dir(str(tmp_path), repair=True))
+    assert [result['status'] for result in results] == [OK_STATUS, REPAIRED_STATUS]
+    assert len(os.listdir(tmp_path / 'quarantine')) == 1
+
+
+def open_manager(history_dir):
+    history_manager = HistoryManager(str(history_dir))
+    history_manager.verbose = False
+    return history_manager
+
+
+def names(entries):
+    return [entry['task_name'] for entry in entries]
+
+
+@pytest.fixture
+def history_dir(tmp_path):
+    return tmp_path / 'history'
+
+
+@pytest.fixture
+def history(history_dir):
+    history_manager = open_manager(history_dir)
+    for name, date, status in [("Write report", '2024-03-01', CLEAN_STATUS),
+                               ("Write tests", '2024-03-02', CLEAN_STATUS),
+                               ("Read", '2024-03-03', CHEATED_STATUS),
+                               ("Write docs", '2024-03-03', CLEAN_STATUS)]:
+        when = datetime.datetime.strptime(date, '%Y-%m-%d').replace(hour=9)
+        assert history_manager.save_daily_history({'task_name': name, 'status': status, 'phases': []}, when)
+    yield history_manager
+    history_manager.close()
+
+
+def damage(history_manager, date):
+    with open(history_manager._journal_path(date), 'a') as f:
+        f.write('{"task_name": "Torn\n')
+        f.write(json.dumps({'task_name': "After the damage", 'status': CLEAN_STATUS, 'id': 'after'}) + '\n')
+
+
+def test_damaged_day_is_repaired_and_quarantined(history, history_dir):
+    damage(history, '2024-03-02')
+    path = history._journal_path('2024-03-02')
+
+    reader = open_manager(history_dir)
+    assert names(reader.load_daily_history('2024-03-02')) == ["Write tests", "After the damage"]
+
+    quarantined = os.listdir(history_dir / 'quarantine')
+    assert len(quarantined) == 1 and quarantined[0].startswith(os.path.basename(path))
+    with open(path) as f:
+        assert [json.loads(line)['task_name'] for line in f] == ["Write tests", "After the damage"]
+
+
+def test_scan_integrity_repairs_on_request(history, history_dir):
+    damage(history, '2024-03-03')
+    reader = open_manager(history_dir)
+
+    results = {os.path.basename(result['file']): result['status'] for result in reader.scan_integrity()}
+    assert results['history_2024-03-03.jsonl'] == DAMAGED_STATUS
+    assert results['history_2024-03-01.jsonl'] == OK_STATUS
+
+    results = reader.scan_integrity(repair=True)
+    assert [result['status'] for result in results if result.get('quarantined')] == [REPAIRED_STATUS]
+    assert all(result['status'] == OK_STATUS for result in reader.scan_integrity())
+    assert reader.get_day_summaries()['2024-03-03'] == {'count': 3, 'clean': 2, 'cheated': 1}
@@ -0,0 +1,132 @@
+import csv
+import datetime
+import io
+import json
+import os
+
+import pytest
+
+import mbm
+from history_manager import CHEATED_STATUS, CLEAN_STATUS, MANIFEST_NAME, HistoryManager
+from timer_engine import PhaseSettings
+
+DATE = '2024-03-01'
+
+
+def save(history_manager, name, status=CLEAN_STATUS, hour=9):
+    when = datetime.datetime.strptime(DATE, '%Y-%m-%d').replace(hour=hour)
+    assert history_manager.save_daily_history({'task_name': name, 'status': status, 'phases': []}, when)
+
+
+@pytest.fixture
+def history_dir(tmp_path):
+    history_dir = tmp_path / 'history'
+    history_manager = HistoryManager(str(history_dir))
+    history_manager.verbose = False
+    save(history_manager, "Write report")
+    save(history_manager, "Review", CHEATED_STATUS, hour=10)
+    history_manager.close()
+    return history_dir
+
+
+def run(capsys, *argv):
+    code = mbm.main(list(argv))
+    return code, capsys.readouterr().out
+
+
+def snapshot(directory):
+    files = {}
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            with open(os.path.join(root, filename), 'rb') as f:
+                files[os.path.relpath(os.path.join(root, filename), directory)] = f.read()
+    return files
+
+
+def test_history(capsys, history_dir):
+    code, out = run(capsys, '--history-dir', str(history_dir), 'history', '--json')
+    assert code == 0
+    entries = [json.loads(line) for line in out.splitlines()]
+    assert [(entry['date'], entry['task_name']) for entry in entries] == [(DATE, "Write report"), (DATE, "Review")]
+
+    code, out = run(capsys, '--history-dir', str(history_dir), 'history', '--status', 'cheated')
+    assert "Review" in out and "Write report" not in out
+
+
+def test_history_dir_is_relative_to_the_working_directory(capsys, history_dir, monkeypatch):
+    monkeypatch.chdir(history_dir.parent)
+    code, out = run(capsys, '--history-dir', 'history', 'history', '--name', 'Write')
+    assert code == 0
+    assert "Write report" in out and "Review" not in out
+
+
+@pytest.mark.parametrize('export_format', ['jsonl', 'json', 'csv'])
+def test_export(capsys, history_dir, tmp_path, export_format):
+    output = tmp_path / f'export.{export_format}'
+    code, out = run(capsys, '--history-dir', str(history_dir), 'export',
+                    '--format', export_format, '--output', str(output))
+    assert code == 0
+    assert out == f"Exported 2 entries to {output}\n"
+
+    with open(output, newline='') as f:
+        if export_format == 'jsonl':
+            rows = [json.loads(line) for line in f]
+        elif export_format == 'json':
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+    assert [row['task_name'] for row in rows] == ["Write report", "Review"]
+
+
+def test_export_nothing_as_json(capsys, history_dir):
+    code, out = run(capsys, '--history-dir', str(history_dir), 'export', '--format', 'json', '--from', '2030-01-01')
+    assert json.loads(out) == []
+
+
+def test_stats(capsys, history_dir):
+    code, out = run(capsys, '--history-dir', str(history_dir), 'stats', '--json')
+    stats = json.loads(out)
+    assert (stats['tasks'], stats['clean'], stats['cheated'], stats['days']) == (2, 1, 1, 1)
+    assert stats['by_day'] == {DATE: {'count': 2, 'clean': 1, 'cheated': 1}}
+
+
+def test_read_only_commands_leave_damage_alone(capsys, history_dir):
+    with open(history_dir / f'history_{DATE}.jsonl', 'a') as f:
+        f.write('{"torn\n')
+    os.remove(history_dir / MANIFEST_NAME)
+    before = snapshot(history_dir)
+
+    for command in (['stats'], ['history'], ['export']):
+        code, out = run(capsys, '--history-dir', str(history_dir), *command)
+        assert code == 0
+    assert "Review" in out
+    assert snapshot(history_dir) == before
+
+
+@pytest.mark.skipif(not hasattr(os, 'geteuid') or os.geteuid() == 0,
+                    reason="needs a directory this user can't write to")
+def test_read_only_directory(capsys, history_dir):
+    os.remove(history_dir / '.history.lock')
+    os.remove(history_dir / MANIFEST_NAME)
+    os.chmod(history_dir, 0o555)
+    try:
+        code, out = run(capsys, '--history-dir', str(history_dir), 'history')
+        assert code == 0
+        assert "Write report" in out and "Review" in out
+
+        code, out = run(capsys, '--history-dir', str(history_dir), 'export')
+        assert len(out.splitlines()) == 2
+        assert sorted(os.listdir(history_dir)) == [f'history_{DATE}.jsonl']
+    finally:
+        os.chmod(history_dir, 0o755)
+
+
+def test_run_saves_the_task(capsys, history_dir, monkeypatch):
+    monkeypatch.setattr(mbm, 'phases_from_settings', lambda settings: [PhaseSettings("Only", 0, 0)])
+    code, out = run(capsys, '--history-dir', str(history_dir), 'run', '--task', "From the terminal", '--no-wait')
+    assert code == 0
+    assert "Task 'From the terminal' completed: Completed Clean" in out
+
+    code, out = run(capsys, '--history-dir', str(history_dir), 'history', '--json', '--name', 'From')
+    entry = json.loads(out)
+    assert entry['phases'] == [{'name': "Only", 'status': 'Finished', 'cheated': False}]
@@ -0,0 +1,71 @@
+import threading
+import uuid
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+from single_instance import InstanceServer, send_command
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def name():
+    return f"mbm-clock-test-{uuid.uuid4().hex[:12]}"
+
+
+def handler(command, argument):
+    if command == 'fail':
+        raise ValueError("failed on purpose")
+    return {'ok': True, 'command': command, 'argument': argument}
+
+
+def send_in_thread(app, command, name):
+    # The server only answers while its thread runs the event loop, so the client runs beside it
+    replies = []
+    thread = threading.Thread(target=lambda: replies.append(send_command(command, name)))
+    thread.start()
+    while thread.is_alive():
+        app.processEvents()
+        thread.join(0.01)
+    return replies[0]
+
+
+def test_execute_dispatches_to_the_handler():
+    server = InstanceServer(handler, name="unused")
+    assert server.execute("Start  Write report \n") == {'ok': True, 'command': 'start', 'argument': "Write report"}
+    assert server.execute("fail") == {'ok': False, 'error': "failed on purpose"}
+    assert InstanceServer(name="unused").execute("ping") == {'ok': False, 'error': "Not ready"}
+
+
+def test_second_instance_is_turned_away(app, name):
+    first = InstanceServer(handler, name=name)
+    assert first.listen()
+    try:
+        second = InstanceServer(handler, name=name)
+        assert not second.listen()
+        assert second.other_instance
+    finally:
+        first.close()
+
+    third = InstanceServer(handler, name=name)
+    assert third.listen()
+    third.close()
+
+
+def test_commands_round_trip(app, name):
+    server = InstanceServer(handler, name=name)
+    assert server.listen()
+    try:
+        assert send_in_thread(app, "start Write report", name) == \
+            {'ok': True, 'command': 'start', 'argument': "Write report"}
+        assert send_in_thread(app, "fail", name) == {'ok': False, 'error': "failed on purpose"}
+    finally:
+        server.close()
+
+
+def test_no_instance_running(app, name):
+    assert send_command("ping", name, timeout_ms=100) is None
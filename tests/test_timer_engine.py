@@ -0,0 +1,223 @@
+import pytest
+
+from timer_engine import PhaseSettings, TimerEngine, phases_from_settings
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def engine(clock):
+    return TimerEngine([PhaseSettings("Work", 0, 10), PhaseSettings("Review", 0, 5)], clock=clock)
+
+
+def finish_phase(engine, clock):
+    clock.advance(engine.remaining())
+    engine.tick()
+
+
+def test_phases_from_settings_defaults():
+    phases = phases_from_settings({})
+    assert [(phase.name, phase.get_total_seconds()) for phase in phases] == [("Phase", 30 * 60)]
+
+    phases = phases_from_settings({'phases': [{'name': "Read", 'minutes': 1}, {'seconds': 20}]})
+    assert [(phase.name, phase.get_total_seconds()) for phase in phases] == [("Read", 60), ("Phase", 30 * 60 + 20)]
+
+
+def test_idle_engine_shows_zero_and_has_no_countdown(engine):
+    assert not engine.task_active
+    assert engine.seconds == 0
+    assert engine.remaining() is None
+    assert engine.tick() is None
+
+
+def test_remaining_seconds_round_up(engine, clock):
+    engine.start_task("Write report")
+    assert engine.seconds == 10
+
+    clock.advance(0.2)
+    assert engine.tick() == pytest.approx(9.8)
+    # The display shows 00:10 until a whole second has passed
+    assert engine.seconds == 10
+
+    clock.advance(0.9)
+    engine.tick()
+    assert engine.seconds == 9
+
+
+def test_time_changed_only_when_the_display_changes(engine, clock):
+    changes = []
+    engine.add_listener('time_changed', lambda: changes.append(engine.seconds))
+    engine.start_task("Write report")
+    changes.clear()
+
+    for _ in range(5):
+        clock.advance(0.1)
+        engine.tick()
+    assert changes == []
+
+    clock.advance(0.6)
+    engine.tick()
+    assert changes == [9]
+
+
+def test_deadline_starts_blinking(engine, clock):
+    events = []
+    engine.add_listener('blinking_started', lambda initial: events.append(initial))
+    engine.start_task("Write report")
+
+    finish_phase(engine, clock)
+    assert engine.seconds == 0
+    assert engine.is_blinking
+    assert not engine.initial_state
+    assert engine.remaining() is None
+    assert events == [False]
+
+
+def test_clean_task(engine, clock):
+    completed = []
+    engine.add_listener('task_completed', completed.append)
+    engine.start_task("Write report")
+
+    finish_phase(engine, clock)
+    assert engine.open_notes()
+    engine.next_phase()
+    assert engine.current_phase_index == 1
+    assert engine.seconds == 5
+
+    finish_phase(engine, clock)
+    assert engine.open_notes()
+    entry = engine.complete_task()
+
+    assert entry == {
+        'phases': [
+            {'name': "Work", 'status': 'Finished', 'cheated': False},
+            {'name': "Review", 'status': 'Finished', 'cheated': False}
+        ],
+        'status': 'Completed Clean',
+        'task_name': "Write report"
+    }
+    assert completed == [entry]
+    assert not engine.task_active
+    assert engine.is_blinking and engine.initial_state
+
+
+def test_opening_notes_early_is_cheating(engine, clock):
+    engine.start_task("Write report")
+    clock.advance(3)
+    assert not engine.open_notes()
+    assert engine.phase_cheated[0]
+
+    finish_phase(engine, clock)
+    engine.open_notes()
+    entry = engine.complete_task()
+    assert entry['phases'][0]['cheated']
+    assert entry['status'] == 'Completed with Cheating'
+
+
+def test_skipping_a_running_phase_is_cheating(engine, clock):
+    engine.start_task("Write report")
+    clock.advance(3)
+    engine.tick()
+    engine.next_phase()
+
+    assert engine.current_phase_index == 1
+    assert engine.phase_history == [{'name': "Work", 'status': 'Finished', 'cheated': True}]
+    assert engine.complete_task()['status'] == 'Completed with Cheating'
+
+
+def test_open_notes_catches_up_with_the_deadline(engine, clock):
+    engine.start_task("Write report")
+    # No tick ran since the deadline passed, e.g. the machine was asleep
+    clock.advance(60)
+    assert engine.open_notes()
+    assert not engine.phase_cheated[0]
+
+
+def test_complete_task_before_any_phase_finished_is_clean(engine, clock):
+    engine.start_task("Write report")
+    clock.advance(2)
+    entry = engine.complete_task()
+    assert entry['phases'] == [{'name': "Work", 'status': 'Finished', 'cheated': False}]
+    assert entry['status'] == 'Completed Clean'
+
+
+def test_next_phase_after_the_last_starts_over(engine, clock):
+    engine.start_task("Write report")
+    for _ in range(2):
+        finish_phase(engine, clock)
+        engine.open_notes()
+        engine.next_phase()
+    assert engine.current_phase_index == 0
+    assert engine.seconds == 10
+    assert engine.phase_cheated == [False] * len(engine.phase_cheated)
+
+
+def test_update_phases_restarts_the_current_phase(engine, clock):
+    engine.start_task("Write report")
+    clock.advance(4)
+    engine.tick()
+
+    engine.update_phases([PhaseSettings("Work", 1, 0)])
+    assert engine.seconds == 60
+    assert engine.remaining() == pytest.approx(60)
+
+    idle = TimerEngine(clock=clock)
+    idle.update_phases([PhaseSettings("Work", 1, 0)])
+    assert idle.seconds == 0
+    assert idle.is_blinking and idle.initial_state
+
+
+@pytest.fixture
+def three_phases(clock):
+    return TimerEngine([PhaseSettings("A", 0, 10), PhaseSettings("B", 0, 10), PhaseSettings("C", 0, 10)],
+                       clock=clock)
+
+
+def test_advance_phase_records_every_finished_phase(three_phases, clock):
+    # Remote next/complete have no notes window to record the phases for them
+    engine = three_phases
+    engine.start_task("Remote")
+    for _ in range(2):
+        clock.advance(engine.remaining())
+        engine.advance_phase()
+    clock.advance(engine.remaining())
+    entry = engine.finish_task()
+
+    assert entry['phases'] == [
+        {'name': "A", 'status': 'Finished', 'cheated': False},
+        {'name': "B", 'status': 'Finished', 'cheated': False},
+        {'name': "C", 'status': 'Finished', 'cheated': False}
+    ]
+    assert entry['status'] == 'Completed Clean'
+
+
+def test_advance_phase_records_a_skip_at_its_own_phase(three_phases, clock):
+    engine = three_phases
+    engine.start_task("Remote")
+    clock.advance(engine.remaining())
+    engine.advance_phase()
+    clock.advance(3)
+    engine.advance_phase()
+    clock.advance(engine.remaining())
+    entry = engine.finish_task()
+
+    assert [(phase['name'], phase['cheated']) for phase in entry['phases']] == [
+        ("A", False), ("B", True), ("C", False)
+    ]
+    assert entry['status'] == 'Completed with Cheating'
@@ -0,0 +1,109 @@
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+from wakeup_scheduler import COALESCE_WINDOW_MS, TICK_QUANTUM_MS, WakeupScheduler
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(app, clock):
+    return WakeupScheduler(clock=clock)
+
+
+def wake_at(scheduler, clock, when):
+    # Stands in for the QTimer firing at when
+    clock.now = when
+    scheduler._on_timeout()
+
+
+def test_idle_scheduler_stops_its_timer(scheduler):
+    assert not scheduler._timer.isActive()
+    scheduler.call_later('once', 1000, lambda: None)
+    assert scheduler._timer.isActive()
+    scheduler.cancel('once')
+    assert not scheduler._timer.isActive()
+    assert scheduler.stats()['active_jobs'] == []
+
+
+def test_periodic_jobs_share_the_grid(scheduler, clock):
+    runs = []
+    clock.now += 0.1
+    scheduler.add_periodic('blink', 500, lambda: runs.append('blink'))
+    scheduler.add_periodic('clock', 1000, lambda: runs.append('clock'))
+    # Periods are rounded up to the tick quantum
+    scheduler.add_periodic('odd', TICK_QUANTUM_MS + 1, lambda: runs.append('odd'))
+
+    epoch = scheduler.epoch
+    wake_at(scheduler, clock, epoch + 0.5)
+    assert runs == ['blink', 'odd']
+    runs.clear()
+    wake_at(scheduler, clock, epoch + 1.0)
+    assert sorted(runs) == ['blink', 'clock', 'odd']
+    assert scheduler.wakeups == 2
+
+
+def test_missed_periodic_runs_are_skipped(scheduler, clock):
+    runs = []
+    scheduler.add_periodic('tick', 1000, lambda: runs.append(clock.now))
+    wake_at(scheduler, clock, scheduler.epoch + 5.2)
+    assert len(runs) == 1
+    assert scheduler._jobs['tick']['due'] == pytest.approx(scheduler.epoch + 6.0)
+
+
+def test_call_later_joins_a_nearby_wakeup(scheduler, clock):
+    scheduler.call_at('exact', clock.now + 1.0, lambda: None)
+    scheduler.call_later('nearby', 1000 - COALESCE_WINDOW_MS / 2, lambda: None)
+    scheduler.call_later('far', 1000 + 2 * COALESCE_WINDOW_MS, lambda: None)
+
+    assert scheduler._jobs['nearby']['due'] == scheduler._jobs['exact']['due']
+    assert scheduler._jobs['far']['due'] > scheduler._jobs['exact']['due']
+
+
+def test_exact_calls_never_run_early(scheduler, clock):
+    runs = []
+    start = clock.now
+    scheduler.call_at('exact', start + 1.0, lambda: runs.append('exact'))
+    scheduler.call_later('loose', 990, lambda: runs.append('loose'))
+
+    wake_at(scheduler, clock, start + 0.99)
+    assert runs == ['loose']
+    wake_at(scheduler, clock, start + 1.0)
+    assert runs == ['loose', 'exact']
+    assert scheduler.stats()['job_runs'] == {'loose': 1, 'exact': 1}
+
+
+def test_callbacks_may_cancel_and_replace_jobs(scheduler, clock):
+    runs = []
+
+    def first():
+        runs.append('first')
+        scheduler.cancel('second')
+        scheduler.call_later('first', 500, lambda: runs.append('replaced'))
+
+    scheduler.call_at('first', clock.now + 1.0, first)
+    scheduler.call_at('second', clock.now + 1.0, lambda: runs.append('second'))
+    wake_at(scheduler, clock, clock.now + 1.0)
+    assert runs == ['first']
+    assert scheduler.is_scheduled('first') and not scheduler.is_scheduled('second')
+
+    wake_at(scheduler, clock, clock.now + 0.5)
+    assert runs == ['first', 'replaced']
+    assert not scheduler._timer.isActive()
@@ -0,0 +1,395 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QColor, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from platform_handler import PlatformHandler
+
+DEFAULT_THEME = 'default'
+
+# Icons every theme provides, loaded from resources/icons/<icon_dir>/<name>_300.png
+ICON_NAMES = ('notes', 'settings', 'close')
+
+# Dialogs styled by the app-level stylesheet; each sets this object name on itself
+THEMED_DIALOGS = ('settingsWindow', 'notesWindow', 'taskNameDialog')
+
+THEMES = {
+    'default': {
+        'label': "Default",
+        'icon_dir': "",
+        'timer_gradient': ((0, 255, 255), (255, 0, 255)),
+        'icon_gradient': ((255, 0, 255), (0, 255, 255)),
+        'colors': {
+            'window': "rgb(40, 40, 40)",
+            'panel': "rgb(45, 45, 45)",
+            'list': "rgb(50, 50, 50)",
+            'input': "rgb(55, 55, 55)",
+            'input_focus': "rgb(60, 60, 60)",
+            'button': "rgb(55, 55, 55)",
+            'button_hover': "rgb(65, 65, 65)",
+            'button_pressed': "rgb(50, 50, 50)",
+            'disabled': "rgb(45, 45, 45)",
+            'disabled_text': "rgb(130, 130, 130)",
+            'text': "rgb(240, 240, 240)",
+            'button_text': "white",
+            'selection': "rgb(70, 130, 180)",
+            'list_selection': "rgb(60, 60, 60)",
+            'separator': "rgb(70, 70, 70)",
+            'accent_start': "rgb(0, 255, 255)",
+            'accent_end': "rgb(255, 0, 255)",
+            'next_start': "rgb(0, 150, 200)",
+            'next_end': "rgb(120, 0, 170)",
+            'next_hover_start': "rgb(0, 170, 220)",
+            'next_hover_end': "rgb(140, 0, 190)",
+            'positive': "rgb(40, 120, 40)",
+            'positive_hover': "rgb(45, 135, 45)",
+            'positive_pressed': "rgb(35, 105, 35)",
+            'primary': "rgb(60, 105, 160)",
+            'primary_hover': "rgb(65, 115, 175)"
+        }
+    },
+    'light': {
+        'label': "Light",
+        'icon_dir': "light",
+        'timer_gradient': ((0, 120, 215), (140, 60, 220)),
+        'icon_gradient': ((140, 60, 220), (0, 120, 215)),
+        'colors': {
+            'window': "rgb(245, 245, 245)",
+            'panel': "rgb(232, 232, 232)",
+            'list': "rgb(255, 255, 255)",
+            'input': "rgb(255, 255, 255)",
+            'input_focus': "rgb(250, 250, 250)",
+            'button': "rgb(225, 225, 225)",
+            'button_hover': "rgb(212, 212, 212)",
+            'button_pressed': "rgb(200, 200, 200)",
+            'disabled': "rgb(235, 235, 235)",
+            'disabled_text': "rgb(160, 160, 160)",
+            'text': "rgb(30, 30, 30)",
+            'button_text': "rgb(30, 30, 30)",
+            'selection': "rgb(120, 170, 220)",
+            'list_selection': "rgb(220, 230, 245)",
+            'separator': "rgb(220, 220, 220)",
+            'accent_start': "rgb(0, 120, 215)",
+            'accent_end': "rgb(140, 60, 220)",
+            'next_start': "rgb(0, 120, 215)",
+            'next_end': "rgb(140, 60, 220)",
+            'next_hover_start': "rgb(20, 135, 230)",
+            'next_hover_end': "rgb(155, 80, 235)",
+            'positive': "rgb(70, 160, 70)",
+            'positive_hover': "rgb(80, 175, 80)",
+            'positive_pressed': "rgb(60, 145, 60)",
+            'primary': "rgb(80, 130, 200)",
+            'primary_hover': "rgb(95, 145, 215)"
+        }
+    },
+    'minimal': {
+        'label': "Minimal",
+        'icon_dir': "minimal",
+        'timer_gradient': ((235, 235, 235), (160, 160, 160)),
+        'icon_gradient': ((160, 160, 160), (235, 235, 235)),
+        'colors': {
+            'window': "rgb(24, 24, 24)",
+            'panel': "rgb(30, 30, 30)",
+            'list': "rgb(30, 30, 30)",
+            'input': "rgb(36, 36, 36)",
+            'input_focus': "rgb(42, 42, 42)",
+            'button': "rgb(36, 36, 36)",
+            'button_hover': "rgb(46, 46, 46)",
+            'button_pressed': "rgb(30, 30, 30)",
+            'disabled': "rgb(28, 28, 28)",
+            'disabled_text': "rgb(100, 100, 100)",
+            'text': "rgb(220, 220, 220)",
+            'button_text': "rgb(220, 220, 220)",
+            'selection': "rgb(90, 90, 90)",
+            'list_selection': "rgb(44, 44, 44)",
+            'separator': "rgb(44, 44, 44)",
+            'accent_start': "rgb(235, 235, 235)",
+            'accent_end': "rgb(160, 160, 160)",
+            'next_start': "rgb(70, 70, 70)",
+            'next_end': "rgb(70, 70, 70)",
+            'next_hover_start': "rgb(85, 85, 85)",
+            'next_hover_end': "rgb(85, 85, 85)",
+            'positive': "rgb(60, 60, 60)",
+            'positive_hover': "rgb(75, 75, 75)",
+            'positive_pressed': "rgb(50, 50, 50)",
+            'primary': "rgb(60, 60, 60)",
+            'primary_hover': "rgb(75, 75, 75)"
+        }
+    },
+    'neon': {
+        'label': "Neon",
+        'icon_dir': "neon",
+        'timer_gradient': ((57, 255, 20), (255, 0, 200)),
+        'icon_gradient': ((255, 0, 200), (57, 255, 20)),
+        'colors': {
+            'window': "rgb(12, 10, 24)",
+            'panel': "rgb(20, 16, 38)",
+            'list': "rgb(20, 16, 38)",
+            'input': "rgb(28, 22, 52)",
+            'input_focus': "rgb(36, 28, 66)",
+            'button': "rgb(28, 22, 52)",
+            'button_hover': "rgb(40, 30, 74)",
+            'button_pressed': "rgb(22, 18, 42)",
+            'disabled': "rgb(20, 16, 38)",
+            'disabled_text': "rgb(100, 90, 130)",
+            'text': "rgb(230, 255, 240)",
+            'button_text': "rgb(230, 255, 240)",
+            'selection': "rgb(255, 0, 200)",
+            'list_selection': "rgb(45, 30, 80)",
+            'separator': "rgb(45, 30, 80)",
+            'accent_start': "rgb(57, 255, 20)",
+            'accent_end': "rgb(255, 0, 200)",
+            'next_start': "rgb(0, 200, 255)",
+            'next_end': "rgb(255, 0, 200)",
+            'next_hover_start': "rgb(40, 220, 255)",
+            'next_hover_end': "rgb(255, 60, 220)",
+            'positive': "rgb(30, 150, 20)",
+            'positive_hover': "rgb(40, 175, 30)",
+            'positive_pressed': "rgb(25, 130, 15)",
+            'primary': "rgb(110, 0, 200)",
+            'primary_hover': "rgb(130, 20, 220)"
+        }
+    }
+}
+
+# (selectors, declarations) shared by all themed dialogs. Selectors are scoped to
+# each dialog's object name when compiled; an empty selector is the dialog itself.
+DIALOG_RULES = [
+    ("", """
+        background-color: transparent;
+    """),
+    ("QFrame#settingsContainer, QFrame#notesContainer, QFrame#mainContainer", """
+        background-color: {window};
+        border-radius: 15px;
+        border: none;
+    """),
+    ("QScrollArea, QWidget#qt_scrollarea_viewport, QWidget#settingsContent", """
+        background-color: transparent;
+        border: none;
+    """),
+    ("QLabel", """
+        color: {text};
+        background-color: transparent;
+        border: none;
+    """),
+    ("QLineEdit, QComboBox, QSpinBox", """
+        background-color: {input};
+        color: {button_text};
+        border-radius: 8px;
+        padding: 6px 10px;
+        border: none;
+        selection-background-color: {selection};
+    """),
+    ("QLineEdit:focus, QComboBox:focus, QSpinBox:focus, QDateEdit:focus", """
+        background-color: {input_focus};
+    """),
+    ("QDateEdit", """
+        background-color: {input};
+        color: {button_text};
+        border-radius: 8px;
+        padding: 6px;
+        border: none;
+    """),
+    ("QPushButton", """
+        background-color: {button};
+        color: {button_text};
+        border-radius: 8px;
+        padding: 6px 12px;
+        border: none;
+    """),
+    ("QPushButton:hover", """
+        background-color: {button_hover};
+    """),
+    ("QPushButton:pressed", """
+        background-color: {button_pressed};
+    """),
+    ("QPushButton:disabled", """
+        background-color: {disabled};
+        color: {disabled_text};
+    """),
+    ("QPushButton#nextPhaseButton", """
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                                    stop:0 {next_start},
+                                    stop:1 {next_end});
+        color: {button_text};
+    """),
+    ("QPushButton#nextPhaseButton:hover", """
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                                    stop:0 {next_hover_start},
+                                    stop:1 {next_hover_end});
+    """),
+    ("QPushButton#completeTaskButton, QPushButton#startButton", """
+        background-color: {positive};
+        color: white;
+    """),
+    ("QPushButton#completeTaskButton:hover, QPushButton#startButton:hover", """
+        background-color: {positive_hover};
+    """),
+    ("QPushButton#startButton:pressed", """
+        background-color: {positive_pressed};
+    """),
+    ("QPushButton#newTaskButton", """
+        background-color: {primary};
+        color: white;
+    """),
+    ("QPushButton#newTaskButton:hover", """
+        background-color: {primary_hover};
+    """),
+    ("QListWidget, QListView#tasksList", """
+        background-color: {list};
+        border-radius: 8px;
+        color: {button_text};
+        padding: 8px;
+        border: none;
+        selection-background-color: {list_selection};
+    """),
+    ("QListWidget::item, QListView#tasksList::item", """
+        padding: 4px;
+        border-bottom: 1px solid {separator};
+    """),
+    ("QListWidget::item:selected, QListView#tasksList::item:selected", """
+        background-color: {list_selection};
+        color: {button_text};
+    """),
+    ("QScrollBar:vertical", """
+        background: {panel};
+        width: 10px;
+        margin: 0px;
+    """),
+    ("QScrollBar::handle:vertical", """
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                                    stop:0 {accent_start},
+                                    stop:1 {accent_end});
+        min-height: 20px;
+        border-radius: 5px;
+    """),
+    ("QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical", """
+        height: 0px;
+    """),
+    ("QSlider::groove:horizontal", """
+        height: 8px;
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                                    stop:0 {accent_start},
+                                    stop:1 {accent_end});
+        border-radius: 4px;
+    """),
+    ("QSlider::handle:horizontal", """
+        background: white;
+        border: none;
+        width: 16px;
+        height: 16px;
+        margin: -4px 0;
+        border-radius: 8px;
+    """),
+    ("QComboBox::drop-down", """
+        border: none;
+        width: 20px;
+    """),
+    ("QComboBox::down-arrow", """
+        width: 12px;
+        height: 12px;
+    """),
+    ("QComboBox QAbstractItemView", """
+        background-color: {list};
+        border: none;
+        selection-background-color: {selection};
+        color: {button_text};
+    """),
+    ("QFrame#phaseFrame", """
+        background-color: {panel};
+        border-radius: 10px;
+        border: none;
+    """)
+]
+
+# Compiled stylesheets and loaded icons, shared by every ThemeManager
+_stylesheet_cache = {}
+_icon_cache = {}
+
+
+def compile_stylesheet(theme_name):
+    """Build the app-level stylesheet of a theme, scoping every rule to the themed dialogs"""
+    stylesheet = _stylesheet_cache.get(theme_name)
+    if stylesheet is not None:
+        return stylesheet
+
+    colors = THEMES[theme_name]['colors']
+    blocks = []
+    for selectors, declarations in DIALOG_RULES:
+        scoped = []
+        for dialog in THEMED_DIALOGS:
+            for selector in selectors.split(','):
+                selector = selector.strip()
+                scoped.append(f"QDialog#{dialog} {selector}" if selector else f"QDialog#{dialog}")
+        body = "\n".join(line.strip() for line in declarations.strip().splitlines())
+        blocks.append(f"{', '.join(scoped)} {{\n{body.format(**colors)}\n}}")
+
+    stylesheet = "\n".join(blocks)
+    _stylesheet_cache[theme_name] = stylesheet
+    return stylesheet
+
+
+def load_icons(theme_name):
+    """Load a theme's icons once; falls back to the default icon for any that are missing
+
+    Returns:
+        dict: Icon name -> (path, QPixmap)
+    """
+    icons = _icon_cache.get(theme_name)
+    if icons is not None:
+        return icons
+
+    icon_dir = THEMES[theme_name]['icon_dir']
+    icons = {}
+    for name in ICON_NAMES:
+        path = PlatformHandler.resource_path(f"icons/{icon_dir}/{name}_300.png" if icon_dir
+                                             else f"icons/{name}_300.png")
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            path = PlatformHandler.resource_path(f"icons/{name}_300.png")
+            pixmap = QPixmap(path)
+        icons[name] = (path, pixmap)
+
+    _icon_cache[theme_name] = icons
+    return icons
+
+
+class ThemeManager(QObject):
+    """Applies a theme to the whole application
+
+    The stylesheet and icons of a theme are built once and cached, so
+    switching back and forth between themes never re-reads files or
+    rebuilds widgets: the app-level stylesheet is swapped and listeners
+    of themeChanged update their icons and gradient colors.
+    """
+    themeChanged = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.theme_name = None
+
+    @staticmethod
+    def available_themes():
+        return [(name, theme['label']) for name, theme in THEMES.items()]
+
+    def apply_theme(self, theme_name):
+        if theme_name not in THEMES:
+            print(f"Unknown theme: {theme_name}, using {DEFAULT_THEME}")
+            theme_name = DEFAULT_THEME
+        if theme_name == self.theme_name:
+            return
+
+        self.theme_name = theme_name
+        QApplication.instance().setStyleSheet(compile_stylesheet(theme_name))
+        self.themeChanged.emit(theme_name)
+
+    def icon(self, name):
+        """(path, QPixmap) of one of the current theme's icons"""
+        return load_icons(self.theme_name or DEFAULT_THEME)[name]
+
+    def timer_gradient(self):
+        start, end = THEMES[self.theme_name or DEFAULT_THEME]['timer_gradient']
+        return QColor(*start), QColor(*end)
+
+    def icon_gradient(self):
+        start, end = THEMES[self.theme_name or DEFAULT_THEME]['icon_gradient']
+        return QColor(*start), QColor(*end)
@@ -0,0 +1,312 @@
+import math
+import time
+
+# Phases are capped by the settings window
+MAX_PHASES = 5
+
+
+class PhaseSettings:
+    def __init__(self, name="Phase", minutes=30, seconds=0):
+        self.name = name
+        self.minutes = minutes
+        self.seconds = seconds
+
+    def get_total_seconds(self):
+        return self.minutes * 60 + self.seconds
+
+    def copy(self):
+        return PhaseSettings(self.name, self.minutes, self.seconds)
+
+
+def phases_from_settings(settings):
+    """Build PhaseSettings from the 'phases' list of a loaded settings dict"""
+    phase_data = settings.get('phases', [])
+    if not phase_data:
+        # Default single phase if no phases found
+        return [PhaseSettings()]
+    return [
+        PhaseSettings(
+            name=phase_dict.get('name', 'Phase'),
+            minutes=phase_dict.get('minutes', 30),
+            seconds=phase_dict.get('seconds', 0)
+        )
+        for phase_dict in phase_data
+    ]
+
+
+class TimerEngine:
+    """Qt-free state machine behind the timer window
+
+    Owns phase progression, the countdown deadline, blinking state, cheat
+    detection and the history entry built when a task completes. Time comes
+    from an injectable clock, so the engine can be driven by tests, scripts
+    and simulations without a display.
+
+    Views subscribe with add_listener() to these events:
+        'time_changed' ()               seconds was updated
+        'countdown_started' (remaining) a countdown started
+        'countdown_stopped' ()          the running countdown was cancelled
+        'blinking_started' (initial)    green (initial) or red (phase done) blinking began
+        'blinking_stopped' ()           blinking ended
+        'task_started' (task_name)      a new task became active
+        'task_completed' (task_entry)   a task finished; task_entry is ready to save
+    """
+
+    def __init__(self, phases=None, clock=time.monotonic):
+        self.clock = clock
+        self.phases = phases if phases else [PhaseSettings()]
+
+        self.current_phase_index = 0
+        self.phase_history = []
+        self.phase_cheated = [False] * MAX_PHASES
+
+        self.task_active = False
+        self.current_task_name = ""
+
+        self.is_blinking = False
+        self.initial_state = False
+
+        # Whole seconds left as shown to the user, derived from the deadline
+        self.seconds = 0
+        self.deadline = None
+
+        self._listeners = {}
+
+    def add_listener(self, event, callback):
+        self._listeners.setdefault(event, []).append(callback)
+
+    def _emit(self, event, *args):
+        for callback in self._listeners.get(event, []):
+            callback(*args)
+
+    def current_phase(self):
+        if self.current_phase_index < len(self.phases):
+            return self.phases[self.current_phase_index]
+        return None
+
+    def is_last_phase(self):
+        return self.current_phase_index == len(self.phases) - 1
+
+    def set_phases(self, phases):
+        # Replace the phase list without touching the running state
+        self.phases = phases
+
+    def update_phases(self, phases):
+        """Apply new phase settings to the running timer"""
+        self.phases = phases
+
+        # Reset the timer for the current phase - this respects task_active state
+        self.reset_timer_for_current_phase()
+
+        # Only start the timer if a task is active, otherwise go back to blinking state
+        if self.task_active:
+            self.start_countdown()
+        else:
+            self.start_blinking(initial=True)
+
+    def reset_timer_for_current_phase(self):
+        if not self.task_active:
+            # No active task, always show 00:00
+            self.seconds = 0
+        elif self.current_phase_index < len(self.phases):
+            # Active task, set timer to phase duration
+            self.seconds = self.phases[self.current_phase_index].get_total_seconds()
+
+        self._emit('time_changed')
+
+    def start_countdown(self):
+        # Count down self.seconds from now
+        self.deadline = self.clock() + self.seconds
+        self._emit('countdown_started', self.seconds)
+
+    def remaining(self):
+        """Seconds left in the running countdown, or None when it isn't running"""
+        if self.deadline is None:
+            return None
+        return self.deadline - self.clock()
+
+    def tick(self):
+        """Bring seconds up to date with the clock
+
+        Returns:
+            float: Seconds remaining, or None if no countdown is running
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+
+        seconds = max(0, math.ceil(remaining))
+        if seconds != self.seconds:
+            self.seconds = seconds
+            self._emit('time_changed')
+
+        if remaining <= 0:
+            # Timer reached zero
+            self.deadline = None
+            if not self.is_blinking:
+                self.start_blinking()
+        return remaining
+
+    def start_blinking(self, initial=False):
+        self.is_blinking = True
+        self.initial_state = initial
+
+        if initial and not self.task_active:
+            self.seconds = 0
+            self._emit('time_changed')
+
+        self._emit('blinking_started', initial)
+
+        if self.deadline is not None:
+            self.deadline = None
+            self._emit('countdown_stopped')
+
+    def stop_blinking(self):
+        if self.is_blinking:
+            self.is_blinking = False
+            self.initial_state = False
+            self._emit('blinking_stopped')
+
+    def open_notes(self):
+        """Record the user opening the notes window
+
+        Opening the notes while the phase is still running marks it as cheated.
+
+        Returns:
+            bool: True if the current phase's timer had completed
+        """
+        # Catch up with the deadline in case a tick is still pending
+        self.tick()
+
+        timer_completed = False
+        if self.is_blinking:
+            self.stop_blinking()
+            timer_completed = True
+
+            phase = self.current_phase()
+            if phase is not None:
+                phase_entry = {
+                    'name': phase.name,
+                    'status': 'Finished',
+                    'cheated': self.phase_cheated[self.current_phase_index]
+                }
+
+                # Add to history if not already there
+                if len(self.phase_history) <= self.current_phase_index:
+                    self.phase_history.append(phase_entry)
+                else:
+                    self.phase_history[self.current_phase_index] = phase_entry
+        else:
+            # Phase timer not completed yet - this is considered cheating
+            if self.current_phase_index < len(self.phases) and self.seconds > 0:
+                self.phase_cheated[self.current_phase_index] = True
+
+        return timer_completed
+
+    def advance_phase(self):
+        """Move to the next phase the way the notes window's Next button does
+
+        The GUI always opens the notes window first, which is what records a
+        finished phase in phase_history. Callers without that window, such as
+        remote commands, use this so their history matches the GUI's.
+        """
+        self.open_notes()
+        self.next_phase()
+
+    def finish_task(self):
+        """Complete the task the way the notes window's Complete button does
+
+        Returns:
+            dict: The task entry to be saved to history; see complete_task()
+        """
+        self.open_notes()
+        return self.complete_task()
+
+    def start_task(self, task_name):
+        self.current_task_name = task_name
+        self.task_active = True
+
+        self.phase_history = []
+        self.current_phase_index = 0
+        self.phase_cheated = [False] * MAX_PHASES
+
+        # Stop blinking and start the timer
+        self.stop_blinking()
+        self.reset_timer_for_current_phase()
+        self.start_countdown()
+
+        self._emit('task_started', task_name)
+
+    def complete_task(self):
+        """Finish the active task and start blinking green for the next one
+
+        Returns:
+            dict: The task entry to be saved to history
+        """
+        phase = self.current_phase()
+        if not self.phase_history and phase is not None:
+            # Create an entry for the current phase
+            self.phase_history.append({
+                'name': phase.name,
+                'status': 'Finished',
+                'cheated': False  # Completing via Complete Task button is NOT cheating
+            })
+
+        task_was_cheated = any(
+            phase.get('cheated', False)
+            for phase in self.phase_history
+        )
+
+        task_entry = {
+            'phases': self.phase_history,
+            'status': 'Completed with Cheating' if task_was_cheated else 'Completed Clean',
+            'task_name': self.current_task_name
+        }
+
+        # Reset for a new task
+        self.current_phase_index = 0
+        self.phase_history = []
+        self.phase_cheated = [False] * MAX_PHASES
+
+        self.task_active = False
+        self.current_task_name = ""
+
+        # Reset timer and start blinking green for new task
+        self.reset_timer_for_current_phase()
+        self.start_blinking(initial=True)
+
+        self._emit('task_completed', task_entry)
+        return task_entry
+
+    def next_phase(self):
+        # If timer is still running, mark this as cheating
+        if not self.is_blinking and self.seconds > 0:
+            # The user moved on before the timer reached 00:00
+            self.phase_cheated[self.current_phase_index] = True
+
+            # If we don't have an entry for this phase yet, create one
+            if len(self.phase_history) <= self.current_phase_index:
+                phase = self.phases[self.current_phase_index]
+                self.phase_history.append({
+                    'name': phase.name,
+                    'status': 'Finished',
+                    'cheated': True
+                })
+            else:
+                self.phase_history[self.current_phase_index]['cheated'] = True
+
+        self.current_phase_index += 1
+
+        # Check if we've completed all phases
+        if self.current_phase_index >= len(self.phases):
+            # Reset to first phase and the cheated status for a new cycle
+            self.current_phase_index = 0
+            self.phase_cheated = [False] * MAX_PHASES
+
+        # Reset the timer for the new phase and start it again
+        self.reset_timer_for_current_phase()
+        self.start_countdown()
+
+        # Stop blinking if it was blinking
+        if self.is_blinking:
+            self.stop_blinking()
@@ -1,15 +1,24 @@
+import math
+import os
+
 from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QHBoxLayout
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QEvent
 from PyQt5.QtGui import QFont, QFontDatabase, QColor
 
-from settings_window import SettingsWindow, PhaseSettings
-from notes_window import NotesWindow
+import startup_trace
 from settings_manager import SettingsManager
-from history_manager import HistoryManager
-from task_name_dialog import TaskNameDialog
+from history_manager import create_history_manager
+from history_repair import OK_STATUS
 from gradient_icon_button import GradientIconButton
 from gradient_label import GradientLabel
 from platform_handler import PlatformHandler
+from io_worker import IOWorker
+from timer_engine import TimerEngine, phases_from_settings
+from wakeup_scheduler import WakeupScheduler
+from theme_manager import ThemeManager, DEFAULT_THEME
+
+# Delay before the background check of the history files, so it stays off the startup path
+INTEGRITY_SCAN_DELAY_MS = 60 * 1000
 
 class TimerWindow(QMainWindow):
     def __init__(self):
@@ -19,35 +28,58 @@ class TimerWindow(QMainWindow):
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
 
-        # Initialize settings manager and history manager
+        # Initialize settings manager
         self.settings_manager = SettingsManager()
-        self.history_manager = HistoryManager()
-    
-        # Load saved settings
-        self.load_saved_settings()
 
+        # Timer state lives in the engine; this window only presents it
+        self.engine = TimerEngine()
+    
         # Load saved settings
         self.load_saved_settings()
-        
-        # Initialize timer variable (but don't start the timer yet)
-        self.seconds = 0  # Will be set properly later
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_time)
-
-        self.phase_cheated = [False] * 5
-
-        # Add variable to track if task is active
-        self.task_active = False
-        self.current_task_name = ""
+        startup_trace.mark('settings')
+
+        # Initialize history manager with the configured storage backend
+        self.history_manager = create_history_manager(self.history_backend)
+
+        # History and settings writes happen on a background thread
+        self.io_worker = IOWorker(self)
+        self.io_worker.historySaved.connect(self.on_history_saved)
+        self.io_worker.historyScanned.connect(self.on_history_scanned)
+        self.io_worker.start()
+        # Make sure queued writes reach the disk however the app exits
+        QApplication.instance().aboutToQuit.connect(self.io_worker.stop)
+        # Connected after the worker, so it runs once the last write is done
+        QApplication.instance().aboutToQuit.connect(self.history_manager.close)
+        # The worker flushes history whenever its queue drains, so saves can be batched
+        self.history_manager.group_commit = True
+        startup_trace.mark('storage')
+
+        # One scheduler runs all periodic work (display ticks, blinking, button hiding)
+        # so the process wakes up as rarely as possible
+        self.scheduler = WakeupScheduler(self)
+        if os.environ.get('MBM_WAKEUP_STATS'):
+            QApplication.instance().aboutToQuit.connect(self.report_wakeups)
+        
+        # Check the history files once the app has settled, off the GUI thread
+        self.scheduler.call_later('integrity_scan', INTEGRITY_SCAN_DELAY_MS,
+                                  lambda: self.io_worker.scan_history(self.history_manager, repair=True))
+        
+        # Dialogs are built the first time they are opened, then reused
+        self.notes_dialog = None
+        self.settings_dialog = None
+        
+        # Whether the timer can currently be seen; rendering stops while it can't
+        self.display_visible = False
         
         # Initialize blinking variables for phase completion and initial state
-        self.is_blinking = True  # Start in blinking state
-        self.blink_timer = QTimer(self)
-        self.blink_timer.timeout.connect(self.toggle_blink_state)
         self.blink_state = False
-        self.original_colors = (QColor(0, 255, 255), QColor(255, 0, 255))  # Store original gradient colors
-        # Store original gradient colors for all components
-        self.initial_state = True  # Track if this is initial app start
+        
+        # The theme sets the app-level stylesheet, the icons and the gradient colors
+        self.theme_manager = ThemeManager(self)
+        self.theme_manager.apply_theme(self.theme)
+        # An unknown name from the settings file falls back to the default; remember that one
+        self.theme = self.theme_manager.theme_name
+        self.original_colors = self.theme_manager.timer_gradient()  # Store original gradient colors
         
         # Create central widget
         central_widget = QWidget()
@@ -59,7 +91,8 @@ class TimerWindow(QMainWindow):
         
         # Load font
         try:
-            font_id = QFontDatabase.addApplicationFont("resources/fonts/RobotoCondensed-Bold.ttf")
+            font_id = QFontDatabase.addApplicationFont(
+                PlatformHandler.resource_path("fonts/RobotoCondensed-Bold.ttf"))
             if font_id != -1:
                 font_family = QFontDatabase.applicationFontFamilies(font_id)[0]
                 custom_font = QFont(font_family, 50)
@@ -67,6 +100,7 @@ class TimerWindow(QMainWindow):
                 custom_font = QFont("Arial", 50, QFont.Bold)
         except:
             custom_font = QFont("Arial", 50, QFont.Bold)
+        startup_trace.mark('font')
         
         # Create gradient label for the timer (with an empty initial value)
         self.time_label = GradientLabel("")
@@ -77,18 +111,20 @@ class TimerWindow(QMainWindow):
         buttons_layout.setSpacing(10)  # Space between buttons
         
         # Create three gradient icon buttons
-        self.note_button = GradientIconButton("resources/icons/notes_300.png")
-        self.settings_button = GradientIconButton("resources/icons/settings_300.png")
-        self.close_app_button = GradientIconButton("resources/icons/close_300.png")
+        self.note_button, self.settings_button, self.close_app_button = [
+            GradientIconButton(icon_path, pixmap=pixmap)
+            for icon_path, pixmap in map(self.theme_manager.icon, ('notes', 'settings', 'close'))
+        ]
         
         # Make them square-shaped
         button_size = 40
         for button in [self.note_button, self.settings_button, self.close_app_button]:
             button.setFixedSize(button_size, button_size)
+            button.setGradientColors(*self.theme_manager.icon_gradient())
             button.setIconScale(0.125)  # Scale icon to 40% of original size
         
         # Connect the buttons
-        self.close_app_button.clicked.connect(QApplication.quit)
+        self.close_app_button.clicked.connect(self.quit_app)
         self.settings_button.clicked.connect(self.open_settings)
         self.note_button.clicked.connect(self.open_notes)
         
@@ -118,33 +154,92 @@ class TimerWindow(QMainWindow):
         # Now apply the initial scale from loaded settings
         self.apply_initial_scale()
 
+        # Follow the engine's state changes
+        self.engine.add_listener('time_changed', self.update_time_display)
+        self.engine.add_listener('countdown_started', self.schedule_next_tick)
+        self.engine.add_listener('countdown_stopped', self.cancel_next_tick)
+        self.engine.add_listener('blinking_started', self.on_blinking_started)
+        self.engine.add_listener('blinking_stopped', self.on_blinking_stopped)
+        self.engine.add_listener('task_started', self.on_task_started)
+        self.engine.add_listener('task_completed', self.on_task_completed)
+        
+        # Restyle in place when the theme changes
+        self.theme_manager.themeChanged.connect(self.on_theme_changed)
+
          # Update time display to show 00:00
         self.update_time_display()
 
         # Start in blinking green state
-        self.start_blinking(initial=True)
-        
-        # Start the timer
-        self.timer.start(1000)  # Update every second
+        self.engine.start_blinking(initial=True)
         
         # Variable to track if buttons are visible
         self.buttons_visible = True
         
-        # Create a timer for hiding buttons
-        self.hide_buttons_timer = QTimer(self)
-        self.hide_buttons_timer.timeout.connect(self.hide_buttons)
-        self.hide_buttons_timer.setSingleShot(True)  # Run only once when started
-        
         # Hide buttons after 5 seconds initially
         self.show_buttons_temporarily()
         
-        # Set up platform-specific topmost behavior
-        self.topmost_timer = QTimer(self)
-        self.topmost_timer.timeout.connect(self.ensure_topmost)
-        self.topmost_timer.start(500)  # Check every 500ms
+        # Topmost is re-asserted on window events (activation, state, show, screen).
+        # Only platforms that need it get a slow safety-net timer on top of that.
+        self.topmost_checks = 0
+        if PlatformHandler.needs_topmost_fallback():
+            self.scheduler.add_periodic('topmost', PlatformHandler.TOPMOST_FALLBACK_INTERVAL_MS,
+                                        self.ensure_topmost)
     
     def ensure_topmost(self):
+        # Counted so the number of topmost wakeups can be checked
+        self.topmost_checks += 1
         PlatformHandler.ensure_window_topmost(self)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        # Another window may have been raised over us
+        if event.type() in (QEvent.ActivationChange, QEvent.WindowStateChange):
+            self.ensure_topmost()
+        if event.type() == QEvent.WindowStateChange:
+            self.refresh_visibility()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_visibility()
+
+    def eventFilter(self, watched, event):
+        # The native window reports being covered or uncovered through expose events
+        if watched is self.windowHandle() and event.type() == QEvent.Expose:
+            self.refresh_visibility()
+        return super().eventFilter(watched, event)
+
+    def is_display_visible(self):
+        window_handle = self.windowHandle()
+        return (self.isVisible() and not self.isMinimized()
+                and window_handle is not None and window_handle.isExposed())
+
+    def refresh_visibility(self):
+        visible = self.is_display_visible()
+        if visible == self.display_visible:
+            return
+        self.display_visible = visible
+        
+        if visible:
+            # Catch up from the deadline and resume per-second ticks and blinking
+            self.update_time()
+            if self.engine.is_blinking:
+                self.on_blinking_started(self.engine.initial_state)
+        else:
+            # Nothing can be seen: stop blinking and only wake up when the phase ends
+            self.scheduler.cancel('blink')
+            if self.engine.deadline is not None:
+                self.scheduler.call_at('countdown', self.engine.deadline, self.update_time)
+
+    def report_wakeups(self):
+        stats = self.scheduler.stats()
+        print(f"Wakeups: {stats['wakeups']} in {stats['uptime']:.1f}s")
+        for name, runs in sorted(stats['job_runs'].items()):
+            print(f"  {name}: {runs}")
+
+    def quit_app(self):
+        # Flush pending history and settings writes before quitting
+        self.io_worker.stop()
+        QApplication.quit()
     
     def update_gradient_colors(self, start_color, end_color):
         # Update the timer label gradient
@@ -177,16 +272,48 @@ class TimerWindow(QMainWindow):
         super().showEvent(event)
         # Ensure topmost when first shown
         self.ensure_topmost()
+        
+        # Moving to another screen can drop the window's z-order
+        window_handle = self.windowHandle()
+        if window_handle is not None and not getattr(self, 'screen_change_connected', False):
+            window_handle.screenChanged.connect(self.on_screen_changed)
+            window_handle.installEventFilter(self)
+            self.screen_change_connected = True
+        
+        self.refresh_visibility()
+
+    def on_screen_changed(self, screen):
+        self.ensure_topmost()
+        
+        # Icons are rendered for one device pixel ratio; redo them for the new screen
+        for button in [self.note_button, self.settings_button, self.close_app_button]:
+            button.update_gradient_icon()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if startup_trace.ENABLED and not getattr(self, 'first_paint_done', False):
+            self.first_paint_done = True
+            startup_trace.mark('first paint')
+            startup_trace.report()
 
     def open_settings(self):
         # Calculate current scale based on font size compared to default
         current_scale = self.time_label.font().pointSize() / 50
         
-        # Create and show settings window with current phases
-        self.settings_dialog = SettingsWindow(self, current_scale, self.phases)
-        
-        # Connect the settings changed signal
-        self.settings_dialog.settingsChanged.connect(self.apply_settings_changes)
+        # The dialog is built on first use and reused afterwards
+        if self.settings_dialog is None:
+            from settings_window import SettingsWindow
+            self.settings_dialog = SettingsWindow(self, current_scale, self.engine.phases, self.theme)
+            
+            # Connect the settings changed signal
+            self.settings_dialog.settingsChanged.connect(self.apply_settings_changes)
+        elif self.settings_dialog.isVisible():
+            # Already open: keep the edits in progress
+            self.settings_dialog.raise_()
+            self.settings_dialog.activateWindow()
+            return
+        else:
+            self.settings_dialog.refresh_state(current_scale, self.engine.phases, self.theme)
         
         # Show the dialog
         self.settings_dialog.show()
@@ -222,8 +349,8 @@ class TimerWindow(QMainWindow):
         # Show the buttons
         self.set_buttons_visibility(True)
         
-        # Start the timer to hide buttons after 5 seconds
-        self.hide_buttons_timer.start(5000)  # 5000 ms = 5 seconds
+        # Hide the buttons again after 5 seconds
+        self.scheduler.call_later('hide_buttons', 5000, self.hide_buttons)
 
     def hide_buttons(self):
         self.set_buttons_visibility(False)
@@ -235,39 +362,28 @@ class TimerWindow(QMainWindow):
         for button in [self.note_button, self.settings_button, self.close_app_button]:
             button.setVisible(visible)
 
-    def reset_timer_for_current_phase(self):
-        if self.current_phase_index < len(self.phases):
-            phase = self.phases[self.current_phase_index]
-            # Set timer to phase duration
-            self.seconds = phase.get_total_seconds()
-            
-            # Update the display
-            self.update_time_display()
+    def schedule_next_tick(self, remaining):
+        if not self.display_visible:
+            # Hidden: skip the per-second ticks but still catch the phase end on time
+            self.scheduler.call_at('countdown', self.engine.clock() + remaining, self.update_time)
+            return
+        
+        # Wake up right as the displayed second changes, so late ticks never accumulate
+        until_boundary = remaining - (math.ceil(remaining) - 1)
+        self.scheduler.call_at('countdown', self.engine.clock() + until_boundary, self.update_time)
 
-    def update_time(self):
-        if self.seconds > 0:
-            self.seconds -= 1
-            self.update_time_display()
-        else:
-            # Timer reached zero
-            if not self.is_blinking:
-                self.start_blinking()
+    def cancel_next_tick(self):
+        self.scheduler.cancel('countdown')
 
-    def update_time_display(self):
-        minutes = self.seconds // 60
-        seconds = self.seconds % 60
-        time_str = f"{minutes:02d}:{seconds:02d}"
-        self.time_label.setText(time_str)
-        
-        # Show the current phase name or break status
-        if self.current_phase_index < len(self.phases):
-            phase = self.phases[self.current_phase_index]
-            self.setWindowTitle(f"{phase.name}")
+    def update_time(self):
+        remaining = self.engine.tick()
+        if remaining is not None and remaining > 0:
+            self.schedule_next_tick(remaining)
 
     def toggle_blink_state(self):
         self.blink_state = not self.blink_state
         
-        if self.initial_state:  # Blinking green for new task
+        if self.engine.initial_state:  # Blinking green for new task
             if self.blink_state:
                 # Change to green color scheme
                 green_start = QColor(0, 200, 0)
@@ -290,109 +406,92 @@ class TimerWindow(QMainWindow):
                 self.time_label.setGradientColors(self.original_colors[0], self.original_colors[1])
                 self.note_button.setGradientColors(self.original_colors[0], self.original_colors[1])
 
-    def start_blinking(self, initial=False):
-        self.is_blinking = True
-        self.initial_state = initial
-        
-        if initial and not self.task_active:
-            self.seconds = 0
-            self.update_time_display()
-        
-        self.blink_timer.start(750)  # Blink every 0.75 seconds
+    def on_blinking_started(self, initial):
+        # Blinking resumes from refresh_visibility once the window can be seen
+        if self.display_visible:
+            self.scheduler.add_periodic('blink', 750, self.toggle_blink_state)  # Blink every 0.75 seconds
+
+    def on_theme_changed(self, theme_name):
+        self.original_colors = self.theme_manager.timer_gradient()
+        self.time_label.setGradientColors(*self.original_colors)
         
-        self.timer.stop()
+        icon_colors = self.theme_manager.icon_gradient()
+        for name, button in [('notes', self.note_button), ('settings', self.settings_button),
+                             ('close', self.close_app_button)]:
+            button.setIconPixmap(*self.theme_manager.icon(name))
+            button.setGradientColors(*icon_colors)
 
-    def stop_blinking(self):
-        if self.is_blinking:
-            self.is_blinking = False
-            self.blink_timer.stop()
-            self.initial_state = False
-            
-            # Restore original colors for all elements
-            self.time_label.setGradientColors(self.original_colors[0], self.original_colors[1])
-            self.note_button.setGradientColors(self.original_colors[0], self.original_colors[1])
+    def on_blinking_stopped(self):
+        self.scheduler.cancel('blink')
+        
+        # Restore original colors for all elements
+        self.time_label.setGradientColors(self.original_colors[0], self.original_colors[1])
+        self.note_button.setGradientColors(self.original_colors[0], self.original_colors[1])
 
     def open_notes(self):
-        timer_completed = False
-        if self.is_blinking:
-            self.stop_blinking()
-            timer_completed = True
-            
-            if self.current_phase_index < len(self.phases):
-                phase = self.phases[self.current_phase_index]
-                phase_entry = {
-                    'name': phase.name,
-                    'status': 'Finished',
-                    'cheated': self.phase_cheated[self.current_phase_index]
-                }
-                
-                # Add to history if not already there
-                if len(self.phase_history) <= self.current_phase_index:
-                    self.phase_history.append(phase_entry)
-                else:
-                    self.phase_history[self.current_phase_index] = phase_entry
-        else:
-            # Phase timer not completed yet - this is considered cheating
-            if self.current_phase_index < len(self.phases) and self.seconds > 0:
-                # Mark this phase as cheated
-                self.phase_cheated[self.current_phase_index] = True
+        timer_completed = self.engine.open_notes()
         
         # Show notes window
         self.show_notes_window(timer_completed)
 
-    def show_notes_window(self, timer_completed=False):
-        # Check if this is the last phase
-        is_last_phase = (self.current_phase_index == len(self.phases) - 1)
+    def notes_state(self, timer_completed=False):
+        """Arguments describing the timer state for NotesWindow and its refresh_state"""
+        engine = self.engine
         
         # Determine the correct blinking state
         if timer_completed:
             is_blinking = True  # Timer completed, should blink
             initial_state = False  # Not initial state (red blinking)
-        elif not self.task_active:
+        elif not engine.task_active:
             is_blinking = True  # No active task, should blink
             initial_state = True  # Initial state (green blinking)
         else:
-            is_blinking = self.is_blinking
-            initial_state = self.initial_state
-        
-        # Create and show notes window with explicit parameters
-        self.notes_dialog = NotesWindow(
-            parent=self, 
-            current_phase=self.current_phase_index,
-            is_last_phase=is_last_phase,
+            is_blinking = engine.is_blinking
+            initial_state = engine.initial_state
+        
+        state = dict(
+            current_phase=engine.current_phase_index,
+            is_last_phase=engine.is_last_phase(),
             timer_completed=timer_completed,
-            history_manager=self.history_manager,
-            task_active=self.task_active,
-            current_task_name=self.current_task_name,
+            task_active=engine.task_active,
+            current_task_name=engine.current_task_name,
             is_blinking=is_blinking,
             initial_state=initial_state
         )
-        
-        # Connect signals
-        self.notes_dialog.nextPhaseRequested.connect(self.go_to_next_phase)
-        self.notes_dialog.taskCompletedRequested.connect(self.complete_task)
-        self.notes_dialog.newTaskRequested.connect(self.start_new_task)
+        return state
+
+    def show_notes_window(self, timer_completed=False):
+        state = self.notes_state(timer_completed)
+        
+        # The dialog is built on first use and refreshed in place afterwards
+        if self.notes_dialog is None:
+            from notes_window import NotesWindow
+            self.notes_dialog = NotesWindow(
+                parent=self, 
+                history_manager=self.history_manager,
+                scheduler=self.scheduler,
+                **state
+            )
+            
+            # Connect signals
+            self.notes_dialog.nextPhaseRequested.connect(self.engine.next_phase)
+            self.notes_dialog.taskCompletedRequested.connect(self.complete_task)
+            self.notes_dialog.newTaskRequested.connect(self.start_new_task)
+        else:
+            self.notes_dialog.refresh_state(**state)
         
         self.notes_dialog.exec_()
 
     def start_new_task(self):
+        from task_name_dialog import TaskNameDialog
         self.task_name_dialog = TaskNameDialog(self)
         self.task_name_dialog.taskNameSubmitted.connect(self.initialize_task)
         self.task_name_dialog.show()
 
     def initialize_task(self, task_name):
-        self.current_task_name = task_name
-        self.task_active = True
-        
-        self.phase_history = []
-        self.current_phase_index = 0
-        self.phase_cheated = [False] * 5
-        
-        # Stop blinking and start the timer
-        self.stop_blinking()
-        self.reset_timer_for_current_phase()
-        self.timer.start(1000)
-        
+        self.engine.start_task(task_name)
+
+    def on_task_started(self, task_name):
         # Update window title to show task name
         self.setWindowTitle(f"{task_name} - Phase 1")
         
@@ -401,108 +500,105 @@ class TimerWindow(QMainWindow):
 
     def complete_task(self):
         try:
-            if not self.phase_history and self.current_phase_index < len(self.phases):
-                # Create an entry for the current phase
-                phase = self.phases[self.current_phase_index]
-                phase_entry = {
-                    'name': phase.name,
-                    'status': 'Finished',
-                    'cheated': False  # Completing via Complete Task button is NOT cheating
-                }
-                self.phase_history.append(phase_entry)
-            
-            task_was_cheated = any(
-                phase.get('cheated', False) 
-                for phase in self.phase_history
-            )
-                
-            task_entry = {
-                'phases': self.phase_history,
-                'status': 'Completed with Cheating' if task_was_cheated else 'Completed Clean',
-                'task_name': self.current_task_name  # Save the task name
-            }
-            
-            # Debug print
-            print(f"Completing task '{self.current_task_name}' with status: {task_entry['status']}")
-            print(f"Phase history: {self.phase_history}")
-            
-            success = self.history_manager.save_daily_history(task_entry)
-            print(f"History save result: {success}")
-            
-            # Reset for a new task
-            self.current_phase_index = 0
-            self.phase_history = []
-            self.phase_cheated = [False] * 5
-            
-            # Set task as inactive
-            self.task_active = False
-            self.current_task_name = ""
-            
-            # Reset timer and start blinking green for new task
-            self.reset_timer_for_current_phase()
-            self.start_blinking(initial=True)
-            
-            # Show a temporary status message
-            self.setWindowTitle(f"Task completed! Click Notes to start a new one")
-            
-            # Create a temporary timer to reset the window title
-            reset_title_timer = QTimer(self)
-            reset_title_timer.timeout.connect(lambda: self.setWindowTitle("Timer"))
-            reset_title_timer.setSingleShot(True)
-            reset_title_timer.start(3000)  # Reset title after 3 seconds
+            self.engine.complete_task()
         except Exception as e:
             print(f"Error in complete_task: {e}")
 
-    def go_to_next_phase(self):
-        # If timer is still running, mark this as cheating
-        if not self.is_blinking and self.seconds > 0:
-            # The user clicked Next Phase before timer reached 00:00
-            # This is considered cheating!
-            self.phase_cheated[self.current_phase_index] = True
-            
-            # If we don't have an entry for this phase yet, create one
-            if len(self.phase_history) <= self.current_phase_index:
-                phase = self.phases[self.current_phase_index]
-                phase_entry = {
-                    'name': phase.name,
-                    'status': 'Finished',
-                    'cheated': True  # Mark as cheated
-                }
-                self.phase_history.append(phase_entry)
-            else:
-                # Update existing entry
-                self.phase_history[self.current_phase_index]['cheated'] = True
+    def on_task_completed(self, task_entry):
+        # Debug print
+        print(f"Completing task '{task_entry['task_name']}' with status: {task_entry['status']}")
+        print(f"Phase history: {task_entry['phases']}")
         
-        self.current_phase_index += 1
-            
-        # Check if we've completed all phases
-        if self.current_phase_index >= len(self.phases):
-            # Reset to first phase
-            self.current_phase_index = 0
-            # Reset the cheated status for a new cycle
-            self.phase_cheated = [False] * 5
+        self.io_worker.save_history(self.history_manager, task_entry)
+        
+        # Show a temporary status message
+        self.setWindowTitle(f"Task completed! Click Notes to start a new one")
         
-        # Reset the timer for the new phase
-        self.reset_timer_for_current_phase()
+        # Reset title after 3 seconds
+        self.scheduler.call_later('reset_title', 3000, lambda: self.setWindowTitle("Timer"))
+
+    def on_history_scanned(self, results):
+        problems = [result for result in results if result['status'] != OK_STATUS]
+        print(f"History integrity scan: {len(results)} file(s) checked, {len(problems)} with problems")
+        if any(result.get('quarantined') for result in problems) and self.notes_dialog is not None:
+            # Repaired days may have changed under an open notes window
+            if self.notes_dialog.isVisible():
+                self.notes_dialog.load_current_date_history()
+
+    def on_history_saved(self, success):
+        print(f"History save result: {success}")
         
-        # Start the timer again
-        self.timer.start(1000)
+        # Show the new entry if the notes window is still open
+        if success and self.notes_dialog is not None and self.notes_dialog.isVisible():
+            self.notes_dialog.load_current_date_history()
+
+    def handle_remote_command(self, command, argument):
+        """Run a command received from another process by the InstanceServer
         
-        # Stop blinking if it was blinking
-        if self.is_blinking:
-            self.stop_blinking()
+        Args:
+            command (str): start, next, complete, remaining, show or ping
+            argument (str): Task name for start, otherwise unused
+            
+        Returns:
+            dict: Reply sent back as JSON; 'ok' says whether the command was carried out
+        """
+        engine = self.engine
+        if command == 'ping':
+            return {'ok': True}
+        
+        if command == 'show':
+            self.show()
+            self.raise_()
+            self.activateWindow()
+            return {'ok': True}
+        
+        if command == 'start':
+            if not argument:
+                return {'ok': False, 'error': "start needs a task name"}
+            if engine.task_active:
+                # Like the GUI, which only offers New Task once the current one is complete
+                return {'ok': False, 'error': "A task is already active"}
+            self.initialize_task(argument)
+        elif command == 'next':
+            if not engine.task_active:
+                return {'ok': False, 'error': "No active task"}
+            # Records the phase as opening the notes window would, so the saved entry matches the GUI's
+            engine.advance_phase()
+        elif command == 'complete':
+            if not engine.task_active:
+                return {'ok': False, 'error': "No active task"}
+            engine.finish_task()
+        elif command != 'remaining':
+            return {'ok': False, 'error': f"Unknown command '{command}'"}
+        
+        # Keep an open notes window in step with what the command changed
+        if command != 'remaining' and self.notes_dialog is not None and self.notes_dialog.isVisible():
+            self.notes_dialog.refresh_state(**self.notes_state())
+        
+        phase = engine.current_phase() if engine.task_active else None
+        remaining = engine.remaining()
+        return {
+            'ok': True,
+            'task': engine.current_task_name or None,
+            'phase': phase.name if phase else None,
+            'phase_index': engine.current_phase_index if engine.task_active else None,
+            'remaining': max(0.0, round(remaining, 3)) if remaining is not None else engine.seconds,
+            'running': remaining is not None,
+            'finished': engine.is_blinking and not engine.initial_state
+        }
 
     def update_time_display(self):
-        minutes = self.seconds // 60
-        seconds = self.seconds % 60
+        engine = self.engine
+        minutes = engine.seconds // 60
+        seconds = engine.seconds % 60
         time_str = f"{minutes:02d}:{seconds:02d}"
         self.time_label.setText(time_str)
         
         # Show appropriate window title
-        if self.task_active:
-            if self.current_phase_index < len(self.phases):
-                phase = self.phases[self.current_phase_index]
-                self.setWindowTitle(f"{self.current_task_name} - {phase.name}")
+        if engine.task_active:
+            phase = engine.current_phase()
+            if phase is not None:
+                self.setWindowTitle(f"{engine.current_task_name} - {phase.name}")
         else:
             # No active task
             self.setWindowTitle("Timer")
@@ -511,66 +607,41 @@ class TimerWindow(QMainWindow):
         settings = self.settings_manager.load_settings()
         
         self.current_scale = settings.get('scale', 1.0)
+        self.history_backend = settings.get('history_backend', 'json')
+        self.theme = settings.get('theme', DEFAULT_THEME)
         
         # Create phase objects from loaded data
-        phase_data = settings.get('phases', [])
-        if phase_data:
-            self.phases = []
-            for phase_dict in phase_data:
-                self.phases.append(PhaseSettings(
-                    name=phase_dict.get('name', 'Phase'),
-                    minutes=phase_dict.get('minutes', 30),
-                    seconds=phase_dict.get('seconds', 0)
-                ))
-        else:
-            # Default single phase if no phases found
-            self.phases = [PhaseSettings()]
-        
-        # Set the current phase to the first one
-        self.current_phase_index = 0
-        self.phase_history = []
+        self.engine.set_phases(phases_from_settings(settings))
 
     def save_current_settings(self):
+        # Snapshot the phases so later edits can't race the background write
         settings = {
             'scale': self.current_scale,
-            'phases': self.phases
+            'history_backend': self.history_backend,
+            'theme': self.theme,
+            'phases': [
+                {'name': phase.name, 'minutes': phase.minutes, 'seconds': phase.seconds}
+                for phase in self.engine.phases
+            ]
         }
         
-        # Save to file
-        self.settings_manager.save_settings(settings)
+        # Save to file in the background
+        self.io_worker.save_settings(self.settings_manager, settings)
 
-    def apply_settings_changes(self, scale_factor, phases):
+    def apply_settings_changes(self, scale_factor, phases, theme):
         # Apply size changes
         self.apply_size_change(scale_factor)
         
-        # Update phases
-        self.phases = phases
+        # Switch theme; this only swaps cached stylesheets and icons
+        self.theme_manager.apply_theme(theme)
+        self.theme = self.theme_manager.theme_name
         
-        # Reset the timer for the current phase - this will now respect task_active state
-        self.reset_timer_for_current_phase()
-        
-        # Only start the timer if a task is active, otherwise go back to blinking state
-        if self.task_active:
-            self.timer.start(1000)
-        else:
-            # Start blinking green for new task again
-            self.start_blinking(initial=True)
+        # Update phases and restart the current phase with them
+        self.engine.update_phases(phases)
         
         # Save settings to file
         self.save_current_settings()
 
-    def reset_timer_for_current_phase(self):
-        if not self.task_active:
-            # No active task, always show 00:00
-            self.seconds = 0
-        elif self.current_phase_index < len(self.phases):
-            # Active task, set timer to phase duration
-            phase = self.phases[self.current_phase_index]
-            self.seconds = phase.get_total_seconds()
-        
-        # Update the display
-        self.update_time_display()
-
     def apply_initial_scale(self):
         if hasattr(self, 'current_scale') and self.current_scale != 1.0:
             self.apply_size_change(self.current_scale)
\ No newline at end of file
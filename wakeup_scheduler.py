@@ -0,0 +1,117 @@
+import math
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+# Periodic work runs on multiples of this quantum so jobs share wakeups
+TICK_QUANTUM_MS = 250
+# A delayed call may be pushed back this much to share a wakeup with other work
+COALESCE_WINDOW_MS = 250
+# Non-exact jobs due this soon after a wakeup run in it instead of waking again
+COALESCE_SLACK_MS = 20
+
+
+class WakeupScheduler(QObject):
+    """Single timer that owns all periodic and delayed work of the app
+
+    Periodic jobs are aligned to a shared grid starting at the scheduler's
+    epoch, delayed calls are coalesced with work that is already due around
+    the same time, and the underlying timer is stopped entirely while no job
+    is registered. Every wakeup is counted so idle behaviour can be measured.
+
+    Jobs are identified by name; registering a name again replaces the job.
+    """
+
+    def __init__(self, parent=None, clock=time.monotonic):
+        super().__init__(parent)
+        self.clock = clock
+        self.epoch = clock()
+
+        self._jobs = {}
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+
+        # Wakeup accounting
+        self.wakeups = 0
+        self.job_runs = {}
+
+    def add_periodic(self, name, period_ms, callback):
+        """Run callback every period_ms, rounded up to the tick quantum"""
+        period = math.ceil(period_ms / TICK_QUANTUM_MS) * TICK_QUANTUM_MS / 1000
+        # First run on the next grid point, so equal periods always coincide
+        elapsed = self.clock() - self.epoch
+        due = self.epoch + (math.floor(elapsed / period) + 1) * period
+        self._add_job(name, due, callback, period=period, exact=False)
+
+    def call_later(self, name, delay_ms, callback):
+        """Run callback once after at least delay_ms, sharing a wakeup if one is close"""
+        due = self.clock() + delay_ms / 1000
+        window = COALESCE_WINDOW_MS / 1000
+        nearby = [job['due'] for job in self._jobs.values() if due <= job['due'] <= due + window]
+        if nearby:
+            due = min(nearby)
+        self._add_job(name, due, callback, period=None, exact=False)
+
+    def call_at(self, name, when, callback):
+        """Run callback once at the monotonic time when, never earlier"""
+        self._add_job(name, when, callback, period=None, exact=True)
+
+    def cancel(self, name):
+        if self._jobs.pop(name, None) is not None:
+            self._reschedule()
+
+    def is_scheduled(self, name):
+        return name in self._jobs
+
+    def stats(self):
+        """Wakeup counts since the scheduler was created"""
+        return {
+            'uptime': self.clock() - self.epoch,
+            'wakeups': self.wakeups,
+            'job_runs': dict(self.job_runs),
+            'active_jobs': sorted(self._jobs)
+        }
+
+    def _add_job(self, name, due, callback, period, exact):
+        self._jobs[name] = {
+            'due': due,
+            'callback': callback,
+            'period': period,
+            'exact': exact
+        }
+        self._reschedule()
+
+    def _reschedule(self):
+        if not self._jobs:
+            # Nothing left to do: go fully quiescent
+            self._timer.stop()
+            return
+        next_due = min(job['due'] for job in self._jobs.values())
+        delay = max(0, math.ceil((next_due - self.clock()) * 1000))
+        self._timer.start(delay)
+
+    def _on_timeout(self):
+        self.wakeups += 1
+        now = self.clock()
+        slack = COALESCE_SLACK_MS / 1000
+
+        due_jobs = [
+            (name, job) for name, job in self._jobs.items()
+            if job['due'] <= now or (not job['exact'] and job['due'] <= now + slack)
+        ]
+        for name, job in due_jobs:
+            # A callback may have cancelled or replaced this job
+            if self._jobs.get(name) is not job:
+                continue
+            if job['period'] is None:
+                del self._jobs[name]
+            else:
+                # Stay on the grid, skipping runs that were missed entirely
+                missed = max(0, math.floor((now - job['due']) / job['period']))
+                job['due'] += (missed + 1) * job['period']
+            self.job_runs[name] = self.job_runs.get(name, 0) + 1
+            job['callback']()
+
+        self._reschedule()